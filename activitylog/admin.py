@@ -1,7 +1,7 @@
 # oppia/activitylog/admin.py
 from django.contrib import admin
 
-from activitylog.models import UploadedActivityLog
+from activitylog.models import UploadedActivityLog, ActivityLogCheckpoint
 
 
 class UploadedActivityLogAdmin(admin.ModelAdmin):
@@ -9,4 +9,10 @@ class UploadedActivityLogAdmin(admin.ModelAdmin):
     search_fields = ['create_user__username', 'file']
 
 
+class ActivityLogCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('file_hash', 'users_done', 'trackers_done', 'quizresponses_done', 'lastupdated_date')
+    search_fields = ['file_hash']
+
+
 admin.site.register(UploadedActivityLog, UploadedActivityLogAdmin)
+admin.site.register(ActivityLogCheckpoint, ActivityLogCheckpointAdmin)
@@ -1,12 +1,105 @@
 import fnmatch
+import json
+import multiprocessing
 import os
 import time
 
-from django.core.management.base import BaseCommand
+from collections import Counter
 
-from activitylog.views import process_activitylog
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from activitylog.reader import ActivityLogReader
+from activitylog.views import process_activitylog_file
 from helpers.messages import MessagesDelegate
 
+REPORT_COUNTS = ['users',
+                 'trackers',
+                 'tracker_duplicates',
+                 'tracker_errors',
+                 'quizresponses',
+                 'quizresponse_duplicates',
+                 'quizresponse_errors']
+
+
+def process_activitylog_worker(filename):
+    '''
+    Processes an activity log file, returning its report. Runs in a worker
+    process (with --workers), which gets its own database connection
+    '''
+    print('Processing {}:'.format(filename))
+    start_time = time.time()
+    counts = Counter()
+    try:
+        with open(filename, 'rb') as file:
+            success, errors = process_activitylog_file(MessagesDelegate(), file, counts)
+    except Exception as e:
+        # the rest of the files are still processed
+        success, errors = False, [repr(e)]
+
+    if success:
+        print("Success!")
+    else:
+        print("Errors: " + str(errors))
+
+    report = {'file': filename, 'success': success, 'errors': errors or []}
+    report.update({count: counts[count] for count in REPORT_COUNTS})
+    report['time_taken'] = round(time.time() - start_time, 3)
+    return report
+
+
+def process_activitylog_group_worker(filenames):
+    '''
+    Processes a group of activity log files one after the other in the same
+    worker process, returning their reports
+    '''
+    return [process_activitylog_worker(filename) for filename in filenames]
+
+
+def get_file_usernames(filename):
+    '''
+    The usernames in an activity log file, read a user at a time (none if
+    the file can't be read, it's reported when it's processed)
+    '''
+    try:
+        with open(filename, encoding='utf-8-sig') as file:
+            for key, value in ActivityLogReader(file).iter_items():
+                if key == 'users':
+                    return {user.get('username') for user in value if isinstance(user, dict)}
+    except (OSError, ValueError):
+        pass
+    return set()
+
+
+def group_files_by_user(filenames):
+    '''
+    Groups the files so all the files with any of the same users are in the
+    same group, largest first. The trackers and quiz responses already
+    uploaded are only checked for before they're inserted, so the files of
+    one user must be processed by the same worker, or two workers could both
+    insert the same ones
+    '''
+    parents = list(range(len(filenames)))
+
+    def find(idx):
+        while parents[idx] != idx:
+            parents[idx] = parents[parents[idx]]
+            idx = parents[idx]
+        return idx
+
+    user_files = {}
+    for idx, filename in enumerate(filenames):
+        for username in get_file_usernames(filename):
+            if username in user_files:
+                parents[find(idx)] = find(user_files[username])
+            else:
+                user_files[username] = idx
+
+    groups = {}
+    for idx, filename in enumerate(filenames):
+        groups.setdefault(find(idx), []).append(filename)
+    return sorted(groups.values(), key=len, reverse=True)
+
 
 class Command(BaseCommand):
     help = 'Script to process activity log files from a source directory'
@@ -20,6 +113,25 @@ class Command(BaseCommand):
                   "process")
         )
 
+        parser.add_argument(
+            '--workers',
+            type=int,
+            dest='workers',
+            default=1,
+            help=("Number of processes to process the files with (all the "
+                  "files of each user are processed by the same one)")
+        )
+
+        parser.add_argument(
+            '--report',
+            type=str,
+            dest='report',
+            default=None,
+            help=("File to write a JSON summary to: the users, trackers and "
+                  "quiz responses added, already uploaded and not valid, "
+                  "errors and time taken for each file and in total")
+        )
+
     def get_files(self, path):
         if not os.path.exists(path):
             print('Error: File "{}" does not exist'.format(path))
@@ -45,6 +157,9 @@ class Command(BaseCommand):
         return jsonfiles
 
     def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
         sourcedir = options['source']
         jsonfiles = self.get_files(sourcedir)
 
@@ -52,17 +167,29 @@ class Command(BaseCommand):
             exit(-1)
 
         start_time = time.time()
-        messages_delegate = MessagesDelegate()
-        for json in jsonfiles:
-            filename = os.path.join(sourcedir, json)
-            print('Processing {}:'.format(filename))
-            with open(filename, 'rb') as file:
-                file_data = file.read()
-                success, errors = process_activitylog(messages_delegate, file_data)
-                if success:
-                    print("Success!")
-                else:
-                    print("Errors: " + str(errors))
-
+        filenames = [os.path.join(sourcedir, json_file) for json_file in sorted(jsonfiles)]
+        if options['workers'] > 1:
+            groups = group_files_by_user(filenames)
+            # each worker process must open its own database connection
+            connections.close_all()
+            with multiprocessing.Pool(processes=options['workers']) as pool:
+                reports = {report['file']: report
+                           for group_reports in pool.map(process_activitylog_group_worker, groups, chunksize=1)
+                           for report in group_reports}
+            files = [reports[filename] for filename in filenames]
+        else:
+            files = [process_activitylog_worker(filename) for filename in filenames]
+
+        totals = {'files': len(files),
+                  'succeeded': sum(1 for file in files if file['success']),
+                  'failed': sum(1 for file in files if not file['success'])}
+        totals.update({count: sum(file[count] for file in files) for count in REPORT_COUNTS})
+        totals['time_taken'] = round(time.time() - start_time, 3)
+
+        if options['report']:
+            with open(options['report'], 'w') as report_file:
+                json.dump({'workers': options['workers'], 'totals': totals, 'files': files}, report_file, indent=4)
+
+        self.stdout.write(', '.join('{}: {}'.format(name, value) for name, value in totals.items()))
         print("Process finished. Time taken: %s seconds"
-              % (time.time() - start_time))
+              % totals['time_taken'])
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.8 on 2026-10-18 21:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activitylog', '0002_auto_20190321_0755'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLogCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=40, unique=True)),
+                ('users_done', models.IntegerField(default=0)),
+                ('trackers_done', models.IntegerField(default=0)),
+                ('quizresponses_done', models.IntegerField(default=0)),
+                ('lastupdated_date', models.DateTimeField(default=django.utils.timezone.now,
+                                                          verbose_name='date updated')),
+            ],
+            options={
+                'verbose_name': 'Activity Log Checkpoint',
+                'verbose_name_plural': 'Activity Log Checkpoints',
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 # oppia/activitylog/models.py
+import hashlib
 import os
 
 from django.contrib.auth.models import User
@@ -27,6 +28,46 @@ class UploadedActivityLog(models.Model):
         return self.file.name
 
 
+class ActivityLogCheckpoint(models.Model):
+    '''
+    How far processing an activity log file got (the file identified by the
+    SHA-1 of its contents), saved along with each batch. It's removed once
+    the file has been processed, so if processing fails part way through,
+    it resumes from the last batch saved when the file is processed again
+    '''
+    file_hash = models.CharField(max_length=40, unique=True)
+    users_done = models.IntegerField(default=0)
+    trackers_done = models.IntegerField(default=0)
+    quizresponses_done = models.IntegerField(default=0)
+    lastupdated_date = models.DateTimeField('date updated',
+                                            default=timezone.now)
+
+    class Meta:
+        verbose_name = _(u'Activity Log Checkpoint')
+        verbose_name_plural = _(u'Activity Log Checkpoints')
+
+    def __str__(self):
+        return self.file_hash
+
+    @staticmethod
+    def get_file_hash(file, chunk_size=64 * 1024):
+        file_hash = hashlib.sha1()
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            file_hash.update(chunk)
+        file.seek(0)
+        return file_hash.hexdigest()
+
+    def next_user(self):
+        self.users_done += 1
+        self.trackers_done = 0
+        self.quizresponses_done = 0
+        self.save()
+
+    def save(self, *args, **kwargs):
+        self.lastupdated_date = timezone.now()
+        super().save(*args, **kwargs)
+
+
 @receiver(post_delete, sender=UploadedActivityLog)
 def activity_log_delete_file(sender, instance, **kwargs):
     file_to_delete = instance.file.path
@@ -0,0 +1,124 @@
+# oppia/activitylog/reader.py
+import json
+
+
+class ActivityLogReader:
+    '''
+    Reads an activity log JSON file incrementally, so only the top level
+    values and one user (with their trackers and quiz responses) at a time
+    are kept in memory, rather than the whole file
+    '''
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, file):
+        self.file = file
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self, size):
+        data = self.file.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def next_char(self):
+        # skips any whitespace, '' at the end of the file
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more(self.READ_SIZE):
+                return ''
+
+    def expect(self, chars):
+        char = self.next_char()
+        if not char or char not in chars:
+            raise json.JSONDecodeError('Expecting one of %r' % chars, self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def read_value(self):
+        self.next_char()
+        size = self.READ_SIZE
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number at the end of the buffer may carry on in the file
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read_more(size)
+            size *= 2
+
+    def iter_list(self):
+        self.expect('[')
+        if self.next_char() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.read_value()
+            if self.expect(',]') == ']':
+                return
+
+    def iter_items(self):
+        '''
+        Yields (key, value) for the top level object (nothing if the file
+        isn't a JSON object), the users being an iterator over them, read as
+        it's consumed
+        '''
+        if self.next_char() != '{':
+            return
+        self.pos += 1
+        if self.next_char() == '}':
+            return
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            if key == 'users' and self.next_char() == '[':
+                users = self.iter_list()
+                yield key, users
+                # whatever wasn't read by the caller
+                for user in users:
+                    pass
+            else:
+                yield key, self.read_value()
+            if self.expect(',}') == '}':
+                return
+
+
+def read_activitylog(file):
+    '''
+    Returns the top level values of the activity log (server, export date...)
+    and an iterator over its users (None if there are no users), so the
+    server can be checked before any of the users are processed
+    '''
+    header = {}
+    has_users = False
+    for key, value in ActivityLogReader(file).iter_items():
+        if key != 'users':
+            header[key] = value
+        elif 'server' in header:
+            return header, value
+        else:
+            # the users are before the server, so they're skipped to read it
+            # and then read again from the start
+            has_users = True
+            for user in value:
+                pass
+
+    if has_users:
+        file.seek(0)
+        for key, value in ActivityLogReader(file).iter_items():
+            if key == 'users':
+                return header, value
+    return header, None
@@ -1,8 +1,12 @@
+import io
 import json
 
+from collections import Counter
+
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
 from django.http import HttpResponse, HttpResponseBadRequest, HttpRequest
 from django.urls import reverse_lazy
 from django.utils import timezone
@@ -13,18 +17,21 @@ from django.views.generic import FormView
 from tastypie.models import ApiKey
 
 from activitylog.forms import UploadActivityLogForm
-from activitylog.models import UploadedActivityLog
+from activitylog.models import UploadedActivityLog, ActivityLogCheckpoint
+from activitylog.reader import read_activitylog
 from api.resources.tracker import TrackerResource
 from datarecovery.models import DataRecovery
-from helpers.api.tasty_resource import create_resource
 from helpers.messages import MessagesDelegate
 from oppia.permissions import user_can_upload
 from profile.models import UserProfile
-from quiz.api.resources import QuizAttemptResource
+from quiz.api.resources import QuizAttemptResource, QuizAttemptSubmitted
 
 from settings import constants
 from settings.models import SettingProperties
 
+# trackers/quiz responses saved (along with the checkpoint) at once
+BATCH_SIZE = 500
+
 
 @method_decorator(user_can_upload, name='dispatch')
 class UploadView(FormView):
@@ -43,9 +50,8 @@ class UploadView(FormView):
 
         # open file and process
         with open(uploaded_activity_log.file.path, 'rb') as file:
-            file_data = file.read()
             messages_delegate = MessagesDelegate(self.request)
-            success, errors = process_activitylog(messages_delegate, file_data)
+            success, errors = process_activitylog_file(messages_delegate, file)
 
         if success:
             return super().form_valid(form)
@@ -54,52 +60,111 @@ class UploadView(FormView):
 
 
 def process_activitylog(messages_delegate, file_contents):
-    # open file and process
-    json_data = json.loads(file_contents)
-    success, errors = validate_server(messages_delegate, json_data)
-    if not success:
-        return False, errors
-    else:
-        result, errors = process_uploaded_file(messages_delegate, json_data)
-        return result, errors
+    return process_activitylog_file(messages_delegate, io.BytesIO(file_contents))
+
+
+def process_activitylog_file(messages_delegate, file, report=None):
+    '''
+    Processes the activity log one user at a time, saving their trackers and
+    quiz responses in batches. If it fails part way through, processing the
+    same file again carries on after the last batch saved. The users,
+    trackers and quiz responses added (and those already uploaded) are
+    counted in the report Counter, if given
+    '''
+    if report is None:
+        report = Counter()
+    checkpoint, created = ActivityLogCheckpoint.objects.get_or_create(
+        file_hash=ActivityLogCheckpoint.get_file_hash(file))
+    if not created:
+        messages_delegate.info(_(u"Resuming the activity log after %(users)d users" % {'users': checkpoint.users_done}))
+
+    json_file = io.TextIOWrapper(file, encoding='utf-8-sig')
+    try:
+        header, users = read_activitylog(json_file)
+        success, errors = validate_server(messages_delegate, header)
+        if success:
+            success, errors = process_uploaded_file(messages_delegate, users, checkpoint, report)
+    finally:
+        json_file.detach()
 
+    checkpoint.delete()
+    return success, errors
 
-def process_uploaded_trackers(messages_delegate, trackers, user):
+
+def process_uploaded_trackers(messages_delegate, trackers, user, checkpoint, report):
 
     request = HttpRequest()
     request.user = user
-    for tracker in trackers:
-        success, results = create_resource(TrackerResource, request, tracker)
-        if success:
-            messages_delegate.info(
-                          _(u"Tracker activity %(uuid)s for %(username)s added"
-                            % {'username': user.username, 'uuid': tracker.get('digest')}))
-        else:
-            messages_delegate.warning(
-                _(u"Already uploaded: tracker activity %(uuid)s for "
-                  "%(username)s" % {'username': user.username, 'uuid': tracker.get('digest', None)}),
-                'danger')
+    resource = TrackerResource()
+    for start in range(checkpoint.trackers_done, len(trackers), BATCH_SIZE):
+        batch = [resource.alter_deserialized_detail_data(request, tracker)
+                 for tracker in trackers[start:start + BATCH_SIZE]]
+        to_save = []
+        for tracker, bundle in resource.hydrate_batch(request, batch):
+            if bundle is not None and not bundle.errors:
+                to_save.append(bundle.obj)
+                report['trackers'] += 1
+                messages_delegate.info(
+                              _(u"Tracker activity %(uuid)s for %(username)s added"
+                                % {'username': user.username, 'uuid': tracker.get('digest')}))
+            elif bundle is not None:
+                report['tracker_errors'] += 1
+                messages_delegate.warning(
+                    _(u"Not valid: tracker activity %(uuid)s for "
+                      "%(username)s" % {'username': user.username, 'uuid': tracker.get('digest')}),
+                    'danger')
+            else:
+                report['tracker_duplicates'] += 1
+                messages_delegate.warning(
+                    _(u"Already uploaded: tracker activity %(uuid)s for "
+                      "%(username)s" % {'username': user.username, 'uuid': tracker.get('digest')}),
+                    'danger')
 
+        with transaction.atomic():
+            TrackerResource.save_trackers(to_save)
+            checkpoint.trackers_done = start + len(batch)
+            checkpoint.save()
 
-def process_uploaded_quizresponses(messages_delegate, quiz_responses, user):
+
+def process_uploaded_quizresponses(messages_delegate, quiz_responses, user, checkpoint, report):
 
     request = HttpRequest()
     request.user = user
-    for quizattempt in quiz_responses:
-        success, results = create_resource(QuizAttemptResource, request, quizattempt)
-        if success:
-            messages_delegate.info(_(u"Quiz attempt for %(username)s added"
-                                     % {'username': user.username}))
-        else:
-            messages_delegate.info(
-                _(u"Already uploaded: quiz attempt for %(username)s added" %
-                  {'username': user.username}))
-
-
-def process_uploaded_file(messages_delegate, json_data):
+    resource = QuizAttemptResource()
+    for start in range(checkpoint.quizresponses_done, len(quiz_responses), BATCH_SIZE):
+        batch = [resource.alter_deserialized_detail_data(request, quizattempt)
+                 for quizattempt in quiz_responses[start:start + BATCH_SIZE]]
+        to_save = []
+        for quizattempt, bundle, error in resource.hydrate_batch(request, batch):
+            if bundle is not None:
+                to_save.append(bundle)
+                report['quizresponses'] += 1
+                messages_delegate.info(_(u"Quiz attempt for %(username)s added"
+                                         % {'username': user.username}))
+            elif not isinstance(error, QuizAttemptSubmitted):
+                report['quizresponse_errors'] += 1
+                messages_delegate.warning(
+                    _(u"Not valid: quiz attempt for %(username)s: %(error)s" %
+                      {'username': user.username, 'error': error}),
+                    'danger')
+            else:
+                report['quizresponse_duplicates'] += 1
+                messages_delegate.info(
+                    _(u"Already uploaded: quiz attempt for %(username)s added" %
+                      {'username': user.username}))
+
+        with transaction.atomic():
+            QuizAttemptResource.save_attempts(to_save)
+            checkpoint.quizresponses_done = start + len(batch)
+            checkpoint.save()
+
+
+def process_uploaded_file(messages_delegate, users, checkpoint, report):
     errors = []
-    if 'users' in json_data:
-        for user in json_data['users']:
+    if users is not None:
+        for index, user in enumerate(users):
+            if index < checkpoint.users_done:
+                continue
             username = user['username']
             req_user = get_user_from_uploaded_log(messages_delegate, user)
             user_profile_data = {data: user[data] for data in user if data not in ["username",
@@ -118,12 +183,16 @@ def process_uploaded_file(messages_delegate, json_data):
                          'danger')
 
                 if 'trackers' in user:
-                    process_uploaded_trackers(messages_delegate, user['trackers'], req_user)
+                    process_uploaded_trackers(messages_delegate, user['trackers'], req_user, checkpoint, report)
                 else:
                     errors.append(DataRecovery.Reason.MISSING_TRACKERS_TAG)
                     return False, errors
                 if 'quizresponses' in user:
-                    process_uploaded_quizresponses(messages_delegate, user['quizresponses'], req_user)
+                    process_uploaded_quizresponses(messages_delegate,
+                                                   user['quizresponses'],
+                                                   req_user,
+                                                   checkpoint,
+                                                   report)
                 else:
                     errors.append(DataRecovery.Reason.MISSING_QUIZRESPONSES_TAG)
                     return False, errors
@@ -132,6 +201,8 @@ def process_uploaded_file(messages_delegate, json_data):
                 messages_delegate.warning(
                      _(u"%(username)s not found. Please check that this file is being uploaded to \
                        the correct server." % {'username': username}), 'danger')
+            checkpoint.next_user()
+            report['users'] += 1
     else:
         errors.append(DataRecovery.Reason.MISSING_USER_TAG)
         return False, errors
@@ -146,14 +217,21 @@ def get_user_from_uploaded_log(messages_delegate, user):
         if user[field] == "null":
             user[field] = None
 
-    if not User.objects.filter(username=username).exists():
+    req_user = User.objects.filter(username=username).first()
+    if req_user is None:
         # User was registered offline, we create a new one
         req_user = User(username=username, email=user.get('email', ''))
 
         req_user.password = user.get('password', make_password(None))
         req_user.first_name = user.get('firstname', '')
         req_user.last_name = user.get('lastname', '')
-        req_user.save()
+        try:
+            with transaction.atomic():
+                req_user.save()
+        except IntegrityError:
+            # created in the meantime by another process (eg another log
+            # with the same user processed in parallel)
+            return User.objects.get(username=username)
 
         DataRecovery.create_data_recovery_entry(
             user=req_user,
@@ -165,9 +243,6 @@ def get_user_from_uploaded_log(messages_delegate, user):
         messages_delegate.warning(
             _(u"%(username)s did not exist previously, and was created." % {'username': username}), 'danger')
 
-    else:
-        req_user = User.objects.filter(username=username).first()
-
     return req_user
 
 
@@ -1,6 +1,5 @@
 import json
 
-from django.db.models import Q
 from django.http import HttpResponse, Http404
 from django.urls.conf import re_path
 from tastypie import fields
@@ -9,10 +8,11 @@ from tastypie.authorization import ReadOnlyAuthorization
 from tastypie.resources import ModelResource
 from tastypie.utils import trailing_slash
 
-from oppia.models import Course, Category, CoursePermissions, Participant
+from api.utils import get_conditional_response, get_etag
+from oppia.course_index import course_index
+from oppia.models import Course, Category
 
 from api.resources.course import CourseResource
-from oppia.utils.filters import CourseCategoryFilter, CourseFilter
 
 
 class CategoryResource(ModelResource):
@@ -36,29 +36,37 @@ class CategoryResource(ModelResource):
         include_resource_uri = False
 
     def get_object_list(self, request):
-        if request.user.is_staff:
-            return Category.objects.filter(
-                Q(courses__isnull=False)
-                & CourseCategoryFilter.COURSE_IS_NOT_ARCHIVED) \
-                .distinct().order_by(
-                '-order_priority', 'name')
-        else:
-            user_cohorts = Participant.get_user_cohorts(request.user)
-
-            return Category.objects.filter(
-                Q(courses__isnull=False)
-                & CourseCategoryFilter.COURSE_IS_NOT_ARCHIVED
-                & (CourseCategoryFilter.COURSE_IS_NOT_DRAFT
-                   | (CourseCategoryFilter.COURSE_IS_DRAFT & Q(coursecategory__course__user=request.user))
-                   | (CourseCategoryFilter.COURSE_IS_DRAFT & Q(
-                       coursecategory__course__coursepermissions__user=request.user))
-
-                   )
-                & (CourseCategoryFilter.COURSE_IS_NOT_RESTRICTED
-                   | (CourseCategoryFilter.COURSE_IS_RESTRICTED
-                      & Q(coursecategory__course__coursecohort__cohort__in=user_cohorts)))
-                ) \
-                .distinct().order_by('-order_priority', 'name')
+        categories = course_index.get_categories(request.user)
+        return Category.objects.filter(pk__in=[category['id'] for category in categories]) \
+            .order_by('-order_priority', 'name')
+
+    def get_list(self, request, **kwargs):
+        '''
+        The same response as the default get_list, but built from the course
+        index, so the app's home screen doesn't need any queries (other than
+        the authentication) while it's cached, and with an ETag, answering
+        304 Not Modified if the client already has the list
+        '''
+        self.authorized_read_list([], self.build_bundle(request=request))
+
+        etag = get_etag(request, course_index.get_categories_digest(request.user))
+        return get_conditional_response(request, etag, lambda: self.get_tag_list_response(request))
+
+    def get_tag_list_response(self, request):
+        tags = []
+        for category in course_index.get_categories(request.user):
+            tag = dict(category)
+            if tag['icon'] is not None:
+                tag['icon'] = request.build_absolute_uri(tag['icon'])
+            tags.append(tag)
+
+        paginator = self._meta.paginator_class(request.GET,
+                                               tags,
+                                               resource_uri=self.get_resource_uri(),
+                                               limit=self._meta.limit,
+                                               max_limit=self._meta.max_limit,
+                                               collection_name=self._meta.collection_name)
+        return self.create_response(request, self.alter_list_data_to_serialize(request, paginator.page()))
 
     def prepend_urls(self):
         return [
@@ -78,18 +86,10 @@ class CategoryResource(ModelResource):
         except Category.DoesNotExist:
             raise Http404()
 
-        if request.user.is_staff:
-            courses = Course.objects.filter(category=category).filter(CourseFilter.IS_NOT_ARCHIVED).order_by(
-                '-priority', 'title')
-        else:
-            courses = Course.objects.filter(category=category) \
-                .filter(CourseFilter.IS_NOT_ARCHIVED) \
-                .filter(
-                CourseFilter.IS_NOT_DRAFT |
-                (CourseFilter.IS_DRAFT & Q(user=request.user)) |
-                (CourseFilter.IS_DRAFT & Q(coursepermissions__user=request.user))) \
-                .filter(CourseFilter.get_restricted_filter_for_user(request.user)) \
-                .distinct().order_by('-priority', 'title')
+        courses = Course.objects.filter(pk__in=course_index.get_category_courses(request.user, category.id)) \
+            .select_related('user__userprofile') \
+            .prefetch_related('coursecohort_set') \
+            .order_by('-priority', 'title')
 
         course_data = []
         cr = CourseResource()
@@ -100,26 +100,18 @@ class CategoryResource(ModelResource):
 
         response = HttpResponse(
             content=json.dumps({'id': pk,
-                                'count': courses.count(),
+                                'count': len(course_data),
                                 'courses': course_data,
                                 'name': category.name}),
             content_type="application/json; charset=utf-8")
         return response
 
+    def get_indexed_category(self, bundle):
+        return next(category for category in course_index.get_categories(bundle.request.user)
+                    if category['id'] == bundle.obj.id)
+
     def dehydrate_count(self, bundle):
-        tmp = Course.objects.filter(category__id=bundle.obj.id).filter(CourseFilter.IS_NOT_ARCHIVED)
-        if bundle.request.user.is_staff:
-            count = tmp.count()
-        else:
-            count = tmp\
-                .filter(CourseFilter.IS_NOT_DRAFT
-                        | (CourseFilter.IS_DRAFT & Q(user=bundle.request.user))
-                        | (CourseFilter.IS_DRAFT
-                           & Q(pk__in=CoursePermissions.objects.filter(
-                               user=bundle.request.user).values('course'))))\
-                .filter(CourseFilter.get_restricted_filter_for_user(bundle.request.user))\
-                .count()
-        return count
+        return self.get_indexed_category(bundle)['count']
 
     def dehydrate_icon(self, bundle):
         if bundle.data['icon'] is not None:
@@ -128,29 +120,10 @@ class CategoryResource(ModelResource):
             return None
 
     def dehydrate_count_new_downloads_enabled(self, bundle):
-        courses = Course.objects.filter(category=bundle.obj).filter(CourseFilter.IS_NOT_ARCHIVED)
-
-        if not bundle.request.user.is_staff:
-            courses = courses.filter(CourseFilter.IS_NOT_DRAFT
-                                     | Q(pk__in=CoursePermissions.objects.filter(
-                                         user=bundle.request.user).values('course'))
-                                     | (CourseCategoryFilter.COURSE_IS_DRAFT
-                                        & Q(coursecategory__course__user=bundle.request.user)))\
-                    .filter(CourseFilter.get_restricted_filter_for_user(bundle.request.user)).distinct()
-
-        return courses.filter(category=bundle.obj).filter(CourseFilter.NEW_DOWNLOADS_ENABLED).count()
+        return self.get_indexed_category(bundle)['count_new_downloads_enabled']
 
     def dehydrate_course_statuses(self, bundle):
-        courses = Course.objects.filter(category=bundle.obj).filter(CourseFilter.IS_NOT_ARCHIVED)
-
-        if not bundle.request.user.is_staff:
-            courses = courses.filter(CourseFilter.IS_NOT_DRAFT
-                                     | Q(pk__in=CoursePermissions.objects.filter(
-                                         user=bundle.request.user).values('course'))
-                                     | (CourseCategoryFilter.COURSE_IS_DRAFT
-                                        & Q(coursecategory__course__user=bundle.request.user)))
-
-        return {course.shortname: course.status for course in courses}
+        return self.get_indexed_category(bundle)['course_statuses']
 
     def alter_list_data_to_serialize(self, request, data):
         if isinstance(data, dict) and 'objects' in data:
@@ -1,25 +1,28 @@
 import json
 import os
 import re
-import shutil
-import zipfile
 
-import xmltodict
 from django.conf import settings
-from django.core.exceptions import MultipleObjectsReturned
-from django.db.models import Q
-from django.http import HttpResponse, Http404, HttpResponseRedirect
+from django.core.cache import cache
+from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
+from django.db.models import Count, Max, Q
+from django.http import FileResponse, HttpResponse, Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.urls.conf import re_path
+from django.utils.http import quote_etag
 from django.utils.translation import gettext_lazy as _
-from tastypie import fields
+from tastypie import fields, http
 from tastypie.authentication import ApiKeyAuthentication, Authentication
 from tastypie.authorization import ReadOnlyAuthorization, Authorization
 from tastypie.resources import ModelResource
 from tastypie.utils import trailing_slash
 
 from api.serializers import CourseJSONSerializer
-from oppia.models import Tracker, Course, CourseCategory, CourseCohort
+from api.utils import get_conditional_response, get_etag
+from oppia.course_index import course_index
+from oppia.models import Tracker, Course, CourseCategory
+from oppia.utils.course_file import get_course_structure, get_zip_overlay, stream_zip_overlay
 from oppia.utils.filters import CourseFilter
+from quiz.models import QuizAttempt
 
 STR_COURSE_NOT_FOUND = _(u"Course not found")
 
@@ -36,6 +39,30 @@ def get_course_from_shortname(resource, bundle, lookup):
     return object_list
 
 
+def get_course_tracker_overlay(course, user):
+    '''
+    Returns (offset, overlay) for adding the user's tracker.xml to the course
+    zip (see get_zip_overlay), cached until the course file is replaced or the
+    user has new trackers or quiz attempts
+    '''
+    course_path = course.getAbsPath()
+    file_stat = os.stat(course_path)
+    trackers = Tracker.objects.filter(user=user, course=course).aggregate(last_id=Max('id'), count=Count('id'))
+    last_attempt_id = QuizAttempt.objects.filter(user=user).aggregate(last_id=Max('id'))['last_id']
+    stamp = (file_stat.st_mtime, file_stat.st_size, trackers['last_id'], trackers['count'], last_attempt_id)
+
+    cache_key = 'oppia_course_download_%d_%d' % (course.id, user.id)
+    cached = cache.get(cache_key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1], cached[2]
+
+    offset, overlay = get_zip_overlay(course_path,
+                                      {course.shortname + "/tracker.xml": Tracker.to_xml_string(course, user)})
+    if settings.OPPIA_COURSE_DOWNLOAD_CACHE_TIMEOUT:
+        cache.set(cache_key, (stamp, offset, overlay), settings.OPPIA_COURSE_DOWNLOAD_CACHE_TIMEOUT)
+    return offset, overlay
+
+
 class CourseResource(ModelResource):
 
     class Meta:
@@ -75,15 +102,26 @@ class CourseResource(ModelResource):
 
     def get_object_list(self, request):
         if request.user.is_staff:
-            return Course.objects.filter(CourseFilter.IS_NOT_ARCHIVED) \
-                .order_by('-priority', 'title')
+            courses = Course.objects.filter(CourseFilter.IS_NOT_ARCHIVED)
         else:
-            return Course.objects.filter(CourseFilter.IS_NOT_ARCHIVED) \
+            courses = Course.objects.filter(CourseFilter.IS_NOT_ARCHIVED) \
                 .filter(CourseFilter.IS_NOT_DRAFT |
                         (CourseFilter.IS_DRAFT & Q(user=request.user)) |
                         (CourseFilter.IS_DRAFT & Q(coursepermissions__user=request.user))) \
-                .distinct() \
-                .order_by('-priority', 'title')
+                .distinct()
+        # for dehydrate
+        return courses.select_related('user__userprofile') \
+            .prefetch_related('coursecohort_set') \
+            .order_by('-priority', 'title')
+
+    def get_list(self, request, **kwargs):
+        '''
+        The default get_list, with an ETag that only changes with the user's
+        course listing, answering 304 Not Modified if the client already has
+        it, so polling for new courses doesn't list them all each time
+        '''
+        etag = get_etag(request, course_index.get_courses_digest(request.user))
+        return get_conditional_response(request, etag, lambda: super(CourseResource, self).get_list(request, **kwargs))
 
     def prepend_urls(self):
         return [
@@ -139,28 +177,28 @@ class CourseResource(ModelResource):
     def download_course(self, request, **kwargs):
         course = self.get_course(request, **kwargs)
 
-        file_to_download = course.getAbsPath()
+        course_path = course.getAbsPath()
         has_completed_trackers = Tracker.has_completed_trackers(course, request.user)
 
         try:
             if has_completed_trackers:
-                file_to_download = os.path.join(
-                    settings.COURSE_UPLOAD_DIR,
-                    "temp",
-                    str(request.user.id) + "-" + course.filename)
-                shutil.copy2(course.getAbsPath(), file_to_download)
-                course_zip = zipfile.ZipFile(file_to_download, 'a')
-                if has_completed_trackers:
-                    course_zip.writestr(course.shortname + "/tracker.xml",
-                                        Tracker.to_xml_string(course, request.user))
-                course_zip.close()
+                # the original zip followed by the entry for the tracker.xml
+                # (and the central directory rewritten after it)
+                offset, overlay = get_course_tracker_overlay(course, request.user)
+                response = StreamingHttpResponse(stream_zip_overlay(course_path, offset, overlay),
+                                                 content_type='application/zip')
+                response['Content-Length'] = offset + len(overlay)
             elif settings.OPPIA_EXTERNAL_STORAGE:
                 return HttpResponseRedirect(settings.OPPIA_EXTERNAL_STORAGE_COURSE_URL + course.filename)
-
-            binary_file = open(file_to_download, 'rb')
-            response = HttpResponse(binary_file.read(), content_type='application/zip')
-            binary_file.close()
-            response['Content-Length'] = os.path.getsize(file_to_download)
+            elif settings.OPPIA_SENDFILE_HEADER:
+                # unchanged zip, sent by the web server
+                response = HttpResponse(content_type='application/zip')
+                if settings.OPPIA_SENDFILE_HEADER == 'X-Sendfile':
+                    response['X-Sendfile'] = course_path
+                else:
+                    response[settings.OPPIA_SENDFILE_HEADER] = settings.OPPIA_SENDFILE_PREFIX + course.filename
+            else:
+                response = FileResponse(open(course_path, 'rb'), content_type='application/zip')
             response['Content-Disposition'] = 'attachment; filename="%s"' % (course.filename)
         except IOError:
             raise Http404(STR_COURSE_NOT_FOUND)
@@ -170,9 +208,7 @@ class CourseResource(ModelResource):
     def download_activity(self, request, **kwargs):
         course = self.get_course(request, **kwargs)
 
-        return HttpResponse(Tracker.to_xml_string(course,
-                                                  request.user),
-                            content_type='text/xml')
+        return StreamingHttpResponse(Tracker.iter_xml(course, request.user), content_type='text/xml')
 
     def dehydrate(self, bundle):
         bundle.data['url'] = bundle.request.build_absolute_uri(bundle.data['resource_uri'] + 'download/')
@@ -185,9 +221,9 @@ class CourseResource(ModelResource):
         except json.JSONDecodeError:
             pass
 
-        course = Course.objects.get(pk=bundle.obj.pk)
+        course = bundle.obj
 
-        if course and course.user:
+        if course.user:
             bundle.data['author'] = course.user.first_name \
                                     + " " \
                                     + course.user.last_name
@@ -195,7 +231,7 @@ class CourseResource(ModelResource):
             bundle.data['organisation'] = course.user.userprofile.organisation
 
         if course.restricted:
-            bundle.data['cohorts'] = list(CourseCohort.objects.filter(course=course).values_list('cohort', flat=True))
+            bundle.data['cohorts'] = [course_cohort.cohort_id for course_cohort in course.coursecohort_set.all()]
 
         return bundle
 
@@ -253,12 +289,33 @@ class CourseStructureResource(ModelResource):
 
         return return_obj
 
+    @staticmethod
+    def get_etag(course):
+        # the structure only changes when the course is published again
+        return quote_etag('%d-%d-%d' % (course.id, course.version, course.lastupdated_date.timestamp()))
+
+    def get_detail(self, request, **kwargs):
+        '''
+        The default get_detail, with the ETag of the course version, answering
+        304 Not Modified (without reading the structure) if the client
+        already has it
+        '''
+        basic_bundle = self.build_bundle(request=request)
+        try:
+            obj = self.cached_obj_get(bundle=basic_bundle, **self.remove_api_resource_names(kwargs))
+        except ObjectDoesNotExist:
+            return http.HttpNotFound()
+        except MultipleObjectsReturned:
+            return http.HttpMultipleChoices("More than one resource is found at this URI.")
+
+        def get_response():
+            bundle = self.build_bundle(obj=obj, request=request)
+            bundle = self.full_dehydrate(bundle)
+            bundle = self.alter_detail_data_to_serialize(request, bundle)
+            return self.create_response(request, bundle)
+
+        return get_conditional_response(request, self.get_etag(obj), get_response)
+
     def dehydrate(self, bundle):
-        path = os.path.join(settings.MEDIA_ROOT,
-                            'courses',
-                            bundle.obj.shortname,
-                            'module.xml')
-        with open(path) as fd:
-            doc = xmltodict.parse(fd.read())
-        bundle.data['structure'] = json.dumps(doc)
+        bundle.data['structure'] = get_course_structure(bundle.obj.shortname)
         return bundle
@@ -1,8 +1,10 @@
 import json
 import datetime
+import logging
 
 from django.conf import settings
 
+from django.db import transaction
 from django.db.models import Sum
 from django.http import HttpResponse
 from django.utils import dateparse
@@ -11,6 +13,7 @@ from json.decoder import JSONDecodeError
 from tastypie import fields
 from tastypie.authentication import ApiKeyAuthentication
 from tastypie.authorization import Authorization
+from tastypie.exceptions import ImmediateHttpResponse
 from tastypie.resources import ModelResource, \
                                convert_post_to_patch
 from tastypie.utils import timezone
@@ -18,22 +21,53 @@ from tastypie.utils import timezone
 from api.serializers import PrettyJSONSerializer
 from datarecovery.models import DataRecovery
 from oppia import DEFAULT_IP_ADDRESS
-from oppia.models import Activity, Tracker, Media, Points, Award, Course
+from oppia.digest_index import digest_index
+from oppia.models import Tracker, Points, Award, Course, TrackerPointsJob
+from oppia.signals import tracker_batch_points
 
 from api.resources.login import UserResource
 from api.validation import TrackerValidation
 
 from settings import constants
 from settings.models import SettingProperties
+from summary.models import SummaryDelta, UserCourseSummary, UserPointsSummary
 
 NON_ACTIVITY_ALLOWED_TYPES = ['search', 'download']
 
+logger = logging.getLogger(__name__)
+
+
+class TrackerBatchLookup:
+    '''
+    Digest info and courses for all the trackers in a batch, loaded at once
+    rather than once per tracker
+    '''
+
+    def __init__(self, objects):
+        keys = {(data['digest'], data.get('course')) for data in objects if 'digest' in data}
+        # points are based on the digest in any course
+        keys |= {(digest, None) for digest, shortname in keys}
+        self.digests = digest_index.get_many(keys)
+
+        shortnames = {data['course'] for data in objects if 'course' in data}
+        self.courses = {}
+        for course in Course.objects.filter(shortname__in=shortnames):
+            self.courses.setdefault(course.shortname, course)
+
+    def get_digest(self, digest, shortname=None):
+        return self.digests[(digest, shortname)]
+
+    def get_course(self, shortname):
+        return self.courses.get(shortname)
+
 
 class TrackerResource(ModelResource):
     '''
     Submitting a Tracker
     '''
-    user = fields.ForeignKey(UserResource, 'user')
+    # always the request user (set in hydrate), so it's not hydrated from
+    # the data, which would dehydrate the whole user resource per tracker
+    user = fields.ForeignKey(UserResource, 'user', readonly=True)
     points = fields.IntegerField(readonly=True)
     badges = fields.IntegerField(readonly=True)
     scoring = fields.BooleanField(readonly=True)
@@ -62,25 +96,23 @@ class TrackerResource(ModelResource):
                   'badging']
         validation = TrackerValidation()
 
+    @staticmethod
+    def get_digest_info(bundle, shortname=None):
+        lookup = getattr(bundle, 'tracker_lookup', None)
+        if lookup is not None:
+            return lookup.get_digest(bundle.data['digest'], shortname)
+        return digest_index.get(bundle.data['digest'], shortname)
+
     def process_tracker_bundle(self, bundle, errors):
-        try:
-            if 'digest' in bundle.data:
-                if 'course' in bundle.data:
-                    media = Media.objects.filter(
-                        digest=bundle.data['digest'],
-                        course__shortname=bundle.data['course']).first()
-                else:
-                    media = Media.objects.filter(
-                        digest=bundle.data['digest']).first()
-            else:
-                errors.append(DataRecovery.Reason.MISSING_MEDIA_DIGEST)
-                media = None
+        if 'digest' in bundle.data:
+            media = self.get_digest_info(bundle, bundle.data.get('course')).media
+        else:
+            errors.append(DataRecovery.Reason.MISSING_MEDIA_DIGEST)
+            media = None
 
-            if media is not None:
-                bundle.obj.course = media.course
-                bundle.obj.type = 'media'
-        except Media.DoesNotExist:
-            pass
+        if media is not None:
+            bundle.obj.course_id = media.course_id
+            bundle.obj.type = 'media'
 
         try:
             json_data = json.loads(bundle.data['data'])
@@ -122,26 +154,33 @@ class TrackerResource(ModelResource):
         self.authorized_create_detail(self.get_object_list(bundle.request), bundle)
         bundle = self.full_hydrate(bundle)
 
-        if bundle.obj.type == 'search':
-            if not bundle.obj.data:
-                return bundle
-            try:
-                json_data = json.loads(bundle.obj.data)
-                if 'query' not in json_data \
-                        or json_data['query'] is None \
-                        or json_data['query'].strip() == "":
-                    return bundle
-            except JSONDecodeError:
-                DataRecovery.create_data_recovery_entry(
-                    user=bundle.request.user,
-                    data_type=DataRecovery.Type.TRACKER,
-                    reasons=[DataRecovery.Reason.JSON_DECODE_ERROR],
-                    data=bundle.data
-                )
-                return bundle
+        if self.is_empty_search(bundle):
+            return bundle
 
         return self.save(bundle)
 
+    def is_empty_search(self, bundle):
+        # searches without a query aren't saved
+        if bundle.obj.type != 'search':
+            return False
+        if not bundle.obj.data:
+            return True
+        try:
+            json_data = json.loads(bundle.obj.data)
+            if 'query' not in json_data \
+                    or json_data['query'] is None \
+                    or json_data['query'].strip() == "":
+                return True
+        except JSONDecodeError:
+            DataRecovery.create_data_recovery_entry(
+                user=bundle.request.user,
+                data_type=DataRecovery.Type.TRACKER,
+                reasons=[DataRecovery.Reason.JSON_DECODE_ERROR],
+                data=bundle.data
+            )
+            return True
+        return False
+
     def hydrate(self, bundle, request=None):
         errors = []
 
@@ -164,37 +203,41 @@ class TrackerResource(ModelResource):
 
         # find out the course & activity type from the digest
         if 'digest' in bundle.data:
-            if 'course' in bundle.data:
-                activity = Activity.objects \
-                    .filter(digest=bundle.data['digest'], section__course__shortname=bundle.data['course']).first()
-            else:
+            if 'course' not in bundle.data:
                 errors.append(DataRecovery.Reason.MISSING_COURSE_TAG)
-                activity = Activity.objects.filter(
-                    digest=bundle.data['digest']).first()
+            activity = self.get_digest_info(bundle, bundle.data.get('course')).activity
         else:
             errors.append(DataRecovery.Reason.MISSING_ACTIVITY_DIGEST)
             activity = None
 
+        course_version = None
         if activity is not None:
-            bundle.obj.course = activity.section.course
+            bundle.obj.course_id = activity.course_id
+            course_version = activity.course_version
             bundle.obj.type = activity.type
             bundle.obj.activity_title = activity.title
-            bundle.obj.section_title = activity.section.title
+            bundle.obj.section_title = activity.section_title
         else:
             if 'course' in bundle.data:
-                bundle.obj.course = Course.objects.filter(shortname=bundle.data['course']).first()
+                lookup = getattr(bundle, 'tracker_lookup', None)
+                if lookup is not None:
+                    bundle.obj.course = lookup.get_course(bundle.data['course'])
+                else:
+                    bundle.obj.course = Course.objects.filter(shortname=bundle.data['course']).first()
+                if bundle.obj.course is not None:
+                    course_version = bundle.obj.course.version
             bundle.obj.activity_title = ''
             bundle.obj.section_title = ''
 
-        if bundle.obj.course is not None:
+        if bundle.obj.course_id is not None:
             if 'course_version' in bundle.data:
                 try:
                     int(bundle.data['course_version'])
                     bundle.obj.course_version = bundle.data['course_version']
                 except ValueError:
-                    bundle.obj.course_version = bundle.obj.course.version
+                    bundle.obj.course_version = course_version
             else:
-                bundle.obj.course_version = bundle.obj.course.version
+                bundle.obj.course_version = course_version
 
         bundle, errors = self.process_tracker_bundle(bundle, errors)
 
@@ -219,6 +262,9 @@ class TrackerResource(ModelResource):
         return bundle
 
     def dehydrate_points(self, bundle):
+        if settings.OPPIA_POINTS_DEFERRED:
+            return UserPointsSummary.objects.filter(user=bundle.request.user) \
+                .values_list('points', flat=True).first() or 0
         points = Points.get_userscore(bundle.request.user)
         return points
 
@@ -240,6 +286,12 @@ class TrackerResource(ModelResource):
         return settings.OPPIA_METADATA
 
     def dehydrate_course_points(self, bundle):
+        if settings.OPPIA_POINTS_DEFERRED:
+            return list(UserCourseSummary.objects
+                        .filter(user=bundle.request.user)
+                        .exclude(points=0)
+                        .values('course__shortname')
+                        .annotate(total_points=Sum('points')))
         course_points = list(
             Points.objects.exclude(course=None)
             .filter(user=bundle.request.user)
@@ -247,29 +299,118 @@ class TrackerResource(ModelResource):
             .annotate(total_points=Sum('points')))
         return course_points
 
+    @staticmethod
+    def get_submitted_uuid(data):
+        if 'data' in data:
+            json_data = json.loads(data['data'])
+            if 'uuid' in json_data:
+                return json_data['uuid']
+        return None
+
+    @staticmethod
+    def set_missing_pks(trackers):
+        '''
+        bulk_create only sets the ids on some databases, on the others (MySQL)
+        they're looked up by the trackers' uuids. Trackers without a uuid are
+        left without an id
+        '''
+        missing = {}
+        for tracker in trackers:
+            if tracker.pk is None and tracker.uuid:
+                missing.setdefault(tracker.uuid, []).append(tracker)
+        if not missing:
+            return
+        uuid_pks = {}
+        for tracker_uuid, pk in Tracker.objects.filter(uuid__in=missing.keys()) \
+                .order_by('-pk') \
+                .values_list('uuid', 'pk'):
+            uuid_pks.setdefault(tracker_uuid, []).append(pk)
+        for tracker_uuid, uuid_trackers in missing.items():
+            # the newest ones, in the order they were inserted
+            pks = sorted(uuid_pks.get(tracker_uuid, [])[:len(uuid_trackers)])
+            if len(pks) == len(uuid_trackers):
+                for tracker, pk in zip(uuid_trackers, pks):
+                    tracker.pk = pk
+
+    @staticmethod
+    def save_trackers(trackers):
+        # bulk_create doesn't send post_save, so the points (and summary
+        # deltas) the signals would add are created here for the whole batch
+        with transaction.atomic():
+            Tracker.objects.bulk_create(trackers)
+            TrackerResource.set_missing_pks(trackers)
+            deferred = settings.OPPIA_POINTS_DEFERRED and all(tracker.pk for tracker in trackers)
+            if settings.OPPIA_POINTS_DEFERRED and not deferred:
+                logger.warning('Awarding the points for %d trackers straight away, as some of them have no uuid '
+                               'to look up their ids with', len(trackers))
+            if deferred:
+                TrackerPointsJob.objects.bulk_create([TrackerPointsJob(tracker=tracker) for tracker in trackers])
+                points = []
+            else:
+                points = Points.objects.bulk_create(tracker_batch_points(trackers))
+            SummaryDelta.queue_bulk(trackers=trackers, points=points)
+
+    def hydrate_batch(self, request, objects):
+        """
+        Hydrates a batch of trackers for the request user, checking the UUIDs
+        and looking up the digests for the whole batch at once. Yields
+        (data, bundle) for each tracker, the bundle being None if the tracker
+        has already been submitted, or having errors if it isn't valid (empty
+        searches aren't yielded, as they're not saved)
+        """
+        uuids = {obj_uuid for obj_uuid in map(self.get_submitted_uuid, objects) if obj_uuid is not None}
+        saved_uuids = set(Tracker.objects.filter(uuid__in=uuids).values_list('uuid', flat=True))
+        lookup = TrackerBatchLookup(objects)
+
+        for data in objects:
+            tracker_uuid = self.get_submitted_uuid(data)
+            if tracker_uuid in saved_uuids:
+                yield data, None
+                continue
+
+            bundle = self.build_bundle(data=data)
+            bundle.request.user = request.user
+            bundle.request.META['REMOTE_ADDR'] = request.META.get('REMOTE_ADDR', DEFAULT_IP_ADDRESS)
+            bundle.request.META['HTTP_USER_AGENT'] = request.META.get('HTTP_USER_AGENT', 'unknown')
+            bundle.tracker_lookup = lookup
+
+            bundle.obj = self._meta.object_class()
+            self.authorized_create_detail(self.get_object_list(bundle.request), bundle)
+            bundle = self.full_hydrate(bundle)
+            if self.is_empty_search(bundle):
+                continue
+
+            if self.is_valid(bundle) and tracker_uuid is not None:
+                saved_uuids.add(tracker_uuid)
+            yield data, bundle
+
     def patch_list(self, request, **kwargs):
+        """
+        Saves a batch of trackers (eg uploaded from the app when it's been
+        offline), checking the UUIDs and looking up the digests for the whole
+        batch at once and inserting the trackers with bulk_create
+        """
         request = convert_post_to_patch(request)
         deserialized = self.deserialize(
             request,
             request.body,
             format=request.META.get('CONTENT_TYPE',
                                     'application/json'))
-        for data in deserialized.get("objects"):
-            data = self.alter_deserialized_detail_data(request, data)
-            bundle = self.build_bundle(data=data)
-            bundle.request.user = request.user
-            bundle.request.META['REMOTE_ADDR'] = request.META.get('REMOTE_ADDR', DEFAULT_IP_ADDRESS)
-            bundle.request.META['HTTP_USER_AGENT'] = request.META.get('HTTP_USER_AGENT', 'unknown')
-            # check UUID not already submitted
-            if 'data' in bundle.data:
-                json_data = json.loads(bundle.data['data'])
-                if 'uuid' in json_data:
-                    uuids = Tracker.objects.filter(uuid=json_data['uuid'])
-                    if uuids.exists():
-                        continue
+        objects = [self.alter_deserialized_detail_data(request, data) for data in deserialized.get("objects")]
+
+        trackers = []
+        for data, bundle in self.hydrate_batch(request, objects):
+            if bundle is None:
+                continue
+            if bundle.errors:
+                # keep the trackers before the invalid one, same as when they were saved one by one
+                self.save_trackers(trackers)
+                raise ImmediateHttpResponse(response=self.error_response(bundle.request, bundle.errors))
+            trackers.append(bundle.obj)
 
-            self.obj_create(bundle, request=request)
+        self.save_trackers(trackers)
 
+        bundle = self.build_bundle(request=request)
         response_data = {
             'points': self.dehydrate_points(bundle),
             'badges': self.dehydrate_badges(bundle),
@@ -1,3 +1,7 @@
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 from django.utils.translation import gettext_lazy as _
 
 from tastypie.exceptions import BadRequest
@@ -9,3 +13,38 @@ def check_required_params(bundle, required):
             bundle.data[r]
         except KeyError:
             raise BadRequest(_(u'Please enter your %s') % r)
+
+
+def etag_matches(request, etag):
+    '''
+    Whether the request's If-None-Match has the (quoted) ETag, so the client
+    already has the current version. Weak comparison, as for GET and HEAD
+    '''
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in etags]
+
+
+def get_etag(request, digest):
+    '''
+    The ETag for the digest of a listing, which is the same for any user
+    with the same listing, but not for other filters or formats
+    '''
+    return quote_etag(hashlib.sha1(' '.join([digest,
+                                             request.get_full_path(),
+                                             request.META.get('HTTP_ACCEPT', '')]).encode()).hexdigest())
+
+
+def get_conditional_response(request, etag, get_response):
+    '''
+    Returns 304 Not Modified if the client already has the ETag, rather than
+    the response from get_response(), with the ETag either way
+    '''
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = get_response()
+    response['ETag'] = etag
+    return response
@@ -21,12 +21,13 @@ class TrackerValidation(Validation):
                                     results count'
 
         # check this tracker hasn't already been submitted (based on the UUID)
+        # batches of trackers have already checked all their UUIDs at once
         try:
             json_data = json.loads(bundle.data['data'])
             if 'uuid' in json_data:
                 bundle.obj.uuid = json_data['uuid']
-                uuids = Tracker.objects.filter(uuid=bundle.obj.uuid)
-                if uuids.count() > 0:
+                if getattr(bundle, 'tracker_lookup', None) is None \
+                        and Tracker.objects.filter(uuid=bundle.obj.uuid).exists():
                     errors['uuid'] = 'This UUID has already been submitted'
         except json.JSONDecodeError:  # invalid json
             pass
@@ -1,6 +1,8 @@
 # oppia/gamification/models.py
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
@@ -93,3 +95,16 @@ class MediaGamificationEvent(GamificationEvent):
     class Meta:
         verbose_name = _(u'Media Gamification Event')
         verbose_name_plural = _(u'Media Gamification Events')
+
+
+@receiver(post_save, sender=DefaultGamificationEvent)
+@receiver(post_save, sender=CourseGamificationEvent)
+@receiver(post_save, sender=ActivityGamificationEvent)
+@receiver(post_save, sender=MediaGamificationEvent)
+@receiver(post_delete, sender=DefaultGamificationEvent)
+@receiver(post_delete, sender=CourseGamificationEvent)
+@receiver(post_delete, sender=ActivityGamificationEvent)
+@receiver(post_delete, sender=MediaGamificationEvent)
+def gamification_event_changed(sender, **kwargs):
+    from gamification.rules import gamification_rules
+    gamification_rules.invalidate()
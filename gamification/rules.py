@@ -0,0 +1,67 @@
+import threading
+import time
+
+from django.conf import settings
+
+from gamification.models import DefaultGamificationEvent, \
+                                CourseGamificationEvent, \
+                                ActivityGamificationEvent, \
+                                MediaGamificationEvent
+
+
+class GamificationRules:
+    '''
+    In memory copy of the points for the default, course, activity and
+    media gamification events, loaded all at once when first needed.
+
+    It's cleared whenever any of the events is saved or deleted (eg editing
+    the course gamification or uploading a course), other processes reload
+    the events after OPPIA_GAMIFICATION_CACHE_TIMEOUT seconds.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rules = None
+        self.expires = 0
+
+    def get_rules(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.rules is None or self.expires <= now:
+                self.rules = self.load()
+                self.expires = now + settings.OPPIA_GAMIFICATION_CACHE_TIMEOUT
+            return self.rules
+
+    @staticmethod
+    def load():
+        rules = {'default': dict(DefaultGamificationEvent.objects.values_list('event', 'points'))}
+        for level, model, reference in (('course', CourseGamificationEvent, 'course_id'),
+                                        ('activity', ActivityGamificationEvent, 'activity_id'),
+                                        ('media', MediaGamificationEvent, 'media_id')):
+            level_rules = rules[level] = {}
+            for ref_id, event, points in model.objects.values_list(reference, 'event', 'points'):
+                level_rules.setdefault(ref_id, {})[event] = points
+        return rules
+
+    def get_points(self, event, course_id=None, activity_id=None, media_id=None):
+        '''
+        Points for the event, from the most specific level defined (media or
+        activity, then course, then the default points)
+        '''
+        rules = self.get_rules()
+        for level, ref_id in (('media', media_id), ('activity', activity_id), ('course', course_id)):
+            level_rules = rules[level].get(ref_id, {})
+            if event in level_rules:
+                return level_rules[event]
+        try:
+            return rules['default'][event]
+        except KeyError:
+            raise DefaultGamificationEvent.DoesNotExist(
+                'No default gamification event: {}'.format(event))
+
+    def invalidate(self):
+        with self.lock:
+            self.rules = None
+
+
+gamification_rules = GamificationRules()
@@ -4,14 +4,16 @@ from oppia.models import Badge, BadgeMethod, Course
 from oppia.utils.filters import CourseFilter
 
 
-def courses_completed(hours):
+def courses_completed(hours, courses=None):
     try:
         badge = Badge.objects.get(ref='coursecompleted')
     except Badge.DoesNotExist:
         print("Badge not found: coursecompleted")
         return False
 
-    courses = Course.objects.filter(CourseFilter.IS_NOT_DRAFT & CourseFilter.IS_NOT_ARCHIVED)
+    if courses is None:
+        courses = Course.objects.all()
+    courses = courses.filter(CourseFilter.IS_NOT_DRAFT & CourseFilter.IS_NOT_ARCHIVED)
 
     for course in courses:
         print(course.get_title())
@@ -0,0 +1,225 @@
+import hashlib
+import json
+
+from collections import namedtuple, OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+
+from oppia.utils.process_cache import VersionedProcessCache
+
+
+def get_digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+CourseInfo = namedtuple('CourseInfo', ['id',
+                                       'shortname',
+                                       'status',
+                                       'restricted',
+                                       'cohorts',
+                                       'version',
+                                       'lastupdated_date'])
+
+UserAccess = namedtuple('UserAccess', ['cohorts', 'drafts'])
+
+
+class CourseIndexData:
+    '''
+    The categories and the courses that aren't archived (with their cohorts),
+    and what's been worked out from them for each role and set of cohorts
+    '''
+
+    def __init__(self):
+        from oppia.models import Category, Course, CourseCategory, CourseCohort, CourseStatus
+
+        self.categories = []
+        for category in Category.objects.order_by('-order_priority', 'name'):
+            self.categories.append({'id': category.id,
+                                    'name': category.name,
+                                    'description': category.description,
+                                    'highlight': category.highlight,
+                                    'icon': category.icon.url if category.icon else None,
+                                    'order_priority': category.order_priority})
+
+        cohorts = {}
+        for course_id, cohort_id in CourseCohort.objects.values_list('course_id', 'cohort_id'):
+            cohorts.setdefault(course_id, set()).add(cohort_id)
+        self.courses = {}
+        listing = []
+        for course_id, shortname, status, restricted, version, lastupdated_date, *details \
+                in Course.objects.exclude(status=CourseStatus.ARCHIVED) \
+                .values_list('id', 'shortname', 'status', 'restricted', 'version', 'lastupdated_date',
+                             'title', 'description', 'priority', 'user__first_name', 'user__last_name',
+                             'user__username', 'user__userprofile__organisation'):
+            course_cohorts = frozenset(cohorts.get(course_id, ()))
+            self.courses[course_id] = CourseInfo(course_id, shortname, status, restricted,
+                                                 course_cohorts, version, lastupdated_date)
+            listing.append([course_id, status, restricted, sorted(course_cohorts), version,
+                            lastupdated_date.isoformat(), *details])
+
+        self.category_courses = {}
+        for category_id, course_id in CourseCategory.objects.order_by('id').values_list('category_id', 'course_id'):
+            if course_id in self.courses:
+                self.category_courses.setdefault(category_id, []).append(self.courses[course_id])
+
+        self.users = OrderedDict()
+        self.visible = {}
+        self.category_lists = {}
+        # all the fields in the course listing (including the owner's name
+        # and organisation), but for the drafts each user can see
+        self.courses_digest = get_digest(sorted(listing))
+
+
+class CourseIndex(VersionedProcessCache):
+    '''
+    The categories and courses (see CourseIndexData) loaded with a few
+    queries and kept by each process for OPPIA_COURSE_INDEX_CACHE_TIMEOUT
+    seconds, along with the courses visible to each role and set of cohorts,
+    the category lists worked out from them, and the cohorts and the draft
+    courses each user has access to.
+
+    Publishing or deleting a course, changing its status, categories or
+    cohorts, or a user's cohorts or course permissions invalidates it (see
+    VersionedProcessCache for how the changes reach the other processes).
+    '''
+
+    VERSION_KEY = 'oppia_course_index_version'
+    MAX_USERS = 10000
+    MAX_CATEGORY_LISTS = 1000
+
+    def get_timeout(self):
+        return settings.OPPIA_COURSE_INDEX_CACHE_TIMEOUT
+
+    def load(self):
+        return CourseIndexData()
+
+    def get_data(self):
+        return self.get()
+
+    @staticmethod
+    def load_user_access(user):
+        from oppia.models import Course, CourseStatus, Participant
+
+        drafts = Course.objects.filter(status=CourseStatus.DRAFT) \
+            .filter(Q(user=user) | Q(coursepermissions__user=user)) \
+            .values_list('id', flat=True)
+        return UserAccess(frozenset(Participant.get_user_cohorts(user)), frozenset(drafts))
+
+    def get_user_access(self, data, user):
+        with self.lock:
+            access = data.users.get(user.id)
+            if access is not None:
+                data.users.move_to_end(user.id)
+                return access
+        access = self.load_user_access(user)
+        with self.lock:
+            data.users[user.id] = access
+            while len(data.users) > self.MAX_USERS:
+                data.users.popitem(last=False)
+        return access
+
+    @staticmethod
+    def is_visible(course, access):
+        # drafts only for their owner and users with permissions, restricted
+        # courses only for their cohorts
+        from oppia.models import CourseStatus
+
+        if course.status == CourseStatus.DRAFT and course.id not in access.drafts:
+            return False
+        return not course.restricted or not course.cohorts.isdisjoint(access.cohorts)
+
+    def get_visible(self, data, user, access):
+        '''
+        Ids of the courses visible to the user: all of them for staff,
+        otherwise the ones not draft and open to the user's cohorts (worked
+        out once for each set of cohorts) plus the user's drafts
+        '''
+        if user.is_staff:
+            return data.courses.keys()
+        with self.lock:
+            visible = data.visible.get(access.cohorts)
+        if visible is None:
+            visible = frozenset(course.id for course in data.courses.values()
+                                if self.is_visible(course, UserAccess(access.cohorts, frozenset())))
+            with self.lock:
+                data.visible[access.cohorts] = visible
+        if not access.drafts:
+            return visible
+        return visible | {course_id for course_id in access.drafts
+                          if course_id in data.courses and self.is_visible(data.courses[course_id], access)}
+
+    def get_category_courses(self, user, category_id):
+        '''
+        Ids of the courses in the category visible to the user
+        '''
+        data = self.get_data()
+        visible = self.get_visible(data, user, None if user.is_staff else self.get_user_access(data, user))
+        return [course.id for course in data.category_courses.get(category_id, []) if course.id in visible]
+
+    def get_category_list(self, user):
+        '''
+        Returns (categories, digest): the categories with courses visible to
+        the user, with the number of them (and of those with new downloads
+        enabled) and the status of the courses in the category the user can
+        see, restricted or not, and a digest of them
+        '''
+        from oppia.models import CourseStatus
+
+        data = self.get_data()
+        access = None if user.is_staff else self.get_user_access(data, user)
+        key = (True,) if user.is_staff else (False, access)
+        with self.lock:
+            category_list = data.category_lists.get(key)
+        if category_list is not None:
+            return category_list
+
+        visible = self.get_visible(data, user, access)
+        categories = []
+        for category in data.categories:
+            courses = data.category_courses.get(category['id'], [])
+            visible_courses = [course for course in courses if course.id in visible]
+            if not visible_courses:
+                continue
+            if user.is_staff:
+                status_courses = courses
+            else:
+                status_courses = [course for course in courses
+                                  if course.status != CourseStatus.DRAFT or course.id in access.drafts]
+            categories.append(dict(category,
+                                   count=len(visible_courses),
+                                   count_new_downloads_enabled=len([
+                                       course for course in visible_courses
+                                       if course.status != CourseStatus.NEW_DOWNLOADS_DISABLED]),
+                                   course_statuses={course.shortname: course.status for course in status_courses}))
+
+        category_list = (categories, get_digest(categories))
+        with self.lock:
+            if len(data.category_lists) >= self.MAX_CATEGORY_LISTS:
+                data.category_lists.clear()
+            data.category_lists[key] = category_list
+        return category_list
+
+    def get_categories(self, user):
+        return self.get_category_list(user)[0]
+
+    def get_categories_digest(self, user):
+        '''
+        Changes whenever the user's category list (get_categories) does
+        '''
+        return self.get_category_list(user)[1]
+
+    def get_courses_digest(self, user):
+        '''
+        Changes whenever the user's course listing does: when any of the
+        listed fields of a course that isn't archived change (including its
+        owner's name and organisation), or when the user's draft courses
+        change
+        '''
+        data = self.get_data()
+        if user.is_staff:
+            return data.courses_digest
+        return get_digest([data.courses_digest, sorted(self.get_user_access(data, user).drafts)])
+
+
+course_index = CourseIndex()
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+
+from collections import namedtuple, OrderedDict
+
+from django.conf import settings
+
+
+ActivityInfo = namedtuple('ActivityInfo', ['type',
+                                           'title',
+                                           'section_title',
+                                           'course_id',
+                                           'course_version',
+                                           'id'])
+
+MediaInfo = namedtuple('MediaInfo', ['filename', 'course_id', 'id'])
+
+
+class DigestInfo(namedtuple('DigestInfo', ['activity', 'media'])):
+    '''
+    The first activity and media found for a digest (either of them may be
+    None)
+    '''
+
+    def exists(self):
+        return self.activity is not None or self.media is not None
+
+    def get_activity_type(self):
+        if self.activity is not None:
+            return self.activity.type
+        if self.media is not None:
+            return "media"
+        return None
+
+    def get_activity_title(self, lang='en', default=None):
+        if self.media is not None:
+            return self.media.filename
+        if self.activity is not None:
+            try:
+                titles = json.loads(self.activity.title)
+                if lang in titles:
+                    return titles[lang]
+                for local_lang in titles:
+                    return titles[local_lang]
+            except TypeError:
+                pass
+        return default
+
+
+class DigestIndex:
+    '''
+    Process local LRU cache of the activity and media for each
+    (digest, course shortname), shortname None meaning any course.
+
+    It's cleared when a course is published or deleted, other processes
+    pick up the changes once their entries expire
+    (OPPIA_DIGEST_CACHE_TIMEOUT). Setting OPPIA_DIGEST_CACHE_SIZE to 0
+    disables the cache.
+    '''
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, digest, shortname=None):
+        return self.get_many([(digest, shortname)])[(digest, shortname)]
+
+    def get_many(self, keys):
+        '''
+        Returns a dict of DigestInfo for the given (digest, shortname) keys,
+        the ones not cached are loaded with one query for the activities and
+        one for the media
+        '''
+        keys = set(keys)
+        found = {}
+        now = time.monotonic()
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self.entries.move_to_end(key)
+                    found[key] = entry[1]
+
+        missing = keys - found.keys()
+        if missing:
+            loaded = self.load(missing)
+            self.store(loaded, now)
+            found.update(loaded)
+        return found
+
+    @staticmethod
+    def load(keys):
+        from oppia.models import Activity, Media
+
+        digests = {digest for digest, shortname in keys}
+        activities = Activity.objects.filter(digest__in=digests) \
+            .order_by('id') \
+            .values_list('digest',
+                         'section__course__shortname',
+                         'type',
+                         'title',
+                         'section__title',
+                         'section__course_id',
+                         'section__course__version',
+                         'id')
+        media = Media.objects.filter(digest__in=digests) \
+            .order_by('id') \
+            .values_list('digest', 'course__shortname', 'filename', 'course_id', 'id')
+
+        # keep the first one found for the digest, and for the digest in each course
+        activity_infos = {}
+        for digest, shortname, *info in activities:
+            activity_infos.setdefault((digest, None), ActivityInfo(*info))
+            activity_infos.setdefault((digest, shortname), ActivityInfo(*info))
+        media_infos = {}
+        for digest, shortname, *info in media:
+            media_infos.setdefault((digest, None), MediaInfo(*info))
+            media_infos.setdefault((digest, shortname), MediaInfo(*info))
+
+        return {key: DigestInfo(activity_infos.get(key), media_infos.get(key)) for key in keys}
+
+    def store(self, infos, now):
+        max_size = settings.OPPIA_DIGEST_CACHE_SIZE
+        if max_size <= 0:
+            return
+        expires = now + settings.OPPIA_DIGEST_CACHE_TIMEOUT
+        with self.lock:
+            for key, info in infos.items():
+                self.entries[key] = (expires, info)
+                self.entries.move_to_end(key)
+            while len(self.entries) > max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+
+
+digest_index = DigestIndex()
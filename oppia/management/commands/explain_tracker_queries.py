@@ -0,0 +1,109 @@
+import datetime
+import json
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from oppia.models import Activity, Course, Media, Tracker
+
+
+def get_hot_queries(user_id, course_id, digest, tracker_type):
+    '''
+    The querysets for the most frequently run tracker queries, filtered as
+    in the models they're taken from
+    '''
+    olddate = timezone.now() - datetime.timedelta(hours=24)
+    activity_digests = Activity.objects.filter(section__course_id=course_id, baseline=False).values_list('digest')
+    media_digests = Media.objects.filter(course_id=course_id).values_list('digest')
+    return {
+        'Tracker.is_first_tracker_today': Tracker.objects.filter(user_id=user_id,
+                                                                 digest=digest,
+                                                                 completed=True,
+                                                                 submitted_date__gte=olddate),
+        'Course.get_activities_completed': Tracker.objects.filter(course_id=course_id,
+                                                                  user_id=user_id,
+                                                                  completed=True,
+                                                                  digest__in=activity_digests)
+                                                          .values_list('digest').distinct(),
+        'Course.get_media_viewed': Tracker.objects.filter(course_id=course_id,
+                                                          user_id=user_id,
+                                                          completed=True,
+                                                          digest__in=media_digests)
+                                                  .values_list('digest').distinct(),
+        'Tracker.activity_exists (activity)': Activity.objects.filter(digest__in=[digest]).order_by('id'),
+        'Tracker.activity_exists (media)': Media.objects.filter(digest__in=[digest]).order_by('id'),
+        'Tracker.activity_views': Tracker.objects.filter(user_id=user_id,
+                                                         type=tracker_type,
+                                                         submitted_date__gte=olddate),
+    }
+
+
+def get_full_scans(plan, vendor):
+    '''
+    Returns the tables read with a sequential/full table scan in the query
+    plan returned by QuerySet.explain() for the database vendor
+    '''
+    if vendor == 'mysql':
+        tables = []
+
+        def find_tables(node):
+            if isinstance(node, dict):
+                if node.get('access_type') == 'ALL':
+                    tables.append(node.get('table_name'))
+                for value in node.values():
+                    find_tables(value)
+            elif isinstance(node, list):
+                for value in node:
+                    find_tables(value)
+
+        find_tables(json.loads(plan))
+        return tables
+    if vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    if vendor == 'sqlite':
+        return re.findall(r'\bSCAN (?:TABLE )?(\w+)$', plan, re.MULTILINE)
+    return []
+
+
+class Command(BaseCommand):
+    help = _('Runs EXPLAIN on the most frequently run tracker queries and reports any full table scans')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--plans',
+                            action='store_true',
+                            dest='plans',
+                            help=_('Show the query plans'))
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('mysql', 'postgresql', 'sqlite'):
+            self.stdout.write(_('Query plans are not checked for %s databases.') % vendor)
+            return
+
+        # explained with the values of a recent tracker, so the plans are as close as possible to the real ones
+        tracker = Tracker.objects.exclude(course=None).order_by('-id').first()
+        if tracker is None:
+            hot_queries = get_hot_queries(1, Course.objects.values_list('id', flat=True).first() or 1, '', 'page')
+        else:
+            hot_queries = get_hot_queries(tracker.user_id, tracker.course_id, tracker.digest, tracker.type)
+
+        full_scans = 0
+        for name, queryset in hot_queries.items():
+            plan = queryset.explain(format='json') if vendor == 'mysql' else queryset.explain()
+            tables = get_full_scans(plan, vendor)
+            if tables:
+                full_scans += 1
+                self.stdout.write(self.style.WARNING(_('%s: full scan of %s') % (name, ', '.join(tables))))
+            else:
+                self.stdout.write(_('%s: OK') % name)
+            if options['plans']:
+                self.stdout.write(plan)
+
+        if full_scans:
+            self.stdout.write(self.style.WARNING(_('%d queries with full table scans.') % full_scans))
+        else:
+            self.stdout.write(self.style.SUCCESS(_('No full table scans found.')))
@@ -0,0 +1,110 @@
+import time
+
+from collections import defaultdict
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils.translation import gettext_lazy as _
+
+from oppia.awards import courses_completed
+from oppia.models import Course, TrackerPointsJob
+from oppia.signals import award_tracker_points
+from settings.models import SettingProperties
+
+
+def process_points_jobs(job_ids):
+    '''
+    Awards the points for the trackers of the given jobs (as they would have
+    been when the trackers were saved), returns the ids of their courses
+    '''
+    course_ids = set()
+    jobs = TrackerPointsJob.objects.filter(pk__in=job_ids) \
+        .select_related('tracker', 'tracker__user') \
+        .order_by('id')
+    for job in jobs:
+        with transaction.atomic():
+            award_tracker_points(job.tracker, at_save=True)
+            job.delete()
+        if job.tracker.course_id is not None:
+            course_ids.add(job.tracker.course_id)
+    return course_ids
+
+
+class Command(BaseCommand):
+    help = _('Awards the points and badges for the trackers queued when OPPIA_POINTS_DEFERRED is enabled')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--workers',
+                            type=int,
+                            dest='workers',
+                            default=1,
+                            help=_('Number of processes awarding the points'))
+
+        parser.add_argument('--batch-size',
+                            type=int,
+                            dest='batch_size',
+                            default=1000,
+                            help=_('Maximum number of jobs processed in each run'))
+
+        parser.add_argument('--hours',
+                            type=int,
+                            dest='hours',
+                            default=1,
+                            help=_('Hours of activity checked for the course completed badges'))
+
+        parser.add_argument('--interval',
+                            type=float,
+                            dest='interval',
+                            default=5,
+                            help=_('Seconds to wait between each run'))
+
+        parser.add_argument('--once',
+                            action='store_true',
+                            dest='once',
+                            help=_('Process the queued jobs once and exit'))
+
+    def handle(self, *args, **options):
+        while True:
+            self.process_jobs(options)
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def process_jobs(self, options):
+
+        prop, created = SettingProperties.objects \
+            .get_or_create(key='oppia_points_jobs_lock', int_value=1)
+        if not created:
+            self.stdout.write(_("Oppia points jobs are already being processed"))
+            return
+
+        try:
+            course_ids = self.award_points(options['workers'], options['batch_size'])
+            if course_ids:
+                courses_completed(options['hours'], Course.objects.filter(pk__in=course_ids))
+        finally:
+            SettingProperties.delete_key('oppia_points_jobs_lock')
+
+    def award_points(self, workers, batch_size):
+        jobs = TrackerPointsJob.objects.order_by('id') \
+            .values_list('id', 'tracker__user_id')[:batch_size]
+
+        # each user's jobs are all processed by the same worker, so their
+        # points are awarded in the order the trackers were saved
+        shards = defaultdict(list)
+        for job_id, user_id in jobs:
+            shards[user_id % workers].append(job_id)
+
+        self.stdout.write(_('%d points jobs to process.') % sum(map(len, shards.values())))
+        if not shards:
+            return set()
+
+        if workers <= 1 or len(shards) == 1:
+            return set().union(*map(process_points_jobs, shards.values()))
+
+        # the forked workers mustn't share this process's database connections
+        connections.close_all()
+        with Pool(min(workers, len(shards)), initializer=connections.close_all) as pool:
+            return set().union(*pool.map(process_points_jobs, shards.values()))
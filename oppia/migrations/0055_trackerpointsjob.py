@@ -0,0 +1,27 @@
+# Generated by Django 5.0.8 on 2026-10-18 21:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oppia', '0054_cohort_criteria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackerPointsJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date created')),
+                ('tracker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='oppia.tracker')),
+            ],
+            options={
+                'verbose_name': 'Tracker points job',
+                'verbose_name_plural': 'Tracker points jobs',
+            },
+        ),
+    ]
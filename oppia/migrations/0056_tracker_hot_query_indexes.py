@@ -0,0 +1,46 @@
+# Generated by Django 5.0.8 on 2026-10-18 21:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oppia', '0055_trackerpointsjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # the (course, user) index is only removed once the index replacing it is
+    # there, as MySQL needs an index starting with course for the foreign key
+    operations = [
+        migrations.AddIndex(
+            model_name='tracker',
+            index=models.Index(fields=['course', 'user', 'completed', 'digest'],
+                               name='oppia_track_course__e4fc99_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='tracker',
+            name='oppia_track_course__2b7c86_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tracker',
+            index=models.Index(fields=['user', 'digest', 'completed', 'submitted_date'],
+                               name='oppia_track_user_id_e9fbe4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tracker',
+            index=models.Index(fields=['user', 'type', 'submitted_date'],
+                               name='oppia_track_user_id_376fcd_idx'),
+        ),
+        migrations.AlterField(
+            model_name='activity',
+            name='digest',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='media',
+            name='digest',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.8 on 2026-10-18 23:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_activities(apps, schema_editor):
+    # for the courses already published, later ones are counted when published
+    activity_model = apps.get_model('oppia', 'activity')
+    course_model = apps.get_model('oppia', 'course')
+
+    counts = dict(activity_model.objects
+                  .filter(baseline=False)
+                  .order_by()
+                  .values('section__course')
+                  .annotate(no_activities=Count('id'))
+                  .values_list('section__course', 'no_activities'))
+    for course in course_model.objects.only('id'):
+        course.no_activities = counts.get(course.id, 0)
+        course.save(update_fields=['no_activities'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oppia', '0056_tracker_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='no_activities',
+            field=models.IntegerField(blank=True, default=None, editable=False, null=True),
+        ),
+        migrations.RunPython(count_activities, migrations.RunPython.noop),
+    ]
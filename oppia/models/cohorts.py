@@ -1,10 +1,12 @@
 
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch.dispatcher import receiver
 from django.utils.translation import gettext_lazy as _
 
-from oppia.models import Course, Award
+from oppia.course_index import course_index
+from oppia.models import Course
 
 
 class Cohort(models.Model):
@@ -33,24 +35,12 @@ class Cohort(models.Model):
         return courses
 
     def get_leaderboard(self, count=0):
-        users = User.objects \
-            .filter(participant__cohort=self,
-                    participant__role=Participant.STUDENT,
-                    points__course__coursecohort__cohort=self) \
-            .annotate(total=Sum('points__points')) \
-            .order_by('-total')
+        from summary.models import CohortLeaderboard
 
+        leaderboard = CohortLeaderboard.get_ranked_users(self)
         if count != 0:
-            users = users[:count]
-
-        for u in users:
-            u.badges = Award.objects \
-                .filter(user=u,
-                        awardcourse__course__coursecohort__cohort=self) \
-                .count()
-            if u.total is None:
-                u.total = 0
-        return users
+            return leaderboard[:count]
+        return leaderboard
 
     # Update cohort participants based on the cohort criteria
     def update_participants(self):
@@ -79,6 +69,8 @@ class Cohort(models.Model):
 
         return students, teachers
 
+    # atomic, so the cohort leaderboard is updated once all the participants are added
+    @transaction.atomic
     def update_participants_by_role(self, role):
         # Imported locally to avoid circular imports
         from profile.models import CustomField
@@ -142,3 +134,11 @@ class CohortCritera(models.Model):
 
     class Meta:
         verbose_name = _('Cohort criteria')
+
+
+@receiver(post_save, sender=CourseCohort)
+@receiver(post_delete, sender=CourseCohort)
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def changed_cohort_invalidate_course_index(sender, instance, **kwargs):
+    course_index.invalidate()
@@ -9,16 +9,18 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.db.models import Max, F
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch.dispatcher import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from tastypie.models import create_api_key
 
 from oppia import constants
+from oppia.course_index import course_index
+from oppia.digest_index import digest_index
 from quiz.models import QuizAttempt, Quiz, QuizProps
 
-from xml.dom.minidom import Document
+from xml.sax.saxutils import escape
 
 models.signals.post_save.connect(create_api_key, sender=User)
 
@@ -26,6 +28,13 @@ STR_COURSE_INHERITED = _('Inherited from course')
 STR_GLOBAL_INHERITED = _('Inherited from global defaults')
 
 
+def xml_element(tag, **attrs):
+    # an empty element written the same way as minidom does (None or empty
+    # attributes as "")
+    return '<%s%s/>' % (tag, ''.join(' %s="%s"' % (name, escape(value, {'"': '&quot;'}) if value else '')
+                                     for name, value in attrs.items()))
+
+
 class CourseStatus(models.TextChoices):
     LIVE = 'live', _('Live')
     DRAFT = 'draft', _('Draft')
@@ -64,6 +73,9 @@ class Course(models.Model):
 
     restricted = models.BooleanField(default=False, help_text=_(constants.RESTRICTED_FIELD_HELP_TEST))
 
+    # counted when the course is published, see get_no_activities
+    no_activities = models.IntegerField(null=True, blank=True, default=None, editable=False)
+
     class Meta:
         verbose_name = _('Course')
         verbose_name_plural = _('Courses')
@@ -166,10 +178,15 @@ class Course(models.Model):
         sections = Section.objects.filter(course=self).order_by('order')
         return sections
 
-    def get_no_activities(self):
+    def count_activities(self):
         return Activity.objects.filter(section__course=self,
                                        baseline=False).count()
 
+    def get_no_activities(self):
+        if self.no_activities is None:
+            return self.count_activities()
+        return self.no_activities
+
     def get_no_quizzes(self):
         return Activity.objects.filter(section__course=self,
                                        type=Activity.QUIZ,
@@ -366,7 +383,7 @@ class Activity(models.Model):
     order = models.IntegerField(default=0)
     title = models.TextField(blank=False)
     type = models.CharField(max_length=10)
-    digest = models.CharField(max_length=100)
+    digest = models.CharField(max_length=100, db_index=True)
     baseline = models.BooleanField(default=False)
     image = models.TextField(blank=True, null=True, default=None)
     content = models.TextField(blank=True, null=True, default=None)
@@ -496,7 +513,7 @@ class Media(models.Model):
     URL_MAX_LENGTH = 250
 
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
-    digest = models.CharField(max_length=100)
+    digest = models.CharField(max_length=100, db_index=True)
     filename = models.CharField(max_length=200)
     download_url = models.URLField(max_length=URL_MAX_LENGTH)
     filesize = models.BigIntegerField(default=None, blank=True, null=True)
@@ -587,18 +604,29 @@ class Tracker(models.Model):
     class Meta:
         verbose_name = _('Tracker')
         verbose_name_plural = _('Trackers')
-        indexes = [models.Index(fields=['course', 'user']), ]
+        # the composite indexes cover the hot tracker queries, check them
+        # against the database with the explain_tracker_queries command
+        indexes = [models.Index(fields=['course', 'user', 'completed', 'digest']),
+                   models.Index(fields=['user', 'digest', 'completed', 'submitted_date']),
+                   models.Index(fields=['user', 'type', 'submitted_date']), ]
 
     def __str__(self):
         return self.agent
 
-    def is_first_tracker_today(self):
-        olddate = timezone.now() + datetime.timedelta(hours=-24)
-        no_attempts_today = Tracker.objects \
+    def is_first_tracker_today(self, at_save=False):
+        # at_save checks as it was when the tracker was saved, rather than
+        # now (for when the points are awarded later on)
+        if at_save:
+            trackers = Tracker.objects.filter(
+                pk__lte=self.pk,
+                submitted_date__gte=self.submitted_date + datetime.timedelta(hours=-24))
+        else:
+            olddate = timezone.now() + datetime.timedelta(hours=-24)
+            trackers = Tracker.objects.filter(submitted_date__gte=olddate)
+        no_attempts_today = trackers \
             .filter(user=self.user,
                     digest=self.digest,
-                    completed=True,
-                    submitted_date__gte=olddate) \
+                    completed=True) \
             .count()
         if no_attempts_today == 1:
             return True
@@ -606,36 +634,16 @@ class Tracker(models.Model):
             return False
 
     def get_activity_type(self):
-        activities = Activity.objects.filter(digest=self.digest)
-        for a in activities:
-            return a.type
-        media = Media.objects.filter(digest=self.digest)
-        if media.exists():
-            return "media"
-        return None
+        return digest_index.get(self.digest).get_activity_type()
 
     def get_media_title(self):
-        media = Media.objects.filter(digest=self.digest)
-        for m in media:
-            return m.filename
+        media = digest_index.get(self.digest).media
+        if media is not None:
+            return media.filename
         return None
 
     def get_activity_title(self, lang='en'):
-        media = Media.objects.filter(digest=self.digest)
-        for m in media:
-            return m.filename
-        try:
-            activity = Activity.objects.filter(digest=self.digest)
-            for a in activity:
-                titles = json.loads(a.title)
-                if lang in titles:
-                    return titles[lang]
-                else:
-                    for local_lang in titles:
-                        return titles[local_lang]
-        except TypeError:
-            pass
-        return self.activity_title
+        return digest_index.get(self.digest).get_activity_title(lang, self.activity_title)
 
     def get_section_title(self, lang='en'):
         try:
@@ -650,63 +658,82 @@ class Tracker(models.Model):
         return self.section_title
 
     def activity_exists(self):
-        activities = Activity.objects.filter(digest=self.digest)
-        if activities.exists():
-            return True
-        media = Media.objects.filter(digest=self.digest)
-        if media.exists():
-            return True
-        return False
+        return digest_index.get(self.digest).exists()
 
     @staticmethod
     def has_completed_trackers(course, user):
         return Tracker.objects.filter(user=user, course=course, completed=True).exists()
 
     @staticmethod
-    def to_xml_string(course, user):
-        doc = Document()
-        tracker_xml = doc.createElement('trackers')
-        doc.appendChild(tracker_xml)
-        trackers = Tracker.objects.filter(user=user, course=course)
-        for t in trackers:
-            track = doc.createElement('tracker')
-            track.setAttribute('digest', t.digest)
-            track.setAttribute('submitteddate',
-                               t.submitted_date.strftime('%Y-%m-%d %H:%M:%S'))
-            track.setAttribute('completed', str(t.completed))
-            track.setAttribute('type', t.type)
-            track.setAttribute('event', t.event)
-            track.setAttribute('points', str(t.points))
-            track.setAttribute('uuid', t.uuid)
+    def get_latest_quiz_attempts(course, user):
+        '''
+        Returns the user's latest quiz attempt for each of the instance_ids of
+        their quiz trackers in the course, fetched in one query
+        '''
+        instance_ids = set()
+        for data in Tracker.objects.filter(user=user, course=course, type='quiz').values_list('data', flat=True):
+            try:
+                instance_ids.add(json.loads(data)['instance_id'])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                pass
+
+        latest_attempts = {}
+        if instance_ids:
+            attempts = QuizAttempt.objects.filter(user=user, instance_id__in=instance_ids) \
+                .order_by('submitted_date')
+            for quiz_attempt in attempts:
+                latest_attempts[quiz_attempt.instance_id] = quiz_attempt
+        return latest_attempts
+
+    @staticmethod
+    def iter_xml(course, user):
+        '''
+        Generates the user's tracker.xml for the course in chunks, one for each
+        tracker, so it can be streamed (same output as a minidom document)
+        '''
+        latest_attempts = Tracker.get_latest_quiz_attempts(course, user)
+        trackers = Tracker.objects.filter(user=user, course=course) \
+            .only('digest', 'submitted_date', 'completed', 'type', 'event', 'points', 'uuid', 'data') \
+            .order_by('id')
+
+        yield '<?xml version="1.0" ?>'
+        has_trackers = False
+        for t in trackers.iterator():
+            if not has_trackers:
+                yield '<trackers>'
+                has_trackers = True
+            track = xml_element('tracker',
+                                digest=t.digest,
+                                submitteddate=t.submitted_date.strftime('%Y-%m-%d %H:%M:%S'),
+                                completed=str(t.completed),
+                                type=t.type,
+                                event=t.event,
+                                points=str(t.points),
+                                uuid=t.uuid)
+            quiz_attempt = None
             if t.type == 'quiz':
                 try:
-                    quiz = doc.createElement('quiz')
-                    data = json.loads(t.data)
-                    quiz_attempt = QuizAttempt.objects \
-                        .filter(instance_id=data['instance_id'],
-                                user=user) \
-                        .order_by('-submitted_date').first()
-                    if quiz_attempt:
-                        quiz.setAttribute('score', str(quiz_attempt.score))
-                        quiz.setAttribute('maxscore',
-                                          str(quiz_attempt.maxscore))
-                        quiz.setAttribute('submitteddate',
-                                          quiz_attempt
-                                          .submitted_date
-                                          .strftime('%Y-%m-%d %H:%M:%S'))
-                        quiz.setAttribute('passed', str(t.completed))
-                        quiz.setAttribute("course", course.shortname)
-                        quiz.setAttribute("event", quiz_attempt.event)
-                        quiz.setAttribute("points", str(quiz_attempt.points))
-                        quiz.setAttribute("timetaken",
-                                          str(quiz_attempt.time_taken))
-                        track.appendChild(quiz)
-                except QuizAttempt.DoesNotExist:
-                    pass
+                    quiz_attempt = latest_attempts.get(json.loads(t.data)['instance_id'])
                 except json.JSONDecodeError:
                     pass
-            tracker_xml.appendChild(track)
-        return doc.toxml()
+            if quiz_attempt:
+                quiz = xml_element('quiz',
+                                   score=str(quiz_attempt.score),
+                                   maxscore=str(quiz_attempt.maxscore),
+                                   submitteddate=quiz_attempt.submitted_date.strftime('%Y-%m-%d %H:%M:%S'),
+                                   passed=str(t.completed),
+                                   course=course.shortname,
+                                   event=quiz_attempt.event,
+                                   points=str(quiz_attempt.points),
+                                   timetaken=str(quiz_attempt.time_taken))
+                yield track[:-2] + '>' + quiz + '</tracker>'
+            else:
+                yield track
+        yield '</trackers>' if has_trackers else '<trackers/>'
+
+    @staticmethod
+    def to_xml_string(course, user):
+        return ''.join(Tracker.iter_xml(course, user))
 
     @staticmethod
     def activity_views(user,
@@ -732,6 +759,30 @@ class Tracker(models.Model):
         if 'lang' in json_data:
             return json_data['lang']
 
+
+@receiver(post_delete, sender=Course)
+def deleted_course_invalidate_digests(sender, instance, **kwargs):
+    digest_index.invalidate()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CoursePermissions)
+@receiver(post_delete, sender=CoursePermissions)
+def changed_course_invalidate_course_index(sender, instance, **kwargs):
+    course_index.invalidate()
+
+
+@receiver(post_save, sender=User)
+def changed_course_owner_invalidate_course_index(sender, instance, created, raw=False, update_fields=None,
+                                                 **kwargs):
+    # the owner's name is in the course listings
+    if created or raw or update_fields == frozenset(['last_login']):
+        return
+    if Course.objects.filter(user=instance).exists():
+        course_index.invalidate()
+
+
 @receiver(post_save, sender=Course)
 def uploaded_course_save_to_external(sender, instance, **kwargs):
     if settings.OPPIA_EXTERNAL_STORAGE:
@@ -1,11 +1,10 @@
-
 from django.contrib.auth.models import User
 from django.db import models
 from django.db.models import Sum
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from oppia.models import Course
+from oppia.models import Course, Tracker
 
 
 class Points(models.Model):
@@ -43,29 +42,16 @@ class Points(models.Model):
     @staticmethod
     def get_leaderboard(count=0, course=None):
 
-        from summary.models import UserCourseSummary, UserPointsSummary
+        from summary.models import CourseLeaderboard, Leaderboard, RankedUsers
 
-        if course is not None:
-            users = UserCourseSummary.objects.filter(course=course)
-            users_points = users.values('user') \
-                .annotate(points=Sum('points'),
-                          badges=Sum('badges_achieved')) \
-                .order_by('-points')
+        if course is None:
+            Leaderboard.refresh_if_stale()
+            leaderboard = RankedUsers(Leaderboard.objects.all())
         else:
-            users_points = UserPointsSummary.objects.all() \
-                .values('user', 'points', 'badges') \
-                .order_by('-points')
+            leaderboard = CourseLeaderboard.get_ranked_users(course)
 
         if count > 0:
-            users_points = users_points[:count]
-
-        leaderboard = []
-        for idx, u in enumerate(users_points):
-            user = User.objects.get(pk=u['user'])
-            user.badges = 0 if u['badges'] is None else u['badges']
-            user.total = 0 if u['points'] is None else u['points']
-            leaderboard.append(user)
-
+            return leaderboard[:count]
         return leaderboard
 
     @staticmethod
@@ -74,21 +60,20 @@ class Points(models.Model):
                                  above=20,
                                  below=20):
 
-        from summary.models import UserPointsSummary
+        from summary.models import Leaderboard
 
-        users_points = UserPointsSummary.objects.all() \
-            .values('user', 'points', 'badges') \
-            .order_by('-points')
+        Leaderboard.refresh_if_stale()
+        positions = Leaderboard.objects.order_by('rank')
+        total = Leaderboard.get_total()
 
         # check if there's going to be overlap or not
-        if users_points.count() <= (count_top + above + below + 1):
-            return Points.get_leaderboard_top(users_points,
-                                              users_points.count())
+        if total <= (count_top + above + below + 1):
+            return Points.get_leaderboard_top(positions, total)
 
-        leaderboard_data = Points.get_leaderboard_top(users_points, count_top)
+        leaderboard_data = Points.get_leaderboard_top(positions, count_top)
         leaderboard_data = \
             Points.get_leaderboard_around_user(leaderboard_data,
-                                               users_points,
+                                               positions,
                                                request_user,
                                                count_top,
                                                above,
@@ -97,44 +82,23 @@ class Points(models.Model):
         return leaderboard_data
 
     @staticmethod
-    def get_leaderboard_top(users_points, count_top):
-
-        leaderboard_data = []
-        top_users_points = users_points[:count_top]
-
-        for idx, u in enumerate(top_users_points):
-            user = User.objects.get(pk=u['user'])
-            user.badges = 0 if u['badges'] is None else u['badges']
-            user.total = 0 if u['points'] is None else u['points']
-
-            leader_data = {}
-            leader_data['position'] = idx + 1
-            leader_data['username'] = user.username
-            leader_data['first_name'] = user.first_name
-            leader_data['last_name'] = user.last_name
-            leader_data['points'] = user.total
-            leader_data['badges'] = user.badges
-
-            leaderboard_data.append(leader_data)
-
-        return leaderboard_data
+    def get_leaderboard_top(positions, count_top):
+        return [position.to_dict() for position in positions.filter(rank__lte=count_top)]
 
     @staticmethod
     def get_leaderboard_around_user(leaderboard_data,
-                                    users_points,
+                                    positions,
                                     request_user,
                                     count_top,
                                     above,
                                     below):
 
         # find position of current user
-        request_user_position = 0
-        for idx, up in enumerate(users_points):
-            if up['user'] == request_user.pk:
-                request_user_position = idx + 1
-                break
+        request_user_position = positions.filter(user=request_user) \
+            .values_list('rank', flat=True) \
+            .first()
 
-        if request_user_position == 0:
+        if request_user_position is None:
             return leaderboard_data
 
         start_pos = request_user_position - above
@@ -149,22 +113,8 @@ class Points(models.Model):
             start_pos = count_top
             end_pos = request_user_position + below
 
-        user_above_below_points = users_points[start_pos:end_pos]
-
-        for idx, u in enumerate(user_above_below_points):
-            user = User.objects.get(pk=u['user'])
-            user.badges = 0 if u['badges'] is None else u['badges']
-            user.total = 0 if u['points'] is None else u['points']
-
-            leader_data = {}
-            leader_data['position'] = start_pos + idx + 1
-            leader_data['username'] = user.username
-            leader_data['first_name'] = user.first_name
-            leader_data['last_name'] = user.last_name
-            leader_data['points'] = user.total
-            leader_data['badges'] = user.badges
-
-            leaderboard_data.append(leader_data)
+        user_above_below = positions.filter(rank__gt=start_pos, rank__lte=end_pos)
+        leaderboard_data.extend(position.to_dict() for position in user_above_below)
 
         return leaderboard_data
 
@@ -175,3 +125,20 @@ class Points(models.Model):
         if score['total'] is None:
             return 0
         return score['total']
+
+
+class TrackerPointsJob(models.Model):
+    '''
+    Tracker queued to have its points awarded by the process_points_jobs
+    command, rather than when it's saved (only if OPPIA_POINTS_DEFERRED is
+    enabled)
+    '''
+    tracker = models.ForeignKey(Tracker, on_delete=models.CASCADE)
+    created_date = models.DateTimeField('date created', default=timezone.now)
+
+    class Meta:
+        verbose_name = _('Tracker points job')
+        verbose_name_plural = _('Tracker points jobs')
+
+    def __str__(self):
+        return str(self.tracker_id)
@@ -1,9 +1,12 @@
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch.dispatcher import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from oppia.course_index import course_index
 from oppia.models import Course
 
 
@@ -35,3 +38,11 @@ class CourseCategory(models.Model):
     class Meta:
         verbose_name = _('Course Category')
         verbose_name_plural = _('Course Categories')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_delete, sender=CourseCategory)
+def changed_category_invalidate_course_index(sender, instance, **kwargs):
+    course_index.invalidate()
@@ -1,10 +1,14 @@
+import datetime
 import math
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count
+from django.utils import timezone
 
-from gamification.models import DefaultGamificationEvent
-from oppia.models import Points, Tracker
+from gamification.rules import gamification_rules
+from oppia.digest_index import digest_index
+from oppia.models import Course, Points, Tracker, TrackerPointsJob
 
 from settings import constants
 from settings.models import SettingProperties
@@ -25,80 +29,143 @@ def apply_points(user):
     return True
 
 
-def calculate_media_points(tracker):
-    if tracker.is_first_tracker_today():
-        points = DefaultGamificationEvent.objects.get(
-            event='media_started').points
+def calculate_media_points(tracker, first_tracker_today, media_id=None):
+    def get_points(event):
+        return gamification_rules.get_points(event, course_id=tracker.course_id, media_id=media_id)
+
+    if first_tracker_today:
+        points = get_points('media_started')
     else:
         points = 0
-    points += (DefaultGamificationEvent.objects.get(
-        event='media_playing_points_per_interval').points
+    points += (get_points('media_playing_points_per_interval')
                * math.floor(tracker.time_taken
-                            / DefaultGamificationEvent.objects
-                            .get(
-                                event='media_playing_interval')
-                            .points))
-    if points > DefaultGamificationEvent.objects.get(
-      event='media_max_points').points:
-        points = DefaultGamificationEvent.objects.get(
-            event='media_max_points').points
+                            / get_points('media_playing_interval')))
+    if points > get_points('media_max_points'):
+        points = get_points('media_max_points')
 
     return points
 
 
-def tracker_process_points(tracker, activity_type, description, points=None):
+def get_tracker_points(tracker, digest_info, course_owner_id, is_first_tracker_today):
+    '''
+    The rules for the points for a tracker, for both the trackers saved one
+    by one and the batches. is_first_tracker_today is only called when the
+    rules need it. Returns the (unsaved) Points, or None if there are none
+    '''
+    if tracker.course_id is not None \
+       and course_owner_id == tracker.user_id:
+        return None
+
+    description = None
+    points = None
+    activity_type = None
+    tracker_activity_type = digest_info.get_activity_type()
+
+    if tracker.event not in NON_ACTIVITY_EVENTS \
+            and digest_info.exists():
+        title = digest_info.get_activity_title(default=tracker.activity_title)
+        if tracker_activity_type == "media":
+            description = "Media played: " + title
+            activity_type = 'mediaplayed'
+            media_id = digest_info.media.id if digest_info.media is not None else None
+            points = calculate_media_points(tracker, is_first_tracker_today(), media_id)
+        else:
+            description = "Activity completed: " + title
+            activity_type = 'activity_completed'
+            points = gamification_rules.get_points('activity_completed',
+                                                   course_id=tracker.course_id,
+                                                   activity_id=digest_info.activity.id)
+
     if tracker.points is not None:
         points = tracker.points
         activity_type = tracker.event
         if not description:
             description = tracker.event
-    else:
-        if tracker.get_activity_type() != "media":
-            if not tracker.is_first_tracker_today():
-                return
-            if not tracker.completed:
-                return
+    elif tracker_activity_type != "media" \
+            and (not tracker.completed or not is_first_tracker_today()):
+        return None
 
     if points is None or points <= 0:
-        return
+        return None
 
-    p = Points()
-    p.points = points
-    p.type = activity_type
-    p.description = description
-    p.user = tracker.user
-    p.course = tracker.course
-    p.save()
+    return Points(points=points,
+                  type=activity_type,
+                  description=description,
+                  user=tracker.user,
+                  course_id=tracker.course_id)
 
 
 def tracker_callback(sender, **kwargs):
-
     tracker = kwargs.get('instance')
-    description = None
-    points = None
-    activity_type = None
-
-    if not apply_points(tracker.user):
-        return
-
-    if tracker.course is not None \
-       and tracker.course.user == tracker.user:
+    if settings.OPPIA_POINTS_DEFERRED:
+        # awarded by the process_points_jobs command
+        TrackerPointsJob(tracker=tracker).save()
         return
+    award_tracker_points(tracker)
 
-    if tracker.event not in NON_ACTIVITY_EVENTS \
-            and tracker.activity_exists():
 
-        activity_type = 'activity_completed'
-        points = DefaultGamificationEvent.objects.get(
-            event='activity_completed').points
-        if tracker.get_activity_type() == "media":
-            description = "Media played: " + tracker.get_activity_title()
-            activity_type = 'mediaplayed'
-            points = calculate_media_points(tracker)
-        else:
-            description = "Activity completed: " + tracker.get_activity_title()
+def award_tracker_points(tracker, at_save=False):
+    if not apply_points(tracker.user):
+        return
 
-    tracker_process_points(tracker, activity_type, description, points)
+    course_owner_id = None
+    shortname = None
+    if tracker.course is not None:
+        course_owner_id = tracker.course.user_id
+        shortname = tracker.course.shortname
+    # the activity or media in the tracker's course, for its custom points
+    points = get_tracker_points(tracker,
+                                digest_index.get(tracker.digest, shortname),
+                                course_owner_id,
+                                lambda: tracker.is_first_tracker_today(at_save))
+    if points is not None:
+        points.save()
+
+
+def tracker_batch_points(trackers):
+    '''
+    Applies the same rules as award_tracker_points to a batch of (unsaved)
+    trackers from one user, with the digests, course owners and today's
+    completed trackers looked up once for the whole batch. Returns the
+    (unsaved) Points.
+    '''
+    if not trackers or not apply_points(trackers[0].user):
+        return []
+
+    user = trackers[0].user
+    digests = {tracker.digest for tracker in trackers}
+    courses = {course_id: (owner_id, shortname)
+               for course_id, owner_id, shortname
+               in Course.objects
+               .filter(pk__in={tracker.course_id for tracker in trackers})
+               .values_list('id', 'user_id', 'shortname')}
+    # the activity or media in each tracker's course, for their custom points
+    digest_keys = [(tracker.digest, courses.get(tracker.course_id, (None, None))[1]) for tracker in trackers]
+    digest_infos = digest_index.get_many(digest_keys)
+
+    olddate = timezone.now() + datetime.timedelta(hours=-24)
+    completed_today = dict(Tracker.objects
+                           .filter(user=user,
+                                   digest__in=digests,
+                                   completed=True,
+                                   submitted_date__gte=olddate)
+                           .values('digest')
+                           .annotate(count=Count('id'))
+                           .values_list('digest', 'count'))
+    points = []
+    for tracker, digest_key in zip(trackers, digest_keys):
+        # running count, as if the trackers in the batch were saved one by one
+        if tracker.completed:
+            completed_today[tracker.digest] = completed_today.get(tracker.digest, 0) + 1
+        first_tracker_today = completed_today.get(tracker.digest, 0) == 1
+
+        tracker_points = get_tracker_points(tracker,
+                                            digest_infos[digest_key],
+                                            courses.get(tracker.course_id, (None, None))[0],
+                                            lambda: first_tracker_today)
+        if tracker_points is not None:
+            points.append(tracker_points)
+    return points
 
 
 def badgeaward_callback(sender, **kwargs):
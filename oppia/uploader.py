@@ -18,13 +18,14 @@ from gamification.models import CourseGamificationEvent, \
                                 ActivityGamificationEvent, \
                                 MediaGamificationEvent
 from gamification.xml_writer import GamificationXMLWriter
+from oppia.digest_index import digest_index
 from oppia.models import Course, \
     Section, \
     Activity, \
     Media, \
     CoursePublishingLog, \
     CoursePermissions, CourseStatus
-from oppia.utils.course_file import unescape_xml
+from oppia.utils.course_file import unescape_xml, write_course_structure
 from quiz.models import Quiz, \
                         Question, \
                         QuizQuestion, \
@@ -222,6 +223,11 @@ def process_course(extract_path, f, mod_name, request, user):
     if not parse_course_contents(request, doc, course, user, is_new_course):
         return False, 500, is_new_course
     clean_old_course(request, user, oldsections, old_course_filename, course)
+    digest_index.invalidate()
+    # counted once the activities are saved, updated without saving the
+    # course again so its post_save receivers aren't run twice
+    course.no_activities = course.count_activities()
+    Course.objects.filter(pk=course.pk).update(no_activities=course.no_activities)
 
     # save gamification events
     if 'gamification' in meta_info:
@@ -251,6 +257,7 @@ def process_course(extract_path, f, mod_name, request, user):
 
     course_preview_path = os.path.join(settings.MEDIA_ROOT, "courses")
     ZipFile(zipfilepath).extractall(path=course_preview_path)
+    write_course_structure(course.shortname)
 
     writer = GamificationXMLWriter(course)
     writer.update_gamification(request.user)
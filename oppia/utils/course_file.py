@@ -1,7 +1,10 @@
+import io
+import json
 import os
 import zipfile
 
 import shutil
+import xmltodict
 from xml.sax.saxutils import unescape
 
 from django.conf import settings
@@ -54,3 +57,141 @@ def rewrite_xml_contents(user, course, xml_doc):
 
     with zipfile.ZipFile(course_zip_file, 'a') as z:
         z.writestr(module_xml, xml_content)
+
+
+class ZipOverlay(io.RawIOBase):
+    '''
+    Read only view of a zip file that zipfile can append entries to. What's
+    written (the new entries and the central directory rewritten after them)
+    is kept in memory from the offset of the first write, so the zip with the
+    new entries is the original file up to that offset followed by the
+    overlay.
+    '''
+
+    def __init__(self, path):
+        super().__init__()
+        self.file = open(path, 'rb')
+        self.size = os.path.getsize(path)
+        self.position = 0
+        self.offset = None
+        self.overlay = bytearray()
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def get_size(self):
+        return self.size if self.offset is None else self.offset + len(self.overlay)
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            position += self.position
+        elif whence == io.SEEK_END:
+            position += self.get_size()
+        self.position = position
+        return self.position
+
+    def readinto(self, buffer):
+        if self.offset is None or self.position < self.offset:
+            end = self.size if self.offset is None else self.offset
+            self.file.seek(self.position)
+            data = self.file.read(min(len(buffer), end - self.position))
+        else:
+            start = self.position - self.offset
+            data = self.overlay[start:start + len(buffer)]
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def write(self, data):
+        if self.offset is None:
+            self.offset = self.position
+        start = self.position - self.offset
+        if start < 0:
+            raise io.UnsupportedOperation("can't write before the overlay")
+        self.overlay[start:start + len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def truncate(self, size=None):
+        size = self.position if size is None else size
+        if self.offset is not None:
+            del self.overlay[size - self.offset:]
+        return size
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def get_zip_overlay(zip_path, files):
+    '''
+    Returns (offset, overlay) for adding the given {filename: content} to the
+    zip: the zip with them is the first offset bytes of the original file
+    followed by the overlay bytes
+    '''
+    with ZipOverlay(zip_path) as zip_overlay:
+        with zipfile.ZipFile(zip_overlay, 'a') as zip_file:
+            for filename, content in files.items():
+                zip_file.writestr(filename, content)
+        return zip_overlay.offset, bytes(zip_overlay.overlay)
+
+
+def stream_zip_overlay(zip_path, offset, overlay, chunk_size=64 * 1024):
+    with open(zip_path, 'rb') as zip_file:
+        remaining = offset
+        while remaining > 0:
+            chunk = zip_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    yield overlay
+
+
+def get_course_structure_path(shortname):
+    return os.path.join(settings.MEDIA_ROOT, 'courses', shortname, 'structure.json')
+
+
+def write_course_structure(shortname):
+    '''
+    Converts the module.xml extracted to the courses preview area into the
+    JSON structure served by the API and saves it next to it, so it isn't
+    parsed again on each request. Returns the JSON
+    '''
+    xml_path = os.path.join(settings.MEDIA_ROOT, 'courses', shortname, 'module.xml')
+    with open(xml_path) as fd:
+        structure = json.dumps(xmltodict.parse(fd.read()))
+
+    # written in full before it replaces the old one, for the requests reading it
+    path = get_course_structure_path(shortname)
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as fd:
+        fd.write(structure)
+    os.replace(tmp_path, path)
+    return structure
+
+
+def get_course_structure(shortname):
+    '''
+    Returns the JSON structure saved when the course was published, converted
+    again if the module.xml is newer (or the course was published before the
+    structure was saved)
+    '''
+    path = get_course_structure_path(shortname)
+    xml_path = os.path.join(settings.MEDIA_ROOT, 'courses', shortname, 'module.xml')
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(xml_path):
+            with open(path) as fd:
+                return fd.read()
+    except OSError:
+        pass
+    return write_course_structure(shortname)
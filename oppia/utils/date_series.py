@@ -0,0 +1,96 @@
+import datetime
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+
+def to_date(value):
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+def get_day_start(day):
+    # midnight at the start of the day, in the current time zone
+    value = datetime.datetime.combine(day, datetime.time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def get_days(start_date, end_date):
+    '''
+    The days from start_date to end_date (both included)
+    '''
+    day = to_date(start_date)
+    end_date = to_date(end_date)
+    while day <= end_date:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def get_months(start_date, end_date):
+    '''
+    The first day of each month from start_date's, stepping a month from
+    start_date while it's not after end_date (as the graphs always did)
+    '''
+    start_date = to_date(start_date)
+    end_date = to_date(end_date)
+    months = []
+    while start_date + relativedelta(months=+len(months)) <= end_date:
+        months.append((start_date + relativedelta(months=+len(months))).replace(day=1))
+    return months
+
+
+def filter_date_range(queryset, date_field, start_day, end_day):
+    # on the field itself rather than a truncated date, so its index is used
+    if isinstance(queryset.model._meta.get_field(date_field), models.DateTimeField):
+        return queryset.filter(**{date_field + '__gte': get_day_start(start_day),
+                                  date_field + '__lt': get_day_start(end_day + datetime.timedelta(days=1))})
+    return queryset.filter(**{date_field + '__gte': start_day, date_field + '__lte': end_day})
+
+
+def get_grouped_values(queryset, period, aggregate):
+    # the default ordering would be added to the grouping
+    return {to_date(key): value
+            for key, value in queryset.annotate(series_period=period)
+                                      .order_by()
+                                      .values('series_period')
+                                      .annotate(series_value=aggregate)
+                                      .values_list('series_period', 'series_value')}
+
+
+def get_daily_series(queryset, date_field, aggregate, start_date, end_date, default=0):
+    '''
+    Returns [(day, value)] for each day from start_date to end_date, the value
+    being the aggregate (e.g. Count('id')) of the rows of the queryset on that
+    day, from one query grouped by day, and default for the days without any
+    '''
+    days = list(get_days(start_date, end_date))
+    if not days:
+        return []
+    queryset = filter_date_range(queryset, date_field, days[0], days[-1])
+    if isinstance(queryset.model._meta.get_field(date_field), models.DateTimeField):
+        period = TruncDate(date_field)
+    else:
+        period = models.F(date_field)
+    values = get_grouped_values(queryset, period, aggregate)
+    return [(day, default if values.get(day) is None else values[day]) for day in days]
+
+
+def get_monthly_series(queryset, date_field, aggregate, start_date, end_date, default=0):
+    '''
+    Returns [(month, value)] for each month (see get_months), the value being
+    the aggregate of the rows of the queryset in the whole month, from one
+    query grouped by month, and default for the months without any
+    '''
+    months = get_months(start_date, end_date)
+    if not months:
+        return []
+    queryset = filter_date_range(queryset,
+                                 date_field,
+                                 months[0],
+                                 months[-1] + relativedelta(months=+1, days=-1))
+    values = get_grouped_values(queryset, TruncMonth(date_field), aggregate)
+    return [(month, default if values.get(month) is None else values[month]) for month in months]
@@ -0,0 +1,67 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class VersionedProcessCache:
+    '''
+    A value loaded by each process and kept for get_timeout() seconds, or
+    until the version stamp in the Django cache (VERSION_KEY) changes.
+
+    invalidate() reloads it in the current process straight away, and
+    changes the version stamp once the transaction is committed. The stamp
+    is checked at most every OPPIA_CACHE_VERSION_CHECK_INTERVAL seconds, and
+    only the processes sharing the Django cache (eg memcached or redis, not
+    the default local memory cache) pick up the change that way, the others
+    once their copy times out. A timeout of 0 disables the cache.
+
+    Subclasses set VERSION_KEY and implement get_timeout() and load()
+    '''
+
+    VERSION_KEY = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = None
+        self.version = None
+        self.expires = 0
+        self.next_version_check = 0
+
+    def get_timeout(self):
+        raise NotImplementedError
+
+    def load(self):
+        raise NotImplementedError
+
+    def get(self):
+        timeout = self.get_timeout()
+        if timeout <= 0:
+            return self.load()
+        with self.lock:
+            now = time.monotonic()
+            if self.value is not None and self.expires > now and self.next_version_check > now:
+                return self.value
+            version = cache.get(self.VERSION_KEY)
+            self.next_version_check = now + settings.OPPIA_CACHE_VERSION_CHECK_INTERVAL
+            if self.value is None or version != self.version or self.expires <= now:
+                if version is None:
+                    cache.add(self.VERSION_KEY, uuid.uuid4().hex, None)
+                    version = cache.get(self.VERSION_KEY)
+                self.value = self.load()
+                self.version = version
+                self.expires = now + timeout
+            return self.value
+
+    def clear(self):
+        # only for this process, eg to make sure the next read has the latest value
+        with self.lock:
+            self.value = None
+
+    def invalidate(self):
+        self.clear()
+        # only once committed, or the other processes could reload the old value
+        transaction.on_commit(lambda: cache.set(self.VERSION_KEY, uuid.uuid4().hex, None))
@@ -3,7 +3,7 @@ import json
 import tablib
 from django.contrib.auth.models import User
 from django.db.models import Sum
-from django.db.models.functions import TruncDay, TruncMonth, TruncYear
+from django.db.models.functions import TruncDay
 from django.http import HttpResponse
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView, DetailView, ListView
@@ -18,7 +18,7 @@ from oppia.models import Tracker
 from oppia.permissions import can_edit_course_gamification, permission_view_course_detail
 from oppia.views.utils import generate_graph_data
 from profile import utils
-from summary.models import CourseDailyStats, UserCourseSummary
+from summary.models import CourseDailyStats, CourseStatsRollup, UserCourseSummary
 
 
 @method_decorator(permission_view_course_detail, name='dispatch')
@@ -55,12 +55,10 @@ class CourseActivityDetail(DateRangeFilterMixin, DetailView):
             return generate_graph_data(daily_stats, False)
 
         else:
-            monthly_stats = CourseDailyStats.objects \
-                .filter(course=self.object, day__gte=start_date, day__lte=end_date) \
-                .annotate(month=TruncMonth('day'), year=TruncYear('day')) \
-                .values('month', 'year', 'type') \
-                .annotate(total=Sum('total')) \
-                .order_by('year', 'month')
+            monthly_stats = CourseStatsRollup.get_monthly_totals(start_date,
+                                                                 end_date,
+                                                                 fields=('type',),
+                                                                 course=self.object)
 
             return generate_graph_data(monthly_stats, True)
 
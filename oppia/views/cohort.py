@@ -3,6 +3,7 @@ import datetime
 import operator
 
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.http import Http404
 from django.shortcuts import render
 from django.urls import reverse_lazy, reverse
@@ -37,6 +38,7 @@ class CohortListView(StaffRequiredMixin, ListView):
     paginate_by = 20
 
 
+@transaction.atomic
 def cohort_add_roles(cohort, role, users):
     user_list = users.strip().split(",")
     for u in user_list:
@@ -50,6 +52,7 @@ def cohort_add_roles(cohort, role, users):
             pass
 
 
+@transaction.atomic
 def cohort_add_courses(cohort, courses):
     course_list = courses.strip().split(",")
     for c in course_list:
@@ -1,12 +1,10 @@
 # oppia/views.py
 import datetime
 
-from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
 from django.db.models import Count, Sum
-from django.db.models.functions import TruncDay, TruncMonth, TruncYear
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.utils import timezone
@@ -20,8 +18,9 @@ from oppia import constants
 from oppia import permissions
 from oppia.models import Activity, Points
 from oppia.models import Tracker, Participant, Course, CoursePermissions
+from oppia.utils.date_series import get_daily_series, get_monthly_series
 from profile.models import UserProfile
-from summary.models import CourseDailyStats, UserCourseSummary
+from summary.models import CourseDailyStats, CourseStatsRollup, UserCourseSummary
 from settings.models import SettingProperties
 
 from settings import constants as settingconstants
@@ -86,42 +85,17 @@ class HomeView(DateRangeFilterMixin, TemplateView):
 
 
 def process_home_activity_days(start_date, end_date):
-    activity = []
-    no_days = (end_date - start_date).days + 1
-    tracker_stats = CourseDailyStats.objects \
-        .filter(day__gte=start_date, day__lte=end_date) \
-        .values('day') \
-        .annotate(count=Sum('total'))
-
-    for i in range(0, no_days, +1):
-        temp = start_date + datetime.timedelta(days=i)
-        count = next((dct['count']
-                      for dct in tracker_stats
-                      if dct['day'] == temp.date()), 0)
-        activity.append([temp.strftime(constants.STR_DATE_DISPLAY_FORMAT),
-                         count])
-    return activity
+    return [[day.strftime(constants.STR_DATE_DISPLAY_FORMAT), count]
+            for day, count in get_daily_series(CourseDailyStats.objects, 'day', Sum('total'), start_date, end_date)]
 
 
 def process_home_activity_months(start_date, end_date):
-    activity = []
-    delta = relativedelta(months=+1)
-    no_months = 0
-    tmp_date = start_date
-    while tmp_date <= end_date:
-        tmp_date += delta
-        no_months += 1
-
-    for i in range(0, no_months, +1):
-        temp = start_date + relativedelta(months=+i)
-        month = temp.strftime("%m")
-        year = temp.strftime("%Y")
-        count = CourseDailyStats.objects \
-            .filter(day__month=month, day__year=year) \
-            .aggregate(total=Sum('total')).get('total', 0)
-        activity.append([temp.strftime("%b %Y"),
-                         0 if count is None else count])
-    return activity
+    return [[month.strftime("%b %Y"), count]
+            for month, count in get_monthly_series(CourseStatsRollup.objects.filter(period=CourseStatsRollup.MONTH),
+                                                   'start',
+                                                   Sum('total'),
+                                                   start_date,
+                                                   end_date)]
 
 
 class ManagerView(TemplateView):
@@ -177,31 +151,11 @@ class TeacherView(TemplateView):
 
 
 def get_trackers(start_date, end_date, courses, students=None, date_data='tracker_date'):
-    activity = []
-    no_days = (end_date - start_date).days + 1
-    if date_data == "submitted_date":
-        trackers = Tracker.objects.filter(course__in=courses,
-                                          submitted_date__gte=start_date,
-                                          submitted_date__lte=end_date)
-    else:
-        trackers = Tracker.objects.filter(course__in=courses, tracker_date__gte=start_date, tracker_date__lte=end_date)
-
+    trackers = Tracker.objects.filter(course__in=courses)
     if students:
-        trackers.filter(user__in=students)
-
-    trackers.annotate(day=TruncDay(date_data), month=TruncMonth(date_data), year=TruncYear(date_data)) \
-        .values('day') \
-        .annotate(count=Count('id'))
-    for i in range(0, no_days, +1):
-        temp = start_date + datetime.timedelta(days=i)
-        temp_date = temp.date().strftime(constants.STR_DATE_DISPLAY_FORMAT)
-        count = next((dct['count']
-                     for dct in trackers
-                     if dct['day'].strftime(constants.STR_DATE_DISPLAY_FORMAT)
-                     == temp_date), 0)
-        activity.append([temp.strftime(constants.STR_DATE_DISPLAY_FORMAT),
-                         count])
-    return activity
+        trackers = trackers.filter(user__in=students)
+    return [[day.strftime(constants.STR_DATE_DISPLAY_FORMAT), count]
+            for day, count in get_daily_series(trackers, date_data, Count('id'), start_date, end_date)]
 
 
 class LeaderboardView(SafePaginatorMixin, ListView, AjaxTemplateResponseMixin):
@@ -1,11 +1,9 @@
-import datetime
-
 from django.core.paginator import Paginator
 from django.db.models import Count
-from django.db.models.functions import TruncDay, TruncMonth, TruncYear
 
 from oppia import constants
 from oppia.models import Course
+from oppia.utils.date_series import get_daily_series
 
 
 def get_paginated_courses(request):
@@ -59,26 +57,5 @@ def generate_graph_data(dates_types_stats, is_monthly=False):
 
 
 def filter_trackers(trackers, start_date, end_date):
-
-    activity = []
-    end_date = end_date + datetime.timedelta(days=1)
-    no_days = (end_date - start_date).days
-
-    trackers = trackers.filter(
-                        tracker_date__gte=start_date,
-                        tracker_date__lte=end_date) \
-                       .annotate(day=TruncDay('tracker_date'),
-                                 month=TruncMonth('tracker_date'),
-                                 year=TruncYear('tracker_date')) \
-                       .values('day') \
-                       .annotate(count=Count('id'))
-    for i in range(0, no_days, +1):
-        temp = start_date + datetime.timedelta(days=i)
-        temp_date = temp.date().strftime(constants.STR_DATE_DISPLAY_FORMAT)
-        count = next((dct['count']
-                     for dct in trackers
-                     if dct['day'].strftime(constants.STR_DATE_DISPLAY_FORMAT)
-                     == temp_date), 0)
-        activity.append([temp_date, count])
-
-    return activity
+    return [[day.strftime(constants.STR_DATE_DISPLAY_FORMAT), count]
+            for day, count in get_daily_series(trackers, 'tracker_date', Count('id'), start_date, end_date)]
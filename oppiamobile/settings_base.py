@@ -197,6 +197,17 @@ OPPIA_EXTERNAL_STORAGE_MEDIA_URL = None  # only used if OPPIA_EXTERNAL_STORAGE i
 OPPIA_EXTERNAL_STORAGE_COURSE_ROOT = None  # only used if OPPIA_EXTERNAL_STORAGE is set to True
 OPPIA_EXTERNAL_STORAGE_COURSE_URL = None  # only used if OPPIA_EXTERNAL_STORAGE is set to True
 
+# lets the web server send the course zips downloaded unchanged (by users
+# without completed trackers in the course). 'X-Accel-Redirect' for nginx,
+# with OPPIA_SENDFILE_PREFIX the internal location serving COURSE_UPLOAD_DIR,
+# or 'X-Sendfile' for Apache/lighttpd, which are sent the file path
+OPPIA_SENDFILE_HEADER = None
+OPPIA_SENDFILE_PREFIX = '/protected/courses/'
+
+# seconds the tracker.xml added to the downloaded course zips is cached for
+# each user (it's rebuilt straight away when they have new trackers)
+OPPIA_COURSE_DOWNLOAD_CACHE_TIMEOUT = 3600
+
 OPPIA_METADATA = {
     'NETWORK': False,
     'DEVICE_ID': False,
@@ -223,6 +234,52 @@ OPPIA_BADGES_ENABLED = True
 
 BADGE_AWARDING_METHOD = 'all_activities'
 
+# queues the changes to the summary tables when trackers and points are
+# saved, so the process_summary_deltas command can fold them in every few
+# seconds instead of waiting for update_summaries to run
+OPPIA_SUMMARY_REALTIME = False
+
+# queues the trackers to have their points awarded (and the course completed
+# badges checked) by the process_points_jobs command, rather than while the
+# tracker is being saved. The points returned to the app are then read from
+# the summary tables. On databases where bulk_create doesn't return the ids
+# (MySQL) the trackers saved in batches are looked up by their uuids, the
+# points for a batch with trackers without a uuid are still awarded straight
+# away
+OPPIA_POINTS_DEFERRED = False
+
+# per process cache of the activity/media for each digest, used when saving
+# trackers. Cleared when a course is uploaded or deleted, other processes
+# see the changes once their entries time out (in seconds)
+OPPIA_DIGEST_CACHE_SIZE = 10000
+OPPIA_DIGEST_CACHE_TIMEOUT = 300
+
+# seconds the gamification event points are kept in memory by each process
+# (they're reloaded straight away in the process where they're edited)
+OPPIA_GAMIFICATION_CACHE_TIMEOUT = 300
+
+# seconds the setting properties are kept in memory by each process. The
+# process making a change reloads them straight away, the others within
+# OPPIA_CACHE_VERSION_CHECK_INTERVAL if they share a Django cache (eg memcached
+# or redis), otherwise (with the default local memory cache) only once their
+# copy times out
+OPPIA_SETTINGS_CACHE_TIMEOUT = 60
+
+# seconds the categories, courses and cohorts used for the course listings in
+# the API are kept in memory by each process, changes reach the other
+# processes as for the setting properties above
+OPPIA_COURSE_INDEX_CACHE_TIMEOUT = 60
+
+# at most how often (in seconds) each process checks the version stamps in the
+# Django cache for changes to the setting properties and course index
+OPPIA_CACHE_VERSION_CHECK_INTERVAL = 5
+
+# cache (one of CACHES) the report graphs are kept in, and for how many
+# seconds. Their keys change whenever the summary cron runs, so a local
+# memory cache is enough. Setting OPPIA_REPORT_CACHE_TIMEOUT to 0 disables it
+OPPIA_REPORT_CACHE = 'default'
+OPPIA_REPORT_CACHE_TIMEOUT = 3600
+
 OPPIA_GOOGLE_ANALYTICS_ENABLED = False
 OPPIA_GOOGLE_ANALYTICS_CODE = 'YOUR_GOOGLE_ANALYTICS_CODE'
 OPPIA_GOOGLE_ANALYTICS_DOMAIN = 'YOUR_DOMAIN'
@@ -22,3 +22,14 @@ MEDIA_ROOT = os.path.join(tempfile.gettempdir(), temp_dir, 'media')
 COURSE_UPLOAD_DIR = os.path.join(tempfile.gettempdir(), temp_dir, 'upload')
 os.makedirs(MEDIA_ROOT, exist_ok=True)
 os.makedirs(COURSE_UPLOAD_DIR, exist_ok=True)
+
+# the test transactions are rolled back without sending any signals, so
+# the cached digests, gamification points, settings, course downloads,
+# course listings and report graphs could be from another test
+OPPIA_DIGEST_CACHE_SIZE = 0
+OPPIA_GAMIFICATION_CACHE_TIMEOUT = 0
+OPPIA_SETTINGS_CACHE_TIMEOUT = 0
+OPPIA_COURSE_DOWNLOAD_CACHE_TIMEOUT = 0
+OPPIA_COURSE_INDEX_CACHE_TIMEOUT = 0
+OPPIA_CACHE_VERSION_CHECK_INTERVAL = 0
+OPPIA_REPORT_CACHE_TIMEOUT = 0
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+from oppiamobile.settings_test import *
+
+# The test database in a file (one for each run) rather than in memory, so it
+# can be shared with worker processes, eg for the update_summaries --workers
+# rebuild test, which is skipped otherwise:
+# pytest --ds=oppiamobile.settings_test_shared_db tests/summary/test_summary_rebuild.py
+DATABASES['default']['TEST'] = {
+    'NAME': os.path.join(tempfile.gettempdir(), temp_dir, 'test_db_{}.sqlite3'.format(os.getpid()))
+}
+# waits for the other processes writing
+DATABASES['default']['OPTIONS'] = {'timeout': 30}
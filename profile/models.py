@@ -1,10 +1,13 @@
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 from datarecovery.models import DataRecovery
-from oppia.models import Participant, CoursePermissions
+from oppia.course_index import course_index
+from oppia.models import Course, Participant, CoursePermissions
 
 
 class UserProfile(models.Model):
@@ -136,3 +139,10 @@ class UserProfileCustomField (models.Model):
             return self.value_int
         else:
             return self.value_str
+
+
+@receiver(post_save, sender=UserProfile)
+def changed_course_owner_invalidate_course_index(sender, instance, raw=False, **kwargs):
+    # the owner's organisation is in the course listings
+    if not raw and Course.objects.filter(user_id=instance.user_id).exists():
+        course_index.invalidate()
@@ -1,13 +1,14 @@
-import copy
 import json
+import math
 
-from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.http import HttpResponse
 from django.utils.translation import gettext as _
 from tastypie import fields
 from tastypie.authentication import ApiKeyAuthentication
 from tastypie.authorization import Authorization
 from tastypie.exceptions import BadRequest
-from tastypie.resources import ModelResource
+from tastypie.resources import ModelResource, convert_post_to_patch
 
 from datarecovery.models import DataRecovery
 from oppia import DEFAULT_IP_ADDRESS
@@ -17,6 +18,76 @@ from quiz.models import Quiz, Question, QuizQuestion, QuizAttempt, \
                         QuizAttemptResponse
 
 
+def get_question_id(response):
+    try:
+        return int(response['question_id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_response_error(response):
+    '''
+    The DataRecovery reason if the response is missing its question_id or
+    score, or either isn't a number, None if it can be saved
+    '''
+    if not isinstance(response, dict) or 'question_id' not in response or 'score' not in response:
+        return DataRecovery.Reason.MAPPING_KEY_NOT_FOUND
+    try:
+        score = float(response['score'])
+    except (TypeError, ValueError):
+        return DataRecovery.Reason.INAPPROPRIATE_ARGUMENT_VALUE
+    if get_question_id(response) is None or not math.isfinite(score):
+        return DataRecovery.Reason.INAPPROPRIATE_ARGUMENT_VALUE
+    return None
+
+
+class QuizAttemptSubmitted(BadRequest):
+    '''
+    The quiz attempt (with the same instance_id) has already been submitted
+    '''
+
+
+class QuizAttemptBatchLookup:
+    '''
+    Quizzes, their questions and the instance_ids already submitted for all
+    the quiz attempts in a batch, loaded at once rather than once per
+    attempt and response
+    '''
+
+    def __init__(self, objects):
+        quiz_ids = set()
+        question_ids = set()
+        instance_ids = set()
+        for data in objects:
+            # the malformed attempts are reported when they're hydrated
+            if not isinstance(data, dict):
+                continue
+            try:
+                quiz_ids.add(int(data['quiz_id']))
+            except (KeyError, TypeError, ValueError):
+                pass
+            responses = data.get('responses')
+            if isinstance(responses, list):
+                question_ids.update(get_question_id(response) for response in responses
+                                    if isinstance(response, dict) and 'question_id' in response)
+            instance_id = data.get('instance_id')
+            if isinstance(instance_id, (str, int)):
+                instance_ids.add(instance_id)
+
+        self.quizzes = Quiz.objects.in_bulk(quiz_ids)
+        self.questions = Question.objects.in_bulk(question_ids - {None})
+        self.quiz_questions = set(QuizQuestion.objects.filter(quiz_id__in=self.quizzes.keys())
+                                  .values_list('quiz_id', 'question_id'))
+        self.submitted = set(QuizAttempt.objects.filter(instance_id__in=instance_ids - {None})
+                             .values_list('instance_id', flat=True))
+
+    def get_quiz(self, quiz_id):
+        try:
+            return self.quizzes.get(int(quiz_id))
+        except (TypeError, ValueError):
+            return None
+
+
 class QuizAttemptResponseResource(ModelResource):
     quizattempt = fields.ToOneField('quiz.api.resources.QuizAttemptResource',
                                     'quizattempt',
@@ -51,14 +122,17 @@ class QuizAttemptResource(ModelResource):
         queryset = QuizAttempt.objects.all()
         resource_name = 'quizattempt'
         allowed_methods = ['post']
+        list_allowed_methods = ['post', 'patch']
         authentication = ApiKeyAuthentication()
         authorization = Authorization()
         always_return_data = True
         serializer = QuizAttemptJSONSerializer()
 
     def hydrate(self, bundle, request=None):
-        original_request_data = copy.deepcopy(bundle.data)
-        user = User.objects.get(pk=bundle.request.user.id)
+        lookup = getattr(bundle, 'quizattempt_lookup', None)
+        if lookup is None:
+            lookup = QuizAttemptBatchLookup([bundle.data])
+        user = bundle.request.user
         bundle.obj.user = user
         bundle.obj.ip = bundle.request.META.get('REMOTE_ADDR',
                                                 DEFAULT_IP_ADDRESS)
@@ -66,50 +140,52 @@ class QuizAttemptResource(ModelResource):
                                                    'unknown')
 
         # check the quiz exists
-        try:
-            bundle.obj.quiz = Quiz.objects.get(pk=bundle.data['quiz_id'])
-        except Quiz.DoesNotExist:
+        bundle.obj.quiz = lookup.get_quiz(bundle.data['quiz_id'])
+        if bundle.obj.quiz is None:
             DataRecovery.create_data_recovery_entry(
                 user=user,
                 data_type=DataRecovery.Type.QUIZ,
                 reasons=[DataRecovery.Reason.QUIZ_DOES_NOT_EXIST],
-                data=json.dumps(original_request_data)
+                data=json.dumps(bundle.data)
             )
             raise BadRequest(_(u'Quiz does not exist'))
 
         # see if instance id already submitted
-        attempts = QuizAttempt.objects.filter(
-            instance_id=bundle.data['instance_id']).count()
-
-        if attempts > 0:
-            raise BadRequest(_(u'QuizAttempt already submitted'))
+        if bundle.data['instance_id'] in lookup.submitted:
+            raise QuizAttemptSubmitted(_(u'QuizAttempt already submitted'))
 
-        # check that all the questions exist and are part of this quiz
+        # check that all the responses can be saved, and their questions
+        # exist and are part of this quiz
+        if not isinstance(bundle.data['responses'], list):
+            raise BadRequest(_(u'Quiz responses must be a list'))
         for response in bundle.data['responses']:
-            if 'question_id' in response:
-                try:
-                    response['question'] = Question.objects.get(
-                        pk=response['question_id'])
-                except Question.DoesNotExist:
-                    DataRecovery.create_data_recovery_entry(
-                        user=user,
-                        data_type=DataRecovery.Type.QUIZ,
-                        reasons=[DataRecovery.Reason.QUESTION_DOES_NOT_EXIST],
-                        data=json.dumps(original_request_data)
-                    )
-                    raise BadRequest(_(u'Question does not exist'))
-                # check part of this quiz
-                try:
-                    QuizQuestion.objects.get(quiz=bundle.obj.quiz,
-                                             question=response['question'])
-                except QuizQuestion.DoesNotExist:
-                    DataRecovery.create_data_recovery_entry(
-                        user=user,
-                        data_type=DataRecovery.Type.QUIZ,
-                        reasons=[DataRecovery.Reason.QUESTION_FROM_DIFFERENT_QUIZ],
-                        data=json.dumps(original_request_data)
-                    )
-                    raise BadRequest(_(u'This question is not part of this quiz'))
+            error = get_response_error(response)
+            if error is not None:
+                DataRecovery.create_data_recovery_entry(
+                    user=user,
+                    data_type=DataRecovery.Type.QUIZ,
+                    reasons=[error],
+                    data=json.dumps(bundle.data)
+                )
+                raise BadRequest(_(u'Quiz response must have a numeric question_id and score'))
+            question_id = get_question_id(response)
+            if question_id not in lookup.questions:
+                DataRecovery.create_data_recovery_entry(
+                    user=user,
+                    data_type=DataRecovery.Type.QUIZ,
+                    reasons=[DataRecovery.Reason.QUESTION_DOES_NOT_EXIST],
+                    data=json.dumps(bundle.data)
+                )
+                raise BadRequest(_(u'Question does not exist'))
+            # check part of this quiz
+            if (bundle.obj.quiz.id, question_id) not in lookup.quiz_questions:
+                DataRecovery.create_data_recovery_entry(
+                    user=user,
+                    data_type=DataRecovery.Type.QUIZ,
+                    reasons=[DataRecovery.Reason.QUESTION_FROM_DIFFERENT_QUIZ],
+                    data=json.dumps(bundle.data)
+                )
+                raise BadRequest(_(u'This question is not part of this quiz'))
 
         if 'points' in bundle.data:
             bundle.obj.points = bundle.data['points']
@@ -122,6 +198,91 @@ class QuizAttemptResource(ModelResource):
 
         return bundle
 
+    def hydrate_batch(self, request, objects):
+        """
+        Hydrates a batch of quiz attempts for the request user, loading the
+        quizzes, questions and instance_ids for the whole batch at once.
+        Yields (data, bundle, error) for each attempt, the bundle being None
+        and the error the exception when it's already been submitted
+        (QuizAttemptSubmitted) or isn't valid
+        """
+        lookup = QuizAttemptBatchLookup(objects)
+        for data in objects:
+            if not isinstance(data, dict):
+                yield data, None, BadRequest(_(u'Quiz attempt must be an object'))
+                continue
+            bundle = self.build_bundle(data=data)
+            bundle.request.user = request.user
+            bundle.request.META['REMOTE_ADDR'] = request.META.get('REMOTE_ADDR', DEFAULT_IP_ADDRESS)
+            bundle.request.META['HTTP_USER_AGENT'] = request.META.get('HTTP_USER_AGENT', 'unknown')
+            bundle.quizattempt_lookup = lookup
+
+            try:
+                bundle.obj = self._meta.object_class()
+                self.authorized_create_detail(self.get_object_list(bundle.request), bundle)
+                bundle = self.full_hydrate(bundle)
+            except (BadRequest, KeyError, TypeError, ValueError) as e:
+                yield data, None, e
+                continue
+
+            lookup.submitted.add(bundle.obj.instance_id)
+            yield data, bundle, None
+
+    @staticmethod
+    def save_attempts(bundles):
+        # bulk_create only sets the ids (needed for the responses) on some
+        # databases, the attempts are saved one by one on the others (MySQL)
+        attempts = [bundle.obj for bundle in bundles]
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                QuizAttempt.objects.bulk_create(attempts)
+            else:
+                for attempt in attempts:
+                    attempt.save()
+            QuizAttemptResponse.objects.bulk_create(
+                [QuizAttemptResponse(quizattempt=bundle.obj,
+                                     question_id=get_question_id(response),
+                                     score=response['score'],
+                                     text=response.get('text', ''))
+                 for bundle in bundles
+                 for response in bundle.data['responses']])
+
+    def patch_list(self, request, **kwargs):
+        """
+        Saves a batch of quiz attempts (eg from the app syncing after being
+        offline), validating all their responses with the quizzes and
+        questions loaded once and inserting the attempts and responses with
+        bulk_create. The attempts already submitted or not valid (which are
+        kept for data recovery) are skipped and listed in the response
+        """
+        request = convert_post_to_patch(request)
+        deserialized = self.deserialize(
+            request,
+            request.body,
+            format=request.META.get('CONTENT_TYPE',
+                                    'application/json'))
+        objects = [self.alter_deserialized_detail_data(request, data) for data in deserialized.get("objects")]
+
+        bundles = []
+        errors = []
+        for data, bundle, error in self.hydrate_batch(request, objects):
+            if bundle is None:
+                instance_id = data.get('instance_id') if isinstance(data, dict) else None
+                errors.append({'instance_id': instance_id, 'error': str(error)})
+            else:
+                bundles.append(bundle)
+        self.save_attempts(bundles)
+
+        bundle = self.build_bundle(request=request)
+        response_data = {
+            'points': self.dehydrate_points(bundle),
+            'badges': self.dehydrate_badges(bundle),
+            'saved': len(bundles),
+            'errors': errors,
+        }
+        return HttpResponse(content=json.dumps(response_data),
+                            content_type="application/json; charset=utf-8")
+
     def dehydrate_points(self, bundle):
         points = Points.get_userscore(bundle.request.user)
         return points
@@ -1,8 +1,7 @@
-import datetime
-
-from dateutil.relativedelta import relativedelta
+from django.db.models import Count
 
 from oppia import constants as oppia_constants
+from oppia.utils.date_series import get_daily_series, get_monthly_series
 
 from reports.views.base_report_template import BaseReportTemplateView
 from summary.models import UserCourseDailySummary
@@ -10,40 +9,28 @@ from summary.models import UserCourseDailySummary
 
 class DailyActiveUsersView(BaseReportTemplateView):
     template_name = 'reports/daus.html'
+    cache_graph_data = True
 
     def get_graph_data(self, start_date, end_date):
-        data = []
-        no_days = (end_date - start_date).days + 1
-        for i in range(0, no_days, +1):
-            day = start_date + datetime.timedelta(days=i)
-
-            num_users = UserCourseDailySummary.objects.filter(
-                day=day).exclude(user__in=self.users_filter_by).values('user').distinct().count()
-
-            data.append([day.strftime(oppia_constants.STR_DATE_DISPLAY_FORMAT), num_users])
-
-        return data
+        summaries = UserCourseDailySummary.objects.exclude(user__in=self.users_filter_by)
+        return [[day.strftime(oppia_constants.STR_DATE_DISPLAY_FORMAT), num_users]
+                for day, num_users in get_daily_series(summaries,
+                                                       'day',
+                                                       Count('user', distinct=True),
+                                                       start_date,
+                                                       end_date)]
 
 
 class MonthlyActiveUsersView(BaseReportTemplateView):
 
     template_name = 'reports/maus.html'
+    cache_graph_data = True
 
     def get_graph_data(self, start_date, end_date):
-        delta = relativedelta(months=+1)
-        no_months = 0
-        tmp_date = start_date
-        while tmp_date <= end_date:
-            tmp_date += delta
-            no_months += 1
-
-        data = []
-        for i in range(0, no_months, +1):
-            date = start_date + relativedelta(months=+i)
-            num_users = UserCourseDailySummary.objects.filter(
-                day__month=date.month,
-                day__year=date.year).exclude(user__in=self.users_filter_by).values('user').distinct().count()
-
-            data.append([date.strftime(oppia_constants.STR_DATE_DISPLAY_FORMAT_MONTH), num_users])
-
-        return data
+        summaries = UserCourseDailySummary.objects.exclude(user__in=self.users_filter_by)
+        return [[month.strftime(oppia_constants.STR_DATE_DISPLAY_FORMAT_MONTH), num_users]
+                for month, num_users in get_monthly_series(summaries,
+                                                           'day',
+                                                           Count('user', distinct=True),
+                                                           start_date,
+                                                           end_date)]
@@ -2,20 +2,36 @@ from abc import abstractmethod
 
 from collections.abc import Mapping
 
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 
 from helpers.mixins.DateRangeFilterMixin import DateRangeFilterMixin
+from oppia.course_index import get_digest
 from reports import constants
+from settings.models import SettingProperties
 from summary.models import UserCourseSummary
 
 
+def get_summary_watermark():
+    # changes whenever the summary tables are updated, by the cron or from the deltas
+    return [SettingProperties.get_int('last_tracker_pk', 0),
+            SettingProperties.get_int('last_points_pk', 0),
+            SettingProperties.get_string('oppia_summary_cron_last_run', '')]
+
+
 @method_decorator(staff_member_required, name='dispatch')
 class BaseReportTemplateView(DateRangeFilterMixin, TemplateView):
 
     users_filter_by = None
     daterange_no_days = constants.ANNUAL_NO_DAYS
+    # only for the reports reading nothing but the summary tables (and the
+    # courses), their graph data is then kept in OPPIA_REPORT_CACHE until the
+    # summaries are updated
+    cache_graph_data = False
 
     def dispatch(self, request, *args, **kwargs):
         self.users_filter_by = UserCourseSummary.get_excluded_users()
@@ -24,13 +40,37 @@ class BaseReportTemplateView(DateRangeFilterMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         start_date, end_date = self.get_daterange()
-        data = self.get_graph_data(start_date, end_date)
+        data = self.get_cached_graph_data(start_date, end_date)
         if isinstance(data, Mapping):
             context.update(data)
         else:
             context['activity_graph_data'] = data
         return context
 
+    def get_graph_data_cache_key(self, start_date, end_date):
+        return 'oppia_report_%s' % get_digest([type(self).__module__ + '.' + type(self).__qualname__,
+                                               start_date.isoformat(),
+                                               end_date.isoformat(),
+                                               timezone.localdate().isoformat(),
+                                               sorted(self.request.GET.lists()),
+                                               sorted(self.kwargs.items()),
+                                               sorted(self.users_filter_by),
+                                               get_summary_watermark()])
+
+    def get_cached_graph_data(self, start_date, end_date):
+        timeout = settings.OPPIA_REPORT_CACHE_TIMEOUT
+        if not self.cache_graph_data or timeout <= 0:
+            return self.get_graph_data(start_date, end_date)
+
+        cache = caches[settings.OPPIA_REPORT_CACHE]
+        key = self.get_graph_data_cache_key(start_date, end_date)
+        data = cache.get(key)
+        if data is None:
+            data = self.get_graph_data(start_date, end_date)
+            # any querysets are evaluated when pickled
+            cache.set(key, data, timeout)
+        return data
+
     @abstractmethod
     def get_graph_data(self, start_date, end_date):
         pass
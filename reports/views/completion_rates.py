@@ -1,10 +1,12 @@
+from collections import defaultdict
+
 from django.contrib.admin.views.decorators import staff_member_required
 from django.db.models import Sum, Count
 from django.shortcuts import render
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 
-from oppia.models import Course
+from oppia.models import Course, CourseCategory
 from oppia.utils.filters import CourseFilter
 
 from summary.models import UserCourseSummary
@@ -17,17 +19,30 @@ class CompletionRatesView(TemplateView):
 
         courses = Course.objects.filter(CourseFilter.IS_NOT_ARCHIVED & CourseFilter.IS_NOT_DRAFT).order_by('title')
 
+        # all the courses at once, grouped by course
+        course_stats = UserCourseSummary.objects \
+            .filter(course__in=courses) \
+            .order_by() \
+            .values('course') \
+            .annotate(users=Count('user'),
+                      completed=Sum('badges_achieved'))
+        course_stats = {stats['course']: stats for stats in course_stats}
+
+        course_categories = defaultdict(list)
+        for course_id, category_name in CourseCategory.objects \
+                .filter(course__in=courses) \
+                .order_by('category') \
+                .values_list('course', 'category__name'):
+            course_categories[course_id].append(category_name)
+
         courses_list = []
 
         for course in courses:
             obj = {}
             obj['course'] = course
-            course_stats = UserCourseSummary.objects \
-                .filter(course=course) \
-                .values('course') \
-                .annotate(users=Count('user'),
-                          completed=Sum('badges_achieved'))
-            for stats in course_stats:
+            obj['categories'] = ", ".join(course_categories[course.id])
+            stats = course_stats.get(course.id)
+            if stats is not None:
                 no_users = stats['users']
                 obj['enroled'] = no_users
                 if no_users > 0:
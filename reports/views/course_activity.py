@@ -1,42 +1,30 @@
 import datetime
 
 from django.db.models import Sum
-from django.db.models.functions import TruncMonth, TruncYear
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from oppia.models import Course
+from oppia.utils.date_series import get_daily_series
 from reports.views.base_report_template import BaseReportTemplateView
-from summary.models import CourseDailyStats
+from summary.models import CourseDailyStats, CourseStatsRollup
 
 
 class CourseActivityView(BaseReportTemplateView):
 
     template_name = 'reports/course_activity.html'
+    cache_graph_data = True
 
     def get_daily_activity(self, start_date, end_date):
-        no_days = (end_date - start_date).days + 1
-        activity = []
-
-        for i in range(0, no_days, +1):
-            temp = start_date + datetime.timedelta(days=i)
-            count = CourseDailyStats.objects.filter(day=temp).aggregate(count=Sum('total'))['count']
-            if count is None:
-                count = 0
-            activity.append({'day': temp, 'count': count})
-        return activity
+        return [{'day': day, 'count': count}
+                for day, count in get_daily_series(CourseDailyStats.objects, 'day', Sum('total'), start_date, end_date)]
 
     def get_graph_data(self, start_date, end_date):
 
         daily_activity = self.get_daily_activity(start_date, end_date)
 
-        course_activity = CourseDailyStats.objects \
-            .filter(day__gte=start_date, day__lte=end_date) \
-            .annotate(month=TruncMonth('day'),
-                      year=TruncYear('day')) \
-            .values('month', 'year') \
-            .annotate(count=Sum('total')) \
-            .order_by('year', 'month')
+        course_activity = [{'month': row['month'], 'year': row['year'], 'count': row['total']}
+                           for row in CourseStatsRollup.get_monthly_totals(start_date, end_date)]
 
         previous_course_activity = CourseDailyStats.objects \
             .filter(day__lt=start_date) \
@@ -24,7 +24,9 @@ class CourseCompletionRatesView(TemplateView):
 
         course_activities = course.get_no_activities()
         users_stats = UserCourseSummary.objects \
-            .filter(course=course_id).order_by('user')
+            .filter(course=course_id) \
+            .select_related('user') \
+            .order_by('user')
 
         for user_stats in users_stats:
             user_activities = user_stats.completed_activities
@@ -1,13 +1,13 @@
 from django.db.models import Sum
-from django.db.models.functions import TruncMonth, TruncYear
 
 from reports.views.base_report_template import BaseReportTemplateView
-from summary.models import CourseDailyStats
+from summary.models import CourseDailyStats, CourseStatsRollup
 
 
 class CourseDownloadsView(BaseReportTemplateView):
 
     template_name = 'reports/course_downloads.html'
+    cache_graph_data = True
 
     def get_graph_data(self, start_date, end_date):
 
@@ -17,13 +17,8 @@ class CourseDownloadsView(BaseReportTemplateView):
             .annotate(count=Sum('total')) \
             .order_by('day')
 
-        course_downloads = CourseDailyStats.objects \
-            .filter(day__gte=start_date, day__lte=end_date, type='download') \
-            .annotate(month=TruncMonth('day'),
-                      year=TruncYear('day')) \
-            .values('month', 'year') \
-            .annotate(count=Sum('total')) \
-            .order_by('year', 'month')
+        course_downloads = [{'month': row['month'], 'year': row['year'], 'count': row['total']}
+                            for row in CourseStatsRollup.get_monthly_totals(start_date, end_date, type='download')]
 
         previous_course_downloads = CourseDailyStats.objects \
             .filter(day__lt=start_date, type='download') \
@@ -2,27 +2,20 @@ import json
 from operator import itemgetter
 
 from django.db.models import Sum
-from django.db.models.functions import TruncMonth, TruncYear
 
 from oppia.models import Tracker
 from reports.views.base_report_template import BaseReportTemplateView
-from summary.models import CourseDailyStats
+from summary.models import CourseDailyStats, CourseStatsRollup
 
 
 class SearchesView(BaseReportTemplateView):
 
     template_name = 'reports/searches.html'
+    cache_graph_data = True
 
     def get_graph_data(self, start_date, end_date):
-        searches = CourseDailyStats.objects \
-            .filter(day__gte=start_date,
-                    day__lte=end_date,
-                    type='search') \
-            .annotate(month=TruncMonth('day'),
-                      year=TruncYear('day')) \
-            .values('month', 'year') \
-            .annotate(count=Sum('total')) \
-            .order_by('year', 'month')
+        searches = [{'month': row['month'], 'year': row['year'], 'count': row['total']}
+                    for row in CourseStatsRollup.get_monthly_totals(start_date, end_date, type='search')]
 
         previous_searches = CourseDailyStats.objects \
             .filter(day__lt=start_date,
@@ -1,8 +1,7 @@
-import datetime
-
 from django.db.models import Avg, Sum
 
 from oppia import constants as oppia_constants
+from oppia.utils.date_series import get_daily_series
 from reports.views.base_report_template import BaseReportTemplateView
 from summary.models import UserCourseDailySummary
 
@@ -27,16 +26,16 @@ def seconds_to_hours(seconds):
 class AverageTimeSpentView(BaseReportTemplateView):
 
     template_name = 'reports/average_time_spent.html'
+    cache_graph_data = True
 
     def get_graph_data(self, start_date, end_date):
         data = []
         max_time = 0
-        no_days = (end_date - start_date).days + 1
-        for i in range(0, no_days, +1):
-            day = start_date + datetime.timedelta(days=i)
-            time_spent = UserCourseDailySummary.objects.filter(day=day).aggregate(avg=Avg('time_spent_tracked'))['avg']
-            if time_spent is None:
-                time_spent = 0
+        for day, time_spent in get_daily_series(UserCourseDailySummary.objects,
+                                                'day',
+                                                Avg('time_spent_tracked'),
+                                                start_date,
+                                                end_date):
             max_time = max(max_time, time_spent)
             data.append([
                 day.strftime(oppia_constants.STR_DATE_DISPLAY_FORMAT),
@@ -53,17 +52,16 @@ class AverageTimeSpentView(BaseReportTemplateView):
 class TotalTimeSpentView(BaseReportTemplateView):
 
     template_name = 'reports/total_time_spent.html'
+    cache_graph_data = True
 
     def get_graph_data(self, start_date, end_date):
         data = []
         max_time = 0
-        no_days = (end_date - start_date).days + 1
-
-        for i in range(0, no_days, +1):
-            day = start_date + datetime.timedelta(days=i)
-            time_spent = UserCourseDailySummary.objects.filter(day=day).aggregate(sum=Sum('time_spent_tracked'))['sum']
-            if time_spent is None:
-                time_spent = 0
+        for day, time_spent in get_daily_series(UserCourseDailySummary.objects,
+                                                'day',
+                                                Sum('time_spent_tracked'),
+                                                start_date,
+                                                end_date):
             max_time = max(max_time, time_spent)
             data.append([
                 day.strftime(oppia_constants.STR_DATE_DISPLAY_FORMAT),
@@ -1,8 +1,59 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from oppia.utils.process_cache import VersionedProcessCache
 from settings import constants
 
+# position of each value in the cached properties
+STR_VALUE, INT_VALUE, BOOL_VALUE = range(3)
+
+
+class SettingPropertiesCache(VersionedProcessCache):
+    '''
+    All the setting properties, loaded with one query and kept by each
+    process for OPPIA_SETTINGS_CACHE_TIMEOUT seconds (see
+    VersionedProcessCache for how changes reach the other processes).
+
+    The crons' locks and bookkeeping (LOCAL_KEYS) change every few seconds
+    and are read from the database where it matters, so changing them
+    doesn't change the version stamp.
+    '''
+
+    VERSION_KEY = 'oppia_settings_version'
+    LOCAL_KEYS = frozenset(['oppia_cron_lock',
+                            'oppia_summary_cron_lock',
+                            'oppia_points_jobs_lock',
+                            constants.OPPIA_CRON_LAST_RUN,
+                            constants.OPPIA_SUMMARY_CRON_LAST_RUN,
+                            'last_tracker_pk',
+                            'last_points_pk'])
+
+    def get_timeout(self):
+        return settings.OPPIA_SETTINGS_CACHE_TIMEOUT
+
+    def load(self):
+        return {key: (str_value, int_value, bool_value)
+                for key, str_value, int_value, bool_value
+                in SettingProperties.objects.values_list('key',
+                                                         'str_value',
+                                                         'int_value',
+                                                         'bool_value')}
+
+    def get_values(self):
+        return self.get()
+
+    def get_value(self, property_key, index):
+        values = self.get_values().get(property_key)
+        if values is None:
+            return None
+        return values[index]
+
+
+setting_properties_cache = SettingPropertiesCache()
+
 
 class SettingProperties(models.Model):
 
@@ -34,52 +85,38 @@ class SettingProperties(models.Model):
         ordering = ['category', 'key']
 
     @staticmethod
-    def get_property(property_key, default_value):
-        try:
-            prop = SettingProperties.objects.get(key=property_key)
-            value = None
-            if prop.str_value is not None:
-                value = prop.str_value
-            elif prop.int_value is not None:
-                value = prop.int_value
-            elif prop.bool_value is not None:
-                value = prop.bool_value
+    def get_property(property_key, default_value, values=None):
+        if values is None:
+            values = setting_properties_cache.get_values()
+        for value in values.get(property_key, ()):
             if value is not None:
                 return value
-        except SettingProperties.DoesNotExist:
-            pass
-
         return default_value
 
+    @staticmethod
+    def get_many(defaults):
+        '''
+        Values (as get_property) for all the keys in the defaults dict, the
+        default value being used for the keys not set
+        '''
+        values = setting_properties_cache.get_values()
+        return {property_key: SettingProperties.get_property(property_key, default_value, values)
+                for property_key, default_value in defaults.items()}
+
     @staticmethod
     def get_int(property_key, default_value):
-        try:
-            prop = SettingProperties.objects.get(key=property_key)
-            if prop.int_value is not None:
-                return prop.int_value
-        except SettingProperties.DoesNotExist:
-            pass
-        return default_value
+        value = setting_properties_cache.get_value(property_key, INT_VALUE)
+        return default_value if value is None else value
 
     @staticmethod
     def get_string(property_key, default_value):
-        try:
-            prop = SettingProperties.objects.get(key=property_key)
-            if prop.str_value is not None:
-                return prop.str_value
-        except SettingProperties.DoesNotExist:
-            pass
-        return default_value
+        value = setting_properties_cache.get_value(property_key, STR_VALUE)
+        return default_value if value is None else value
 
     @staticmethod
     def get_bool(property_key, default_value):
-        try:
-            prop = SettingProperties.objects.get(key=property_key)
-            if prop.bool_value is not None:
-                return prop.bool_value
-        except SettingProperties.DoesNotExist:
-            pass
-        return default_value
+        value = setting_properties_cache.get_value(property_key, BOOL_VALUE)
+        return default_value if value is None else value
 
     @staticmethod
     def set_int(property_key,
@@ -120,3 +157,12 @@ class SettingProperties(models.Model):
 
     def __str__(self):
         return self.key
+
+
+@receiver(post_save, sender=SettingProperties)
+@receiver(post_delete, sender=SettingProperties)
+def setting_properties_changed(sender, instance, **kwargs):
+    if instance.key in SettingPropertiesCache.LOCAL_KEYS:
+        setting_properties_cache.clear()
+    else:
+        setting_properties_cache.invalidate()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from summary.models import UserCourseSummary, CourseDailyStats, UserPointsSummary, UserCourseDailySummary
+from summary.models import UserCourseSummary, CourseDailyStats, UserPointsSummary, UserCourseDailySummary, \
+    SummaryDelta, CourseStatsRollup, UserLastActivity
 
 from helpers.mixins.PermissionMixins import ReadOnlyAdminMixin
 
@@ -78,7 +79,34 @@ class UserCourseDailySummaryAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
     ordering = ['-day']
 
 
+class SummaryDeltaAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ('created_date',
+                    'user',
+                    'course',
+                    'type',
+                    'tracker_pk',
+                    'points_pk',
+                    'count',
+                    'time_taken',
+                    'points')
+    ordering = ['-created_date']
+
+
+class CourseStatsRollupAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ('period', 'start', 'course', 'type', 'total')
+    list_filter = ('period',)
+    ordering = ['period', '-start']
+
+
+class UserLastActivityAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'last_active')
+    ordering = ['-last_active']
+
+
 admin.site.register(UserCourseSummary, UserCourseSummaryAdmin)
 admin.site.register(CourseDailyStats, CourseDailyStatsAdmin)
 admin.site.register(UserPointsSummary, UserPointsSummaryAdmin)
 admin.site.register(UserCourseDailySummary, UserCourseDailySummaryAdmin)
+admin.site.register(SummaryDelta, SummaryDeltaAdmin)
+admin.site.register(CourseStatsRollup, CourseStatsRollupAdmin)
+admin.site.register(UserLastActivity, UserLastActivityAdmin)
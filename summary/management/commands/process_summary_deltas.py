@@ -0,0 +1,216 @@
+import time
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils.translation import gettext_lazy as _
+
+from oppia import constants
+from oppia.models import Tracker, Points, Course
+from settings.models import SettingProperties, setting_properties_cache
+from summary.models import UserCourseSummary, CourseDailyStats, UserPointsSummary, UserCourseDailySummary, \
+    SummaryDelta, Leaderboard, CourseLeaderboard, CourseStatsRollup, UserLastActivity
+from summary.utils import SummaryAccumulator
+
+
+class Command(BaseCommand):
+    help = _('Folds the summary deltas queued when trackers and points are saved into the summary tables')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--interval',
+                            type=float,
+                            dest='interval',
+                            default=5,
+                            help=_('Seconds to wait between each run'))
+
+        parser.add_argument('--once',
+                            action='store_true',
+                            dest='once',
+                            help=_('Process the queued deltas once and exit'))
+
+    def handle(self, *args, **options):
+        while True:
+            self.process_deltas()
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def process_deltas(self):
+
+        # shares the lock with update_summaries, so they never update the summaries at the same time
+        prop, created = SettingProperties.objects \
+            .get_or_create(key='oppia_summary_cron_lock',
+                           int_value=1)
+        if not created:
+            self.stdout.write(_("Oppia summary cron is already running"))
+            return
+
+        # nor while the main cron is running, same as update_summaries
+        if SettingProperties.objects.filter(key='oppia_cron_lock').exists():
+            self.stdout.write(_("Oppia cron is already running"))
+            SettingProperties.delete_key('oppia_summary_cron_lock')
+            return
+
+        try:
+            self.fold_deltas()
+        finally:
+            SettingProperties.delete_key('oppia_summary_cron_lock')
+
+    def fold_deltas(self):
+        newest_delta_pk = SummaryDelta.objects.aggregate(newest=Max('id'))['newest']
+        if newest_delta_pk is None:
+            return
+
+        # update_summaries may have moved them since the settings were loaded by this process
+        setting_properties_cache.clear()
+        last_tracker_pk = SettingProperties.get_property('last_tracker_pk', 0)
+        last_points_pk = SettingProperties.get_property('last_points_pk', 0)
+
+        # trackers and points up to the last pks processed are already included in the summaries
+        deltas = SummaryDelta.objects.filter(pk__lte=newest_delta_pk)
+        tracker_deltas = list(deltas.filter(tracker_pk__gt=last_tracker_pk))
+        points_deltas = list(deltas.filter(points_pk__gt=last_points_pk))
+
+        newest_tracker_pk = max([delta.tracker_pk for delta in tracker_deltas], default=last_tracker_pk)
+        newest_points_pk = max([delta.points_pk for delta in points_deltas], default=last_points_pk)
+
+        # catch up with the trackers and points saved without queueing a delta (e.g. with bulk_create), so
+        # the last pks processed can move forward
+        tracker_deltas += [SummaryDelta.from_tracker(tracker) for tracker in Tracker.objects
+                           .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk)
+                           .exclude(pk__in=deltas.filter(tracker_pk__isnull=False).values('tracker_pk'))
+                           .only('user', 'course', 'tracker_date', 'submitted_date', 'type', 'time_taken')]
+        points_deltas += [SummaryDelta.from_points(points) for points in Points.objects
+                          .filter(pk__gt=last_points_pk, pk__lte=newest_points_pk)
+                          .exclude(pk__in=deltas.filter(points_pk__isnull=False).values('points_pk'))
+                          .only('user', 'course', 'type', 'points')]
+
+        self.stdout.write(_('%d tracker and %d points deltas to process.')
+                          % (len(tracker_deltas), len(points_deltas)))
+
+        with transaction.atomic():
+            self.add_user_course_summaries(tracker_deltas, points_deltas, newest_points_pk)
+            self.add_course_daily_stats(tracker_deltas)
+            self.add_user_points_summaries(points_deltas)
+            self.add_user_course_daily_stats(tracker_deltas)
+
+            SettingProperties.objects.update_or_create(key='last_tracker_pk',
+                                                       defaults={"int_value": newest_tracker_pk})
+            SettingProperties.objects.update_or_create(key='last_points_pk',
+                                                       defaults={"int_value": newest_points_pk})
+            deltas.delete()
+
+    # Same as the incremental update in update_summaries: only the user/courses with new (non-download)
+    # activity are recalculated. The points are added to the summaries whether or not there's new activity
+    # with them, as they may be queued after the trackers they're for (e.g. with OPPIA_POINTS_DEFERRED)
+    def add_user_course_summaries(self, tracker_deltas, points_deltas, newest_points_pk):
+        course_totals = defaultdict(dict)
+        for delta in tracker_deltas:
+            if delta.course_id is None:
+                continue
+            totals = course_totals[delta.course_id].setdefault(
+                delta.user_id, {'total_activity': 0, 'total_downloads': 0, 'points': 0})
+            if delta.type == constants.STR_TRACKER_TYPE_DOWNLOAD:
+                totals['total_downloads'] += delta.count
+            else:
+                totals['total_activity'] += delta.count
+
+        course_points = defaultdict(lambda: defaultdict(int))
+        for delta in points_deltas:
+            if delta.course_id is not None and delta.points:
+                course_points[delta.course_id][delta.user_id] += delta.points
+
+        for course in Course.objects.filter(pk__in=list(course_totals)):
+            user_totals = {user_id: totals for user_id, totals in course_totals[course.pk].items()
+                           if totals['total_activity'] > 0}
+            if not user_totals:
+                continue
+            user_points = course_points.pop(course.pk, {})
+            existing_users = set(UserCourseSummary.objects
+                                 .filter(course=course, user__in=list(user_totals))
+                                 .values_list('user', flat=True))
+            # the new summaries start with all the points in the course so far, including any processed
+            # before the user had a summary
+            all_points = UserCourseSummary.group_by_user(
+                Points.objects.filter(course=course,
+                                      user__in=[user_id for user_id in user_totals if user_id not in existing_users],
+                                      pk__lte=newest_points_pk),
+                Sum('points'))
+            for user_id, totals in user_totals.items():
+                if user_id in existing_users:
+                    totals['points'] = user_points.pop(user_id, 0)
+                else:
+                    totals['points'] = all_points.get(user_id, 0)
+                    user_points.pop(user_id, None)
+            UserCourseSummary.add_to_course_summaries(course, list(user_totals), user_totals)
+            if user_points:
+                course_points[course.pk] = user_points
+
+        # the users without a summary in the course get these points when it's created
+        for course_id, user_points in course_points.items():
+            for user_id, points in user_points.items():
+                UserCourseSummary.objects.filter(course_id=course_id, user_id=user_id) \
+                    .update(points=F('points') + points)
+
+        CourseLeaderboard.update_courses(set(course_totals) | set(course_points))
+
+    def add_course_daily_stats(self, tracker_deltas):
+        excluded_users = set(UserCourseSummary.get_excluded_users())
+
+        stats = SummaryAccumulator(CourseDailyStats, ('course_id', 'day', 'type'))
+        for delta in tracker_deltas:
+            if delta.user_id in excluded_users:
+                continue
+            if delta.course_id is not None:
+                stats.add((delta.course_id, delta.tracker_day, delta.type), total=delta.count)
+            if delta.type in CourseDailyStats.NONCOURSE_TYPES:
+                stats.add((None, delta.tracker_day, delta.type), total=delta.count)
+        stats.flush()
+
+        CourseStatsRollup.update_days({delta.tracker_day for delta in tracker_deltas if delta.tracker_day is not None})
+
+    def add_user_course_daily_stats(self, tracker_deltas):
+        stats = SummaryAccumulator(UserCourseDailySummary, ('day', 'user_id', 'course_id', 'type'))
+        for delta in tracker_deltas:
+            if delta.course_id is None or delta.type is None:
+                continue
+            stats.add((delta.tracker_day, delta.user_id, delta.course_id, delta.type),
+                      total_tracked=delta.count, time_spent_tracked=delta.time_taken)
+            stats.add((delta.submitted_day, delta.user_id, delta.course_id, delta.type),
+                      total_submitted=delta.count, time_spent_submitted=delta.time_taken)
+        stats.flush()
+
+        UserLastActivity.update_users({delta.user_id for delta in tracker_deltas
+                                       if delta.course_id is not None and delta.type is not None})
+
+    def add_user_points_summaries(self, points_deltas):
+        new_points = defaultdict(int)
+        for delta in points_deltas:
+            new_points[delta.user_id] += delta.points
+        if not new_points:
+            return
+
+        users_badges = dict(UserCourseSummary.objects
+                            .filter(user__in=list(new_points))
+                            .values('user')
+                            .annotate(badges=Sum('badges_achieved'))
+                            .values_list('user', 'badges'))
+        existing = {summary.user_id: summary for summary in
+                    UserPointsSummary.objects.filter(user__in=list(new_points))}
+
+        new_summaries = []
+        for user_id, points in new_points.items():
+            summary = existing.get(user_id)
+            if summary is None:
+                summary = UserPointsSummary(user_id=user_id)
+                new_summaries.append(summary)
+            if points:
+                summary.points += points
+                summary.badges = users_badges.get(user_id) or 0
+
+        UserPointsSummary.objects.bulk_create(new_summaries)
+        UserPointsSummary.objects.bulk_update(existing.values(), ['points', 'badges'])
+        Leaderboard.update_users(new_points)
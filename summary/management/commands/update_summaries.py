@@ -1,7 +1,11 @@
+import multiprocessing
 import time
 
+from io import StringIO
+
 from django.contrib.auth.models import User
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from django.db.models import Count, Sum
 from django.db.models.functions import TruncDay
 from django.utils import timezone
@@ -10,13 +14,36 @@ from django.utils.translation import gettext_lazy as _
 from oppia import constants
 from oppia.models import Tracker, Points, Course
 from settings.models import SettingProperties
-from summary.models import UserCourseSummary, CourseDailyStats, UserPointsSummary
+from summary.models import UserCourseSummary, CourseDailyStats, UserPointsSummary, Leaderboard, CourseLeaderboard, \
+    CourseStatsRollup, UserLastActivity
 from summary.models.user_course_daily_summary import UserCourseDailySummary
+from summary.utils import SummaryAccumulator, StagingTables
+
+SUMMARY_MODELS = [UserCourseSummary, CourseDailyStats, UserPointsSummary, UserCourseDailySummary]
+
+
+def rebuild_summaries_shard(staging, course_ids, newest_tracker_pk, newest_points_pk, include_noncourse):
+    '''
+    Calculates the course based summaries of a set of courses into the
+    staging tables. Runs in a worker process, which gets its own database
+    connection.
+    '''
+    command = Command(stdout=StringIO())
+    with staging.use():
+        UserCourseSummary.update_summaries(newest_tracker_pk=newest_tracker_pk,
+                                           newest_points_pk=newest_points_pk,
+                                           courses=course_ids)
+        command.add_course_daily_stats(0, newest_tracker_pk, courses=course_ids, include_noncourse=include_noncourse)
+        command.bulk_update_daily_stats('tracker', 'tracked', 0, newest_tracker_pk, courses=course_ids)
+        command.bulk_update_daily_stats('submitted', 'submitted', 0, newest_tracker_pk, courses=course_ids)
+    return len(course_ids)
 
 
 class Command(BaseCommand):
     help = _('Updates course, points and daily active users summary tables')
     MAX_TIME = 60*60*24
+    CHUNK_SIZE = 5000
+    PROGRESS_INTERVAL = 10000
 
     def add_arguments(self, parser):
 
@@ -26,8 +53,28 @@ class Command(BaseCommand):
                             dest='fromstart',
                             help=_('Calculate summary tables from the beginning, not just the last ones'))
 
+        # Optional argument to use the (slower) row by row update of the summary tables
+        parser.add_argument('--per-row',
+                            action='store_true',
+                            dest='per_row',
+                            help=_('Update the summary tables one row at a time instead of in bulk'))
+
+        # Optional argument to rebuild the summary tables in parallel (only with --fromstart)
+        parser.add_argument('--workers',
+                            type=int,
+                            dest='workers',
+                            default=None,
+                            help=_('Rebuild the summary tables into staging tables using this number of processes, '
+                                   'the current summaries are replaced once finished. Requires --fromstart'))
+
     def handle(self, *args, **options):
 
+        if options['workers'] is not None:
+            if not options['fromstart']:
+                raise CommandError(_('--workers can only be used with --fromstart'))
+            if options['workers'] < 1:
+                raise CommandError(_('--workers must be at least 1'))
+
         # check if cron already running
         prop, created = SettingProperties.objects \
             .get_or_create(key='oppia_summary_cron_lock',
@@ -46,14 +93,14 @@ class Command(BaseCommand):
             pass
 
         if options['fromstart']:
-            self.update_summaries(0, 0)
+            self.update_summaries(0, 0, per_row=options['per_row'], workers=options['workers'])
         else:
             # get last tracker and points PKs processed
             last_tracker_pk = SettingProperties.get_property('last_tracker_pk', 0)
             last_points_pk = SettingProperties .get_property('last_points_pk', 0)
-            self.update_summaries(last_tracker_pk, last_points_pk)
+            self.update_summaries(last_tracker_pk, last_points_pk, per_row=options['per_row'])
 
-    def update_summaries(self, last_tracker_pk=0, last_points_pk=0):
+    def update_summaries(self, last_tracker_pk=0, last_points_pk=0, per_row=False, workers=None):
 
         SettingProperties.set_string('oppia_summary_cron_last_run', timezone.now())
 
@@ -78,10 +125,24 @@ class Command(BaseCommand):
 
         start_time = time.time()
 
-        self.update_user_course_summary(last_tracker_pk, newest_tracker_pk, last_points_pk, newest_points_pk)
-        self.update_course_daily_stats(last_tracker_pk, newest_tracker_pk)
-        self.update_user_points_summary(last_points_pk, newest_points_pk)
-        self.update_user_course_daily_stats(last_tracker_pk, newest_tracker_pk)
+        if workers:
+            self.rebuild_summaries(newest_tracker_pk, newest_points_pk, workers)
+        elif per_row:
+            self.update_user_course_summary(last_tracker_pk, newest_tracker_pk, last_points_pk, newest_points_pk)
+            self.update_course_daily_stats(last_tracker_pk, newest_tracker_pk)
+            self.update_course_stats_rollups(last_tracker_pk, newest_tracker_pk)
+            self.update_user_points_summary(last_points_pk, newest_points_pk)
+            self.update_user_course_daily_stats(last_tracker_pk, newest_tracker_pk, per_row)
+            self.update_user_last_activity(last_tracker_pk, newest_tracker_pk)
+            self.update_course_leaderboards(last_tracker_pk, newest_tracker_pk, last_points_pk, newest_points_pk)
+        else:
+            self.bulk_update_user_course_summary(last_tracker_pk, newest_tracker_pk, last_points_pk, newest_points_pk)
+            self.bulk_update_course_daily_stats(last_tracker_pk, newest_tracker_pk)
+            self.update_course_stats_rollups(last_tracker_pk, newest_tracker_pk)
+            self.update_user_points_summary(last_points_pk, newest_points_pk)
+            self.update_user_course_daily_stats(last_tracker_pk, newest_tracker_pk, per_row)
+            self.update_user_last_activity(last_tracker_pk, newest_tracker_pk)
+            self.update_course_leaderboards(last_tracker_pk, newest_tracker_pk, last_points_pk, newest_points_pk)
 
         print(_("--- took %s seconds ---") % (time.time() - start_time))
 
@@ -90,6 +151,47 @@ class Command(BaseCommand):
         SettingProperties.objects.update_or_create(key='last_points_pk', defaults={"int_value": newest_points_pk})
         SettingProperties.delete_key('oppia_summary_cron_lock')
 
+    # Rebuilds all the summary tables into staging tables, sharded by course across worker processes,
+    # and replaces the current tables with them once all the summaries have been calculated
+    def rebuild_summaries(self, newest_tracker_pk, newest_points_pk, workers):
+
+        course_ids = list(Tracker.objects
+                          .filter(pk__lte=newest_tracker_pk)
+                          .exclude(course__isnull=True)
+                          .values_list('course', flat=True)
+                          .distinct()
+                          .order_by('course'))
+        # non-course summaries (searches, logins...) are calculated along with the first shard
+        shards = [(course_ids[idx::workers], idx == 0) for idx in range(workers)]
+        self.stdout.write(_('%d courses to process using %d workers.') % (len(course_ids), workers))
+
+        staging = StagingTables(SUMMARY_MODELS)
+        staging.create()
+        try:
+            shard_args = [(staging, shard_courses, newest_tracker_pk, newest_points_pk, include_noncourse)
+                          for shard_courses, include_noncourse in shards]
+            if workers > 1:
+                # each worker process must open its own database connection
+                connections.close_all()
+                with multiprocessing.Pool(processes=workers) as pool:
+                    processed = pool.starmap(rebuild_summaries_shard, shard_args)
+            else:
+                processed = [rebuild_summaries_shard(*args) for args in shard_args]
+            self.stdout.write(_('%d courses processed.') % sum(processed))
+
+            # points summaries need the badges from all the user course summaries
+            with staging.use():
+                self.bulk_rebuild_user_points_summary(newest_points_pk)
+        except Exception:
+            staging.drop()
+            raise
+
+        staging.promote()
+        CourseStatsRollup.rebuild()
+        UserLastActivity.rebuild()
+        Leaderboard.rebuild()
+        CourseLeaderboard.rebuild()
+
     # Updates the UserCourseSummary model
     def update_user_course_summary(self, last_tracker_pk=0, newest_tracker_pk=0, last_points_pk=0, newest_points_pk=0):
 
@@ -121,6 +223,22 @@ class Command(BaseCommand):
                 newest_points_pk=newest_points_pk)
             count += 1
 
+    # Updates the UserCourseSummary model with grouped queries for all the user/courses involved
+    def bulk_update_user_course_summary(self,
+                                        last_tracker_pk=0,
+                                        newest_tracker_pk=0,
+                                        last_points_pk=0,
+                                        newest_points_pk=0):
+
+        if last_tracker_pk == 0:
+            UserCourseSummary.objects.all().delete()
+
+        total = UserCourseSummary.update_summaries(last_tracker_pk=last_tracker_pk,
+                                                   newest_tracker_pk=newest_tracker_pk,
+                                                   last_points_pk=last_points_pk,
+                                                   newest_points_pk=newest_points_pk)
+        self.stdout.write(_('%d different user/courses processed.') % total)
+
     # Updates the CourseDailyStats model
     def update_course_daily_stats(self, last_tracker_pk=0, newest_tracker_pk=0):
 
@@ -155,10 +273,8 @@ class Command(BaseCommand):
             self.stdout.write(str(count))
 
         # get different (distinct) non-course logs involved
-        noncourse_types = ['search', 'login', 'register']
-
         noncourse_daily_logs = Tracker.objects \
-            .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk, type__in=noncourse_types) \
+            .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk, type__in=CourseDailyStats.NONCOURSE_TYPES) \
             .exclude(user__in=excluded_users) \
             .annotate(day=TruncDay('tracker_date')) \
             .values('day', 'type') \
@@ -171,13 +287,132 @@ class Command(BaseCommand):
             stats.total += log['total']
             stats.save()
 
-    # Updates the CourseDailyStats model
-    def update_user_course_daily_stats(self, last_tracker_pk=0, newest_tracker_pk=0):
+    # Recalculates the weeks, months and years with new course daily stats
+    def update_course_stats_rollups(self, last_tracker_pk=0, newest_tracker_pk=0):
+
+        if last_tracker_pk == 0:
+            CourseStatsRollup.rebuild()
+            return
+
+        # the days as they're grouped in the course daily stats
+        days = Tracker.objects \
+            .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk) \
+            .annotate(day=TruncDay('tracker_date')) \
+            .order_by() \
+            .values_list('day', flat=True) \
+            .distinct()
+        CourseStatsRollup.update_days(days)
+
+    # Updates the CourseDailyStats model accumulating the new totals in chunks
+    def bulk_update_course_daily_stats(self, last_tracker_pk=0, newest_tracker_pk=0):
+
+        if last_tracker_pk == 0:
+            CourseDailyStats.objects.all().delete()
+
+        self.add_course_daily_stats(last_tracker_pk, newest_tracker_pk)
+
+    def add_course_daily_stats(self, last_tracker_pk=0, newest_tracker_pk=0, courses=None, include_noncourse=True):
+
+        excluded_users = UserCourseSummary.get_excluded_users()
+
+        course_trackers = Tracker.objects.filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk)
+        if courses is not None:
+            course_trackers = course_trackers.filter(course__in=courses)
+
+        course_daily_type_logs = course_trackers \
+            .exclude(course__isnull=True) \
+            .exclude(user__in=excluded_users) \
+            .annotate(day=TruncDay('tracker_date')) \
+            .values('course', 'day', 'type') \
+            .annotate(total=Count('type')) \
+            .order_by('day')
+
+        noncourse_daily_logs = Tracker.objects \
+            .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk, type__in=CourseDailyStats.NONCOURSE_TYPES) \
+            .exclude(user__in=excluded_users) \
+            .annotate(day=TruncDay('tracker_date')) \
+            .values('day', 'type') \
+            .annotate(total=Count('type')) \
+            .order_by('day')
+
+        stats = SummaryAccumulator(CourseDailyStats,
+                                   ('course_id', 'day', 'type'),
+                                   chunk_size=self.CHUNK_SIZE,
+                                   check_existing=(last_tracker_pk != 0))
+
+        total_logs = course_daily_type_logs.count()
+        self.stdout.write(_('%d different courses/dates/types to process.') % total_logs)
+        for count, type_log in enumerate(course_daily_type_logs.iterator(), start=1):
+            stats.add((type_log['course'], type_log['day'], type_log['type']), total=type_log['total'])
+            self.write_progress(count, total_logs)
+        stats.flush()
+
+        if not include_noncourse:
+            return
+
+        self.stdout.write(_('%d different search/dates to process.') % noncourse_daily_logs.count())
+        for log in noncourse_daily_logs.iterator():
+            stats.add((None, log['day'], log['type']), total=log['total'])
+        stats.flush()
+
+    # Updates the UserCourseDailySummary model
+    def update_user_course_daily_stats(self, last_tracker_pk=0, newest_tracker_pk=0, per_row=False):
         if last_tracker_pk == 0:
             UserCourseDailySummary.objects.all().delete()
 
-        self.update_daily_stats('tracker', 'tracked', last_tracker_pk, newest_tracker_pk)
-        self.update_daily_stats('submitted', 'submitted', last_tracker_pk, newest_tracker_pk)
+        if per_row:
+            self.update_daily_stats('tracker', 'tracked', last_tracker_pk, newest_tracker_pk)
+            self.update_daily_stats('submitted', 'submitted', last_tracker_pk, newest_tracker_pk)
+        else:
+            self.bulk_update_daily_stats('tracker', 'tracked', last_tracker_pk, newest_tracker_pk)
+            self.bulk_update_daily_stats('submitted', 'submitted', last_tracker_pk, newest_tracker_pk)
+
+    # Recalculates the last active day of the users with new trackers
+    def update_user_last_activity(self, last_tracker_pk=0, newest_tracker_pk=0):
+        if last_tracker_pk == 0:
+            UserLastActivity.rebuild()
+            return
+
+        user_ids = Tracker.objects \
+            .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk) \
+            .order_by() \
+            .values_list('user', flat=True) \
+            .distinct()
+        UserLastActivity.update_users(list(user_ids))
+
+    def bulk_update_daily_stats(self, date_name, stats_name, last_tracker_pk=0, newest_tracker_pk=0, courses=None):
+        trackers = Tracker.objects.filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk)
+        if courses is not None:
+            trackers = trackers.filter(course__in=courses)
+
+        daily_type_tracked = trackers \
+            .exclude(course__isnull=True) \
+            .exclude(type__isnull=True) \
+            .annotate(day=TruncDay('{}_date'.format(date_name))) \
+            .values('course', 'user', 'day', 'type') \
+            .annotate(total=Count('type'), time_spent=Sum('time_taken')) \
+            .order_by('day')
+
+        total_logs = daily_type_tracked.count()
+        self.stdout.write(_('{} different {} courses/dates/types to process.').format(total_logs, date_name))
+
+        # the 'tracked' pass runs first, so on a rebuild it's the only one that can skip looking for existing rows
+        stats = SummaryAccumulator(UserCourseDailySummary,
+                                   ('day', 'user_id', 'course_id', 'type'),
+                                   chunk_size=self.CHUNK_SIZE,
+                                   check_existing=(last_tracker_pk != 0 or stats_name != 'tracked'))
+
+        total_field = 'total_{}'.format(stats_name)
+        time_spent_field = 'time_spent_{}'.format(stats_name)
+        for count, log in enumerate(daily_type_tracked.iterator(), start=1):
+            stats.add((log['day'], log['user'], log['course'], log['type']),
+                      **{total_field: log['total'], time_spent_field: log['time_spent']})
+            self.write_progress(count, total_logs)
+        stats.flush()
+
+    def write_progress(self, count, total):
+        if count % self.PROGRESS_INTERVAL == 0 or count == total:
+            self.stdout.write(_('processed %d/%d') % (count, total))
 
     def update_daily_stats(self, date_name, stats_name, last_tracker_pk=0, newest_tracker_pk=0):
         # get different (distinct) courses/dates involved
@@ -241,3 +476,48 @@ class Command(BaseCommand):
                 continue
             points, created = UserPointsSummary.objects.get_or_create(user=user)
             points.update_points(last_points_pk=last_points_pk, newest_points_pk=newest_points_pk)
+
+        if last_points_pk == 0:
+            Leaderboard.rebuild()
+        else:
+            Leaderboard.update_users([user_points['user'] for user_points in users_points])
+
+    # Ranks the users again in the courses (and their cohorts) with new trackers or points
+    def update_course_leaderboards(self, last_tracker_pk, newest_tracker_pk, last_points_pk, newest_points_pk):
+        if last_tracker_pk == 0:
+            CourseLeaderboard.rebuild()
+            return
+
+        course_ids = set(Tracker.objects
+                         .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk)
+                         .exclude(course__isnull=True)
+                         .values_list('course', flat=True)
+                         .distinct())
+        course_ids.update(Points.objects
+                          .filter(pk__gt=last_points_pk, pk__lte=newest_points_pk)
+                          .exclude(course__isnull=True)
+                          .values_list('course', flat=True)
+                          .distinct())
+        CourseLeaderboard.update_courses(course_ids)
+
+    # Calculates the UserPointsSummary model for all users with grouped queries
+    def bulk_rebuild_user_points_summary(self, newest_points_pk=0):
+
+        UserPointsSummary.objects.all().delete()
+
+        users_points = Points.objects \
+            .filter(pk__lte=newest_points_pk) \
+            .values('user') \
+            .annotate(total=Sum('points'))
+        users_badges = dict(UserCourseSummary.objects
+                            .values('user')
+                            .annotate(badges=Sum('badges_achieved'))
+                            .values_list('user', 'badges'))
+
+        summaries = [UserPointsSummary(user_id=user_points['user'],
+                                       points=user_points['total'] or 0,
+                                       badges=(users_badges.get(user_points['user']) or 0)
+                                       if user_points['total'] else 0)
+                     for user_points in users_points]
+        UserPointsSummary.objects.bulk_create(summaries, batch_size=500)
+        self.stdout.write(_('%d different user/points processed.') % len(summaries))
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.8 on 2026-10-18 20:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oppia', '0054_cohort_criteria'),
+        ('summary', '0017_usercoursesummary_summary_use_user_id_03479d_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummaryDelta',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tracker_pk', models.IntegerField(blank=True, default=None, null=True)),
+                ('points_pk', models.IntegerField(blank=True, default=None, null=True)),
+                ('tracker_day', models.DateField(blank=True, default=None, null=True)),
+                ('submitted_day', models.DateField(blank=True, default=None, null=True)),
+                ('type', models.CharField(blank=True, default=None, max_length=20, null=True)),
+                ('count', models.IntegerField(default=0)),
+                ('time_taken', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('created_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date created')),
+                ('course', models.ForeignKey(blank=True, default=None, null=True,
+                                             on_delete=django.db.models.deletion.CASCADE, to='oppia.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'SummaryDelta',
+                'verbose_name_plural': 'SummaryDeltas',
+            },
+        ),
+    ]
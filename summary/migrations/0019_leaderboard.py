@@ -0,0 +1,58 @@
+# Generated by Django 5.0.8 on 2026-10-18 21:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rank_users(apps, schema_editor):
+    # historical models, so the ranking is repeated here rather than calling Leaderboard.rebuild()
+    leaderboard_model = apps.get_model('summary', 'leaderboard')
+    user_points_summary_model = apps.get_model('summary', 'userpointssummary')
+    summaries = user_points_summary_model.objects.select_related('user').order_by('-points', 'id')
+    leaderboard_model.objects.bulk_create([leaderboard_model(rank=idx + 1,
+                                                             user_id=summary.user_id,
+                                                             username=summary.user.username,
+                                                             first_name=summary.user.first_name,
+                                                             last_name=summary.user.last_name,
+                                                             points=summary.points,
+                                                             badges=summary.badges)
+                                           for idx, summary in enumerate(summaries.iterator())],
+                                          batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0018_summarydelta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Leaderboard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField(db_index=True)),
+                ('username', models.CharField(max_length=150)),
+                ('first_name', models.CharField(blank=True, max_length=150)),
+                ('last_name', models.CharField(blank=True, max_length=150)),
+                ('points', models.IntegerField(default=0)),
+                ('badges', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard',
+                'verbose_name_plural': 'Leaderboard',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userpointssummary',
+            index=models.Index(fields=['-points', 'id'], name='summary_use_points_e9f36e_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboard',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(rank_users, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.8 on 2026-10-18 21:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_stale(apps, schema_editor):
+    # ranked the first time they're read
+    setting_properties_model = apps.get_model('settings', 'settingproperties')
+    setting_properties_model.objects.update_or_create(key='oppia_course_leaderboards_stale',
+                                                      defaults={'bool_value': True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oppia', '0056_tracker_hot_query_indexes'),
+        ('settings', '0023_cron_warning_setting'),
+        ('summary', '0019_leaderboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortLeaderboard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField()),
+                ('points', models.IntegerField(default=0)),
+                ('badges', models.IntegerField(default=0)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='oppia.cohort')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'CohortLeaderboard',
+                'verbose_name_plural': 'CohortLeaderboards',
+                'indexes': [models.Index(fields=['cohort', 'rank'], name='summary_coh_cohort__f5a4e2_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseLeaderboard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField()),
+                ('points', models.IntegerField(default=0)),
+                ('badges', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='oppia.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'CourseLeaderboard',
+                'verbose_name_plural': 'CourseLeaderboards',
+                'indexes': [models.Index(fields=['course', 'rank'], name='summary_cou_course__601c29_idx')],
+            },
+        ),
+        migrations.RunPython(mark_stale, migrations.RunPython.noop),
+    ]
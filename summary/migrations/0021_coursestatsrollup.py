@@ -0,0 +1,64 @@
+# Generated by Django 5.0.8 on 2026-10-18 22:05
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+
+def build_rollups(apps, schema_editor):
+    # from the current daily stats, later ones are added by the summary cron
+    course_daily_stats_model = apps.get_model('summary', 'coursedailystats')
+    course_stats_rollup_model = apps.get_model('summary', 'coursestatsrollup')
+
+    for period, truncate in (('week', TruncWeek('day')), ('month', TruncMonth('day')), ('year', TruncYear('day'))):
+        totals = course_daily_stats_model.objects \
+            .annotate(period_start=truncate) \
+            .order_by() \
+            .values('period_start', 'course', 'type') \
+            .annotate(period_total=Sum('total'))
+        rollups = []
+        for row in totals.iterator():
+            start = row['period_start']
+            rollups.append(course_stats_rollup_model(
+                period=period,
+                start=start.date() if isinstance(start, datetime.datetime) else start,
+                course_id=row['course'],
+                type=row['type'],
+                total=row['period_total']))
+            if len(rollups) >= 500:
+                course_stats_rollup_model.objects.bulk_create(rollups)
+                rollups = []
+        course_stats_rollup_model.objects.bulk_create(rollups)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oppia', '0056_tracker_hot_query_indexes'),
+        ('summary', '0020_course_cohort_leaderboards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStatsRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month'), ('year', 'Year')],
+                                            max_length=5)),
+                ('start', models.DateField()),
+                ('type', models.CharField(blank=True, default=None, max_length=10, null=True)),
+                ('total', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(blank=True, default=None, null=True,
+                                             on_delete=django.db.models.deletion.CASCADE, to='oppia.course')),
+            ],
+            options={
+                'verbose_name': 'CourseStatsRollup',
+                'verbose_name_plural': 'CourseStatsRollups',
+                'unique_together': {('period', 'start', 'course', 'type')},
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
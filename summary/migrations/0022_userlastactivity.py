@@ -0,0 +1,49 @@
+# Generated by Django 5.0.8 on 2026-10-18 23:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def build_last_activity(apps, schema_editor):
+    # from the current daily summaries, later ones are added by the summary cron
+    user_course_daily_summary_model = apps.get_model('summary', 'usercoursedailysummary')
+    user_last_activity_model = apps.get_model('summary', 'userlastactivity')
+
+    last_days = user_course_daily_summary_model.objects \
+        .order_by() \
+        .values('user') \
+        .annotate(last_active=Max('day'))
+    activities = []
+    for row in last_days.iterator():
+        activities.append(user_last_activity_model(user_id=row['user'], last_active=row['last_active']))
+        if len(activities) >= 500:
+            user_last_activity_model.objects.bulk_create(activities)
+            activities = []
+    user_last_activity_model.objects.bulk_create(activities)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0021_coursestatsrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserLastActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_active', models.DateField(db_index=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE,
+                                              to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'UserLastActivity',
+                'verbose_name_plural': 'UserLastActivities',
+            },
+        ),
+        migrations.RunPython(build_last_activity, migrations.RunPython.noop),
+    ]
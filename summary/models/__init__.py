@@ -1,4 +1,8 @@
 from summary.models.course_daily_stats import *
+from summary.models.course_stats_rollup import *
 from summary.models.user_course_summary import *
 from summary.models.user_points_summary import *
+from summary.models.leaderboard import *
 from summary.models.user_course_daily_summary import *
+from summary.models.user_last_activity import *
+from summary.models.summary_delta import *
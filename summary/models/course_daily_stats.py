@@ -25,6 +25,9 @@ class CourseDailyStats (models.Model):
                                 null=False,
                                 default=0)
 
+    # tracker types that are summarised without a course
+    NONCOURSE_TYPES = ['search', 'login', 'register']
+
     class Meta:
         verbose_name = _(u'CourseDailyStats')
         verbose_name_plural = _(u'CourseDailyStats')
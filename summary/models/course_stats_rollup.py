@@ -0,0 +1,185 @@
+import datetime
+
+from collections import defaultdict
+
+from dateutil.relativedelta import relativedelta
+from django.db import models, transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+from django.utils.translation import gettext_lazy as _
+
+from oppia.models import Course
+from oppia.utils.date_series import to_date
+from summary.models.course_daily_stats import CourseDailyStats
+
+
+class CourseStatsRollup(models.Model):
+    '''
+    The CourseDailyStats totals for each week (from Monday), month and year,
+    so the graphs by month don't add up years of daily rows. Recalculated
+    from the daily stats for the periods with new trackers each time the
+    summaries are updated.
+    '''
+    WEEK = 'week'
+    MONTH = 'month'
+    YEAR = 'year'
+    PERIOD_TYPES = (
+        (WEEK, _('Week')),
+        (MONTH, _('Month')),
+        (YEAR, _('Year')),
+    )
+
+    course = models.ForeignKey(Course,
+                               blank=True,
+                               null=True,
+                               default=None,
+                               on_delete=models.CASCADE)
+    period = models.CharField(max_length=5, choices=PERIOD_TYPES)
+    start = models.DateField(blank=False, null=False)
+    type = models.CharField(max_length=10,
+                            null=True,
+                            blank=True,
+                            default=None)
+    total = models.IntegerField(blank=False,
+                                null=False,
+                                default=0)
+
+    BULK_BATCH_SIZE = 500
+    # periods recalculated per query, to keep the conditions on the days short
+    PERIOD_BATCH_SIZE = 100
+
+    class Meta:
+        verbose_name = _(u'CourseStatsRollup')
+        verbose_name_plural = _(u'CourseStatsRollups')
+        unique_together = ("period", "start", "course", "type")
+
+    @staticmethod
+    def get_period_start(period, day):
+        if period == CourseStatsRollup.WEEK:
+            return day - datetime.timedelta(days=day.weekday())
+        if period == CourseStatsRollup.MONTH:
+            return day.replace(day=1)
+        return day.replace(month=1, day=1)
+
+    @staticmethod
+    def get_period_end(period, start):
+        # the start of the next period
+        if period == CourseStatsRollup.WEEK:
+            return start + datetime.timedelta(weeks=1)
+        if period == CourseStatsRollup.MONTH:
+            return start + relativedelta(months=+1)
+        return start + relativedelta(years=+1)
+
+    @staticmethod
+    def recalculate(period, source, day_field, truncate, starts=None):
+        '''
+        Recalculates the rollups for the periods with the given starts from
+        the source (all of them if there are no starts given)
+        '''
+        if starts is None:
+            CourseStatsRollup.objects.filter(period=period).delete()
+            CourseStatsRollup.add_totals(period, source, truncate)
+            return
+
+        starts = sorted(starts)
+        for idx in range(0, len(starts), CourseStatsRollup.PERIOD_BATCH_SIZE):
+            batch = starts[idx:idx + CourseStatsRollup.PERIOD_BATCH_SIZE]
+            days = Q()
+            for start in batch:
+                days |= Q(**{day_field + '__gte': start,
+                             day_field + '__lt': CourseStatsRollup.get_period_end(period, start)})
+            CourseStatsRollup.objects.filter(period=period, start__in=batch).delete()
+            CourseStatsRollup.add_totals(period, source.filter(days), truncate)
+
+    @staticmethod
+    def add_totals(period, source, truncate):
+        totals = source.annotate(period_start=truncate) \
+            .order_by() \
+            .values('period_start', 'course', 'type') \
+            .annotate(period_total=Sum('total'))
+        new_rollups = []
+        for row in totals.iterator():
+            new_rollups.append(CourseStatsRollup(period=period,
+                                                 start=to_date(row['period_start']),
+                                                 course_id=row['course'],
+                                                 type=row['type'],
+                                                 total=row['period_total']))
+            if len(new_rollups) >= CourseStatsRollup.BULK_BATCH_SIZE:
+                CourseStatsRollup.objects.bulk_create(new_rollups)
+                new_rollups = []
+        CourseStatsRollup.objects.bulk_create(new_rollups)
+
+    @staticmethod
+    def update_days(days=None):
+        '''
+        Recalculates the weeks and months with any of the days from the daily
+        stats, and their years from the months (all of them if there are no
+        days given). Only the periods with the days are recalculated, so one
+        old tracker doesn't mean recalculating all the periods since then
+        '''
+        if days is not None:
+            days = {to_date(day) for day in days}
+            if not days:
+                return
+        with transaction.atomic():
+            for period, source, day_field, truncate in (
+                    (CourseStatsRollup.WEEK, CourseDailyStats.objects.all(), 'day', TruncWeek('day')),
+                    (CourseStatsRollup.MONTH, CourseDailyStats.objects.all(), 'day', TruncMonth('day')),
+                    (CourseStatsRollup.YEAR,
+                     CourseStatsRollup.objects.filter(period=CourseStatsRollup.MONTH),
+                     'start',
+                     TruncYear('start'))):
+                starts = None
+                if days is not None:
+                    starts = {CourseStatsRollup.get_period_start(period, day) for day in days}
+                CourseStatsRollup.recalculate(period, source, day_field, truncate, starts)
+
+    @staticmethod
+    def rebuild():
+        CourseStatsRollup.update_days()
+
+    @staticmethod
+    def get_monthly_totals(start_date, end_date, fields=(), **filters):
+        '''
+        The CourseDailyStats totals from start_date to end_date (both
+        included) by month and the given fields, as dicts with the month and
+        year (as the first day of them), the fields and the total, ordered by
+        month. The whole months come from the rollups, only the days of the
+        months the range starts or ends partway through are added up
+        '''
+        start_date = to_date(start_date)
+        end = to_date(end_date) + datetime.timedelta(days=1)
+        first_month = CourseStatsRollup.get_period_start(CourseStatsRollup.MONTH, start_date)
+        if first_month < start_date:
+            first_month = CourseStatsRollup.get_period_end(CourseStatsRollup.MONTH, first_month)
+        end_month = CourseStatsRollup.get_period_start(CourseStatsRollup.MONTH, end)
+
+        totals = defaultdict(int)
+        if first_month < end_month:
+            monthly = CourseStatsRollup.objects \
+                .filter(period=CourseStatsRollup.MONTH, start__gte=first_month, start__lt=end_month, **filters) \
+                .order_by() \
+                .values('start', *fields) \
+                .annotate(period_total=Sum('total'))
+            for row in monthly:
+                totals[(row['start'],) + tuple(row[field] for field in fields)] += row['period_total']
+            day_ranges = [(start_date, first_month), (end_month, end)]
+        else:
+            day_ranges = [(start_date, end)]
+
+        for first_day, day_end in day_ranges:
+            if first_day >= day_end:
+                continue
+            daily = CourseDailyStats.objects \
+                .filter(day__gte=first_day, day__lt=day_end, **filters) \
+                .annotate(month=TruncMonth('day')) \
+                .order_by() \
+                .values('month', *fields) \
+                .annotate(period_total=Sum('total'))
+            for row in daily:
+                totals[(to_date(row['month']),) + tuple(row[field] for field in fields)] += row['period_total']
+
+        return [dict(zip(fields, key[1:]), month=key[0], year=key[0].replace(month=1), total=total)
+                for key, total in sorted(totals.items(),
+                                         key=lambda item: tuple('' if value is None else str(value)
+                                                                for value in item[0]))]
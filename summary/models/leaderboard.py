@@ -0,0 +1,346 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.db.models import F, Max, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch.dispatcher import receiver
+from django.utils.translation import gettext_lazy as _
+
+from oppia.models import Cohort, Course, CourseCohort, Participant
+from settings.models import SettingProperties
+from summary.models.user_course_summary import UserCourseSummary
+from summary.models.user_points_summary import UserPointsSummary
+
+
+class RankedUsers:
+    '''
+    The users in a ranked leaderboard table (ranks 1 to n), as a sequence
+    that can be paginated. Slices are read by rank rather than with an
+    offset, and each user has the total and badges of their position.
+    '''
+
+    def __init__(self, positions):
+        self.positions = positions
+
+    def count(self):
+        return self.positions.aggregate(total=Max('rank'))['total'] or 0
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        positions = self.positions.filter(rank__gt=index.start or 0)
+        if index.stop is not None:
+            positions = positions.filter(rank__lte=index.stop)
+        return [position.get_user() for position in positions.select_related('user').order_by('rank')]
+
+    def __iter__(self):
+        return iter(self[0:])
+
+
+class LeaderboardPosition(models.Model):
+    rank = models.IntegerField(blank=False, null=False)
+    points = models.IntegerField(blank=False, null=False, default=0)
+    badges = models.IntegerField(blank=False, null=False, default=0)
+
+    class Meta:
+        abstract = True
+
+    def get_user(self):
+        user = self.user
+        user.total = self.points
+        user.badges = self.badges
+        return user
+
+
+class Leaderboard(LeaderboardPosition):
+    '''
+    The users ranked by their UserPointsSummary, with the fields shown on the
+    leaderboard, so any range of positions can be read with a single query on
+    the rank.
+    '''
+    rank = models.IntegerField(blank=False, null=False, db_index=True)
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    username = models.CharField(max_length=150)
+    first_name = models.CharField(max_length=150, blank=True)
+    last_name = models.CharField(max_length=150, blank=True)
+
+    # same order as the leaderboard has always had, the summary id breaks the ties
+    SUMMARY_ORDERING = ('-points', 'id')
+    STALE_KEY = 'oppia_leaderboard_stale'
+    BULK_BATCH_SIZE = 500
+
+    class Meta:
+        verbose_name = _(u'Leaderboard')
+        verbose_name_plural = _(u'Leaderboard')
+
+    def to_dict(self):
+        return {'position': self.rank,
+                'username': self.username,
+                'first_name': self.first_name,
+                'last_name': self.last_name,
+                'points': self.points,
+                'badges': self.badges}
+
+    @staticmethod
+    def from_summaries(summaries, first_rank):
+        return [Leaderboard(rank=first_rank + idx,
+                            user_id=summary.user_id,
+                            username=summary.user.username,
+                            first_name=summary.user.first_name,
+                            last_name=summary.user.last_name,
+                            points=summary.points,
+                            badges=summary.badges)
+                for idx, summary in enumerate(summaries)]
+
+    @staticmethod
+    def get_summary_rank(summary):
+        return UserPointsSummary.objects \
+            .filter(Q(points__gt=summary.points) | Q(points=summary.points, id__lt=summary.id)) \
+            .count() + 1
+
+    @staticmethod
+    def rebuild():
+        summaries = UserPointsSummary.objects.select_related('user').order_by(*Leaderboard.SUMMARY_ORDERING)
+        with transaction.atomic():
+            Leaderboard.objects.all().delete()
+            Leaderboard.objects.bulk_create(Leaderboard.from_summaries(summaries, 1),
+                                            batch_size=Leaderboard.BULK_BATCH_SIZE)
+            SettingProperties.objects.filter(key=Leaderboard.STALE_KEY).delete()
+
+    @staticmethod
+    def update_users(user_ids):
+        '''
+        Moves the given users to their position for their current points
+        summary. Only the ranks between their old and new positions change,
+        so only that range is rewritten (up to the end of the leaderboard if
+        users are added or removed).
+        '''
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+
+        with transaction.atomic():
+            old_ranks = list(Leaderboard.objects.filter(user__in=user_ids).values_list('rank', flat=True))
+            summaries = sorted(UserPointsSummary.objects.filter(user__in=user_ids).only('id', 'points'),
+                               key=lambda summary: (-summary.points, summary.id))
+            ranks = list(old_ranks)
+            if not ranks and not summaries:
+                return
+            if summaries:
+                ranks.append(Leaderboard.get_summary_rank(summaries[0]))
+                ranks.append(Leaderboard.get_summary_rank(summaries[-1]))
+            first_rank = min(ranks)
+            last_rank = max(ranks) if len(old_ranks) == len(summaries) else None
+
+            changed = Leaderboard.objects.filter(rank__gte=first_rank)
+            window = UserPointsSummary.objects.select_related('user').order_by(*Leaderboard.SUMMARY_ORDERING)
+            if last_rank is None:
+                window = window[first_rank - 1:]
+            else:
+                changed = changed.filter(rank__lte=last_rank)
+                window = window[first_rank - 1:last_rank]
+
+            changed.delete()
+            Leaderboard.objects.filter(user__in=user_ids).delete()
+            Leaderboard.objects.bulk_create(Leaderboard.from_summaries(window, first_rank),
+                                            batch_size=Leaderboard.BULK_BATCH_SIZE)
+
+    @staticmethod
+    def remove_user(user_id):
+        rank = Leaderboard.objects.filter(user_id=user_id).values_list('rank', flat=True).first()
+        if rank is None:
+            return
+        Leaderboard.objects.filter(user_id=user_id).delete()
+        Leaderboard.objects.filter(rank__gt=rank).update(rank=F('rank') - 1)
+
+    @staticmethod
+    def refresh_if_stale():
+        # summaries loaded without the model being saved (e.g. fixtures) mark the leaderboard as stale
+        if SettingProperties.get_bool(Leaderboard.STALE_KEY, False):
+            Leaderboard.rebuild()
+
+    @staticmethod
+    def get_total():
+        return Leaderboard.objects.aggregate(total=Max('rank'))['total'] or 0
+
+
+class CourseLeaderboard(LeaderboardPosition):
+    '''
+    The users of each course ranked by their UserCourseSummary points
+    '''
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    STALE_KEY = 'oppia_course_leaderboards_stale'
+
+    class Meta:
+        verbose_name = _(u'CourseLeaderboard')
+        verbose_name_plural = _(u'CourseLeaderboards')
+        indexes = [
+            models.Index(fields=['course', 'rank']),
+        ]
+
+    @staticmethod
+    def update_courses(course_ids):
+        course_ids = set(course_ids)
+        summaries = UserCourseSummary.objects.filter(course__in=course_ids) \
+            .order_by('course', '-points', 'id') \
+            .values_list('course', 'user', 'points', 'badges_achieved')
+
+        positions = []
+        ranks = {}
+        for course_id, user_id, points, badges in summaries:
+            ranks[course_id] = ranks.get(course_id, 0) + 1
+            positions.append(CourseLeaderboard(course_id=course_id,
+                                               user_id=user_id,
+                                               rank=ranks[course_id],
+                                               points=points,
+                                               badges=badges))
+
+        with transaction.atomic():
+            CourseLeaderboard.objects.filter(course__in=course_ids).delete()
+            CourseLeaderboard.objects.bulk_create(positions, batch_size=Leaderboard.BULK_BATCH_SIZE)
+
+        # the cohort leaderboards add up the points of their courses
+        CohortLeaderboard.update_cohorts(CourseCohort.objects
+                                         .filter(course__in=course_ids)
+                                         .values_list('cohort', flat=True)
+                                         .distinct())
+
+    @staticmethod
+    def rebuild():
+        with transaction.atomic():
+            CourseLeaderboard.objects.all().delete()
+            CohortLeaderboard.objects.all().delete()
+            CourseLeaderboard.update_courses(list(Course.objects.values_list('id', flat=True)))
+            SettingProperties.objects.filter(key=CourseLeaderboard.STALE_KEY).delete()
+
+    @staticmethod
+    def refresh_if_stale():
+        if SettingProperties.get_bool(CourseLeaderboard.STALE_KEY, False):
+            CourseLeaderboard.rebuild()
+
+    @staticmethod
+    def get_ranked_users(course):
+        CourseLeaderboard.refresh_if_stale()
+        return RankedUsers(CourseLeaderboard.objects.filter(course=course))
+
+
+class CohortLeaderboard(LeaderboardPosition):
+    '''
+    The students of each cohort ranked by the points they've got in the
+    cohort courses (only the ones with points)
+    '''
+    cohort = models.ForeignKey(Cohort, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        verbose_name = _(u'CohortLeaderboard')
+        verbose_name_plural = _(u'CohortLeaderboards')
+        indexes = [
+            models.Index(fields=['cohort', 'rank']),
+        ]
+
+    @staticmethod
+    def update_cohorts(cohort_ids):
+        cohort_ids = set(cohort_ids)
+        positions = []
+        for cohort_id in cohort_ids:
+            users_points = UserCourseSummary.objects \
+                .filter(course__coursecohort__cohort=cohort_id,
+                        user__participant__cohort=cohort_id,
+                        user__participant__role=Participant.STUDENT) \
+                .values('user') \
+                .annotate(total=Sum('points'), badges=Sum('badges_achieved')) \
+                .filter(total__gt=0) \
+                .order_by('-total', 'user')
+            positions += [CohortLeaderboard(cohort_id=cohort_id,
+                                            user_id=user_points['user'],
+                                            rank=idx + 1,
+                                            points=user_points['total'],
+                                            badges=user_points['badges'] or 0)
+                          for idx, user_points in enumerate(users_points)]
+
+        with transaction.atomic():
+            CohortLeaderboard.objects.filter(cohort__in=cohort_ids).delete()
+            CohortLeaderboard.objects.bulk_create(positions, batch_size=Leaderboard.BULK_BATCH_SIZE)
+
+    @staticmethod
+    def get_ranked_users(cohort):
+        CourseLeaderboard.refresh_if_stale()
+        return RankedUsers(CohortLeaderboard.objects.filter(cohort=cohort))
+
+
+class PendingCohortUpdates(threading.local):
+    '''
+    Cohorts whose students or courses have changed in the current
+    transaction, their leaderboards are updated once it's committed
+    '''
+
+    def __init__(self):
+        self.cohort_ids = set()
+
+    def add(self, cohort_id):
+        self.cohort_ids.add(cohort_id)
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        # the first callback run after the commit updates them all
+        cohort_ids, self.cohort_ids = self.cohort_ids, set()
+        if cohort_ids:
+            CohortLeaderboard.update_cohorts(cohort_ids)
+
+
+pending_cohort_updates = PendingCohortUpdates()
+
+
+# The summary commands update the leaderboard once they've updated the points
+# summaries, the ones loaded from fixtures are ranked the next time it's read
+@receiver(post_save, sender=UserPointsSummary)
+def user_points_summary_loaded(sender, instance, raw=False, **kwargs):
+    if raw:
+        SettingProperties.set_bool(Leaderboard.STALE_KEY, True)
+
+
+@receiver(post_save, sender=User)
+def user_leaderboard_names(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw or update_fields == frozenset(['last_login']):
+        return
+    Leaderboard.objects.filter(user=instance).update(username=instance.username,
+                                                     first_name=instance.first_name,
+                                                     last_name=instance.last_name)
+
+
+@receiver(pre_delete, sender=User)
+def deleted_user_leaderboard(sender, instance, **kwargs):
+    Leaderboard.remove_user(instance.pk)
+
+
+@receiver(post_save, sender=UserCourseSummary)
+def user_course_summary_loaded(sender, instance, raw=False, **kwargs):
+    if raw:
+        SettingProperties.set_bool(CourseLeaderboard.STALE_KEY, True)
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def cohort_participant_changed(sender, instance, raw=False, **kwargs):
+    if instance.role != Participant.STUDENT:
+        return
+    if raw:
+        SettingProperties.set_bool(CourseLeaderboard.STALE_KEY, True)
+    else:
+        pending_cohort_updates.add(instance.cohort_id)
+
+
+@receiver(post_save, sender=CourseCohort)
+@receiver(post_delete, sender=CourseCohort)
+def cohort_course_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        SettingProperties.set_bool(CourseLeaderboard.STALE_KEY, True)
+    else:
+        pending_cohort_updates.add(instance.cohort_id)
@@ -0,0 +1,86 @@
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch.dispatcher import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from oppia.models import Course, Tracker, Points
+
+
+class SummaryDelta(models.Model):
+    '''
+    Change to the summary tables queued when a tracker or points are saved
+    (only if OPPIA_SUMMARY_REALTIME is enabled), to be folded into the
+    summaries by the process_summary_deltas command.
+    '''
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course,
+                               blank=True,
+                               null=True,
+                               default=None,
+                               on_delete=models.CASCADE)
+    tracker_pk = models.IntegerField(blank=True, null=True, default=None)
+    points_pk = models.IntegerField(blank=True, null=True, default=None)
+    tracker_day = models.DateField(blank=True, null=True, default=None)
+    submitted_day = models.DateField(blank=True, null=True, default=None)
+    type = models.CharField(max_length=20, null=True, blank=True, default=None)
+    count = models.IntegerField(blank=False, null=False, default=0)
+    time_taken = models.IntegerField(blank=False, null=False, default=0)
+    points = models.IntegerField(blank=False, null=False, default=0)
+    created_date = models.DateTimeField('date created', default=timezone.now)
+
+    class Meta:
+        verbose_name = _(u'SummaryDelta')
+        verbose_name_plural = _(u'SummaryDeltas')
+
+    @staticmethod
+    def to_day(date):
+        # same conversion as the summary tables do for their day fields
+        return models.DateField().to_python(date)
+
+    @staticmethod
+    def from_tracker(tracker):
+        return SummaryDelta(user_id=tracker.user_id,
+                            course_id=tracker.course_id,
+                            tracker_pk=tracker.pk,
+                            tracker_day=SummaryDelta.to_day(tracker.tracker_date),
+                            submitted_day=SummaryDelta.to_day(tracker.submitted_date),
+                            type=tracker.type,
+                            count=1,
+                            time_taken=tracker.time_taken or 0)
+
+    @staticmethod
+    def from_points(points):
+        return SummaryDelta(user_id=points.user_id,
+                            course_id=points.course_id,
+                            points_pk=points.pk,
+                            type=points.type,
+                            points=points.points)
+
+    @staticmethod
+    def queue_bulk(trackers=(), points=()):
+        '''
+        For trackers and points saved with bulk_create, which doesn't send
+        post_save. Objects without a pk (bulk_create on MySQL doesn't set
+        them) are picked up when the deltas are processed.
+        '''
+        if not settings.OPPIA_SUMMARY_REALTIME:
+            return
+        deltas = [SummaryDelta.from_tracker(tracker) for tracker in trackers if tracker.pk is not None]
+        deltas += [SummaryDelta.from_points(p) for p in points if p.pk is not None]
+        SummaryDelta.objects.bulk_create(deltas)
+
+
+@receiver(post_save, sender=Tracker)
+def tracker_summary_delta(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and settings.OPPIA_SUMMARY_REALTIME:
+        SummaryDelta.from_tracker(instance).save()
+
+
+@receiver(post_save, sender=Points)
+def points_summary_delta(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and settings.OPPIA_SUMMARY_REALTIME:
+        SummaryDelta.from_points(instance).save()
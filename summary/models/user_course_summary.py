@@ -1,10 +1,11 @@
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models import Sum, Count, QuerySet, Q
+from django.db.models import Sum, Count, QuerySet, Q, Max, F
 from django.utils.translation import gettext_lazy as _
 
 from oppia import constants
-from oppia.models import Course, Tracker, Points, Award, Activity
+from oppia.models import Course, Tracker, Points, Award, Activity, Media
+from quiz.models import Quiz, QuizAttempt, QuizProps
 
 
 class UserCourseSummaryQS(QuerySet):
@@ -57,6 +58,18 @@ class UserCourseSummary (models.Model):
 
     objects = UserCourseSummaryQS.as_manager()
 
+    SUMMARY_FIELDS = ['points',
+                      'total_downloads',
+                      'total_activity',
+                      'quizzes_passed',
+                      'badges_achieved',
+                      'pretest_score',
+                      'media_viewed',
+                      'completed_activities',
+                      'total_activity_current',
+                      'total_activity_previous']
+    BULK_BATCH_SIZE = 500
+
     class Meta:
         verbose_name = _(u'UserCourseSummary')
         verbose_name_plural = _(u'UserCourseSummaries')
@@ -133,6 +146,168 @@ class UserCourseSummary (models.Model):
         # update total_activity_current and total_activity_previous
         self.update_current_previous_activity()
 
+    @staticmethod
+    def update_summaries(last_tracker_pk=0, newest_tracker_pk=0,
+                         last_points_pk=0, newest_points_pk=0,
+                         courses=None):
+        '''
+        Set-based equivalent of update_summary for every user/course pair
+        with new (non-download) activity in the tracker range, optionally
+        limited to some courses. The number of queries depends on the number
+        of courses involved, not on the number of user/course pairs.
+        Returns the number of summaries written.
+        '''
+        new_trackers = Tracker.objects \
+            .filter(pk__gt=last_tracker_pk, pk__lte=newest_tracker_pk) \
+            .exclude(course__isnull=True)
+        if courses is not None:
+            new_trackers = new_trackers.filter(course__in=courses)
+
+        course_ids = new_trackers \
+            .exclude(type=constants.STR_TRACKER_TYPE_DOWNLOAD) \
+            .values_list('course', flat=True) \
+            .distinct()
+
+        points_filters = {'pk__gt': last_points_pk}
+        if newest_points_pk > 0:
+            points_filters['pk__lte'] = newest_points_pk
+
+        total = 0
+        for course in Course.objects.filter(pk__in=list(course_ids)):
+            total += UserCourseSummary.update_course_summaries(
+                course,
+                new_trackers.filter(course=course),
+                points_filters,
+                first_tracker=(last_tracker_pk == 0),
+                first_points=(last_points_pk == 0))
+        return total
+
+    @staticmethod
+    def update_course_summaries(course,
+                                course_trackers,
+                                points_filters,
+                                first_tracker=False,
+                                first_points=False):
+        download = constants.STR_TRACKER_TYPE_DOWNLOAD
+
+        tracker_counts = course_trackers.values('user').annotate(
+            total_activity=Count('id', filter=~Q(type=download)),
+            total_downloads=Count('id', filter=Q(type=download)))
+        user_totals = {row['user']: row for row in tracker_counts
+                       if row['total_activity'] > 0}
+        if not user_totals:
+            return 0
+
+        # subquery of the users to update, avoids passing long lists of ids
+        users = course_trackers.exclude(type=download).values('user')
+
+        new_points = UserCourseSummary.group_by_user(
+            Points.objects.filter(course=course, user__in=users, **points_filters),
+            Sum('points'))
+        for user_id, totals in user_totals.items():
+            totals['points'] = new_points.get(user_id)
+
+        return UserCourseSummary.add_to_course_summaries(course, users, user_totals, first_tracker, first_points)
+
+    @staticmethod
+    def add_to_course_summaries(course, users, user_totals, first_tracker=False, first_points=False):
+        '''
+        Adds the new activity, downloads and points in user_totals (a dict
+        by user id) to the summaries of the course, and recalculates the
+        rest of the values for those users. users can be a list of ids or a
+        subquery.
+        '''
+        quiz_digests = Activity.objects.filter(section__course=course,
+                                               baseline=False,
+                                               type=Activity.QUIZ).values_list('digest')
+        quizzes = Quiz.objects.filter(quizprops__value__in=quiz_digests,
+                                      quizprops__name=QuizProps.DIGEST)
+        quizzes_passed = UserCourseSummary.group_by_user(
+            QuizAttempt.objects.filter(quiz__in=quizzes, user__in=users)
+            .annotate(percent=F('score')/F('maxscore'))
+            .filter(percent__gte=0.75),
+            Count('quiz', distinct=True))
+
+        activity_digests = Activity.objects.filter(section__course=course,
+                                                   baseline=False).values_list('digest')
+        completed_activities = UserCourseSummary.group_by_user(
+            Tracker.objects.filter(course=course, user__in=users, completed=True, digest__in=activity_digests),
+            Count('digest', distinct=True))
+
+        media_digests = Media.objects.filter(course=course).values_list('digest')
+        media_viewed = UserCourseSummary.group_by_user(
+            Tracker.objects.filter(course=course, user__in=users, completed=True, digest__in=media_digests),
+            Count('digest', distinct=True))
+
+        badges = UserCourseSummary.group_by_user(
+            Award.objects.filter(user__in=users, awardcourse__course=course),
+            Count('id'))
+
+        current_digests = Activity.objects.filter(section__course=course).values_list('digest')
+        current_activity = UserCourseSummary.group_by_user(
+            Tracker.objects.filter(course=course, user__in=users, digest__in=current_digests),
+            Count('id'))
+
+        pretest_scores = UserCourseSummary.get_pre_test_scores(course, users)
+
+        existing = {summary.user_id: summary for summary in
+                    UserCourseSummary.objects.filter(course=course, user__in=users)}
+
+        new_summaries = []
+        for user_id, totals in user_totals.items():
+            summary = existing.get(user_id)
+            if summary is None:
+                summary = UserCourseSummary(user_id=user_id, course=course)
+                new_summaries.append(summary)
+
+            summary.total_activity = (0 if first_tracker else summary.total_activity) + totals['total_activity']
+            summary.total_downloads = (0 if first_tracker else summary.total_downloads) + totals['total_downloads']
+            if totals['points']:
+                summary.points = (0 if first_points else summary.points) + totals['points']
+
+            summary.pretest_score = pretest_scores.get(user_id)
+            summary.quizzes_passed = quizzes_passed.get(user_id, 0)
+            summary.completed_activities = completed_activities.get(user_id, 0)
+            summary.media_viewed = media_viewed.get(user_id, 0)
+            summary.badges_achieved = badges.get(user_id, 0)
+            summary.total_activity_current = current_activity.get(user_id, 0)
+            summary.total_activity_previous = summary.total_activity - summary.total_activity_current
+
+        # rows created by a concurrent run are updated rather than duplicated
+        UserCourseSummary.objects.bulk_create(new_summaries,
+                                              batch_size=UserCourseSummary.BULK_BATCH_SIZE,
+                                              update_conflicts=True,
+                                              unique_fields=['user', 'course'],
+                                              update_fields=UserCourseSummary.SUMMARY_FIELDS)
+        UserCourseSummary.objects.bulk_update(existing.values(),
+                                              UserCourseSummary.SUMMARY_FIELDS,
+                                              batch_size=UserCourseSummary.BULK_BATCH_SIZE)
+        return len(user_totals)
+
+    @staticmethod
+    def group_by_user(queryset, aggregate):
+        return {row['user']: row['total'] for row in queryset.values('user').annotate(total=aggregate)}
+
+    @staticmethod
+    def get_pre_test_scores(course, users):
+        # Same calculation as Course.get_pre_test_score, for a set of users
+        try:
+            baseline = Activity.objects.get(section__course=course,
+                                            type=Activity.QUIZ,
+                                            section__order=0)
+        except Activity.DoesNotExist:
+            return {}
+
+        attempts = QuizAttempt.objects \
+            .filter(quiz__quizprops__value=baseline.digest,
+                    quiz__quizprops__name=QuizProps.DIGEST,
+                    user__in=users) \
+            .values('user') \
+            .annotate(max_score=Max('score'), maxscore=Max('maxscore'))
+
+        return {attempt['user']: 100 * float(attempt['max_score']) / float(attempt['maxscore'])
+                for attempt in attempts}
+
     def update_current_previous_activity(self):
         # get the current activity digests
         # note: can't base only on the latest set of trackers since the values
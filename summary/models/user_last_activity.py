@@ -0,0 +1,80 @@
+import bisect
+
+from django.contrib.auth.models import User
+from django.db import models, transaction
+from django.db.models import Count, Max
+from django.utils.translation import gettext_lazy as _
+
+from oppia.utils.date_series import to_date
+from summary.models.user_course_daily_summary import UserCourseDailySummary
+
+
+class UserLastActivity(models.Model):
+    '''
+    The last day each user has any UserCourseDailySummary, so the users
+    active since any day can be counted without going through the daily
+    summaries. Recalculated for the users with new trackers each time the
+    summaries are updated.
+    '''
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    last_active = models.DateField(blank=False, null=False, db_index=True)
+
+    BULK_BATCH_SIZE = 500
+
+    class Meta:
+        verbose_name = _(u'UserLastActivity')
+        verbose_name_plural = _(u'UserLastActivities')
+
+    @staticmethod
+    def recalculate(activities, summaries):
+        activities.delete()
+        last_days = summaries.order_by() \
+            .values('user') \
+            .annotate(last_active=Max('day'))
+        new_activities = []
+        for row in last_days.iterator():
+            new_activities.append(UserLastActivity(user_id=row['user'], last_active=row['last_active']))
+            if len(new_activities) >= UserLastActivity.BULK_BATCH_SIZE:
+                UserLastActivity.objects.bulk_create(new_activities)
+                new_activities = []
+        UserLastActivity.objects.bulk_create(new_activities)
+
+    @staticmethod
+    def update_users(user_ids=None):
+        '''
+        Recalculates the last active day of the users from their daily
+        summaries (of all of them if there are no users given)
+        '''
+        with transaction.atomic():
+            if user_ids is None:
+                UserLastActivity.recalculate(UserLastActivity.objects.all(), UserCourseDailySummary.objects.all())
+                return
+            user_ids = sorted(set(user_ids))
+            for idx in range(0, len(user_ids), UserLastActivity.BULK_BATCH_SIZE):
+                batch = user_ids[idx:idx + UserLastActivity.BULK_BATCH_SIZE]
+                UserLastActivity.recalculate(UserLastActivity.objects.filter(user__in=batch),
+                                             UserCourseDailySummary.objects.filter(user__in=batch))
+
+    @staticmethod
+    def rebuild():
+        UserLastActivity.update_users()
+
+    @staticmethod
+    def get_active_counts(days, excluded_users=()):
+        '''
+        Returns (total, counts): the number of users with any activity, and
+        for each of the days the number of them active on or after it, from
+        one query counting the users by their last active day
+        '''
+        histogram = list(UserLastActivity.objects
+                         .exclude(user__in=excluded_users)
+                         .values('last_active')
+                         .annotate(users=Count('id'))
+                         .order_by('last_active')
+                         .values_list('last_active', 'users'))
+        last_days = [last_active for last_active, users in histogram]
+        # active_since[idx] is the number of users last active on or after last_days[idx]
+        active_since = [0] * (len(histogram) + 1)
+        for idx in range(len(histogram) - 1, -1, -1):
+            active_since[idx] = active_since[idx + 1] + histogram[idx][1]
+        return active_since[0], [active_since[bisect.bisect_left(last_days, to_date(day))] for day in days]
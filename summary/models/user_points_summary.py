@@ -16,6 +16,10 @@ class UserPointsSummary(models.Model):
     class Meta:
         verbose_name = _(u'UserPointsSummary')
         verbose_name_plural = _(u'UserPointsSummaries')
+        # for ranking the leaderboard
+        indexes = [
+            models.Index(fields=['-points', 'id']),
+        ]
 
     def update_points(self, last_points_pk=0, newest_points_pk=0):
         # range of points ids to process
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+
+class SummaryAccumulator:
+    '''
+    Collects increments for the rows of a summary table in memory, keyed by
+    the fields that identify a summary row, and applies them in chunks: the
+    existing rows for the chunk are read with a single query and updated
+    with bulk_update, the missing ones are inserted with bulk_create.
+    '''
+
+    def __init__(self, model, key_fields, chunk_size=5000, batch_size=500, check_existing=True):
+        self.model = model
+        self.key_fields = key_fields
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        # if the summary table has just been emptied there's no need to look for existing rows
+        self.check_existing = check_existing
+        self.deltas = {}
+
+    def add(self, key, **totals):
+        key = tuple(self.model._meta.get_field(field).to_python(value)
+                    for field, value in zip(self.key_fields, key))
+        row_totals = self.deltas.setdefault(key, {})
+        for field, value in totals.items():
+            row_totals[field] = row_totals.get(field, 0) + (value or 0)
+
+        if len(self.deltas) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.deltas:
+            return 0
+
+        existing = self.get_existing_rows() if self.check_existing else {}
+
+        new_rows = []
+        updated_rows = []
+        for key, totals in self.deltas.items():
+            row = existing.get(key)
+            if row is None:
+                row = self.model(**dict(zip(self.key_fields, key)))
+                new_rows.append(row)
+            else:
+                updated_rows.append(row)
+            for field, value in totals.items():
+                setattr(row, field, getattr(row, field) + value)
+
+        self.model.objects.bulk_create(new_rows, batch_size=self.batch_size)
+        if updated_rows:
+            total_fields = set().union(*self.deltas.values())
+            self.model.objects.bulk_update(updated_rows, total_fields, batch_size=self.batch_size)
+
+        processed = len(self.deltas)
+        self.deltas = {}
+        return processed
+
+    def get_existing_rows(self):
+        # Superset of the rows in the chunk, the exact rows are matched by key afterwards
+        filters = Q()
+        for idx, field in enumerate(self.key_fields):
+            values = {key[idx] for key in self.deltas}
+            field_filter = Q(**{field + '__in': values - {None}})
+            if None in values:
+                field_filter |= Q(**{field + '__isnull': True})
+            filters &= field_filter
+
+        return {tuple(getattr(row, field) for field in self.key_fields): row
+                for row in self.model.objects.filter(filters)}
+
+
+class StagingTables:
+    '''
+    Empty copies of a set of summary tables, so the summaries can be
+    rebuilt while the current ones are still being read, and then replace
+    them all at once.
+    '''
+
+    SUFFIX = 'staging'
+
+    def __init__(self, models):
+        self.models = models
+        self.tables = {model: '{}_{}'.format(model._meta.db_table, self.SUFFIX) for model in models}
+        self.active = False
+
+    @contextmanager
+    def use(self):
+        '''
+        Points the models to the staging tables until the block ends. This
+        changes the table name in the models' _meta (and drops the column
+        expressions Django caches with it), so every query on them made by
+        the current process goes to the staging tables meanwhile: it's only
+        used by the rebuild workers and around the steps of the rebuild
+        command that write to the staging tables.
+        '''
+        if self.active:
+            raise RuntimeError('The staging tables are already in use')
+        live_tables = {model: model._meta.db_table for model in self.models}
+        self.active = True
+        for model, table in self.tables.items():
+            self.set_db_table(model, table)
+        try:
+            yield
+        finally:
+            for model, table in live_tables.items():
+                self.set_db_table(model, table)
+            self.active = False
+
+    @staticmethod
+    def set_db_table(model, table):
+        model._meta.db_table = table
+        # the fields cache the column expression, which includes the table name
+        for field in model._meta.concrete_fields:
+            field.__dict__.pop('cached_col', None)
+
+    def create(self):
+        self.drop()
+        with self.use(), connection.schema_editor() as editor:
+            for model in self.models:
+                # named indexes are unique across the database, so the staging tables are created without
+                # them. They don't need them either: promote copies their rows into the live tables, which
+                # keep their own indexes
+                indexes = model._meta.indexes
+                model._meta.indexes = []
+                try:
+                    editor.create_model(model)
+                finally:
+                    model._meta.indexes = indexes
+
+    def drop(self):
+        existing_tables = connection.introspection.table_names()
+        with connection.schema_editor() as editor:
+            for table in self.tables.values():
+                if table in existing_tables:
+                    editor.execute(editor.sql_delete_table % {'table': editor.quote_name(table)})
+
+    def promote(self):
+        '''
+        Replaces the contents of the live tables with the staging ones in a
+        single transaction, so the summaries are never seen half rebuilt. The
+        live tables are kept (rather than renamed) as the reports database
+        views depend on them.
+        '''
+        quote_name = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model, table in self.tables.items():
+                columns = ', '.join(quote_name(field.column)
+                                    for field in model._meta.concrete_fields if not field.primary_key)
+                model.objects.all().delete()
+                cursor.execute('INSERT INTO {} ({}) SELECT {} FROM {}'.format(
+                    quote_name(model._meta.db_table), columns, columns, quote_name(table)))
+        self.drop()
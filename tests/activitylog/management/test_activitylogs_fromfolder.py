@@ -1,4 +1,6 @@
+import json
 import os
+import tempfile
 
 from django.core.management import call_command
 from django.core.management.base import CommandError
@@ -6,6 +8,8 @@ from django.conf import settings
 
 from io import StringIO
 
+from activitylog.management.commands.activitylogs_fromfolder import group_files_by_user
+
 from oppia.models import Tracker
 from oppia.test import OppiaTestCase
 
@@ -78,3 +82,55 @@ class ActivityLogsFromFolderTest(OppiaTestCase):
 
         qa_count_end = QuizAttempt.objects.all().count()
         self.assertEqual(qa_count_start+1, qa_count_end)
+
+    def test_workers_invalid(self):
+        with self.assertRaises(CommandError):
+            call_command('activitylogs_fromfolder', self.activity_logs_folder, workers=0, stdout=StringIO())
+
+    def test_report(self):
+        out = StringIO()
+        tracker_count_start = Tracker.objects.all().count()
+        with tempfile.TemporaryDirectory() as report_dir:
+            report_path = os.path.join(report_dir, 'report.json')
+            call_command('activitylogs_fromfolder',
+                         self.activity_logs_folder,
+                         report=report_path,
+                         stdout=out)
+            with open(report_path) as report_file:
+                report = json.load(report_file)
+
+        totals = report['totals']
+        self.assertEqual(len(report['files']), totals['files'])
+        self.assertEqual(totals['files'], totals['succeeded'] + totals['failed'])
+        self.assertEqual(Tracker.objects.all().count() - tracker_count_start, totals['trackers'])
+        self.assertEqual(1, totals['quizresponses'])
+        self.assertIn('trackers: %d' % totals['trackers'], out.getvalue())
+
+        files = {os.path.basename(file['file']): file for file in report['files']}
+        self.assertTrue(files['basic_activity.json']['success'])
+        self.assertEqual(1, files['basic_activity.json']['users'])
+        self.assertFalse(files['wrong_format.json']['success'])
+        self.assertEqual(['Missing server'], files['wrong_format.json']['errors'])
+        for file in report['files']:
+            self.assertGreaterEqual(file['time_taken'], 0)
+
+    def test_group_files_by_user(self):
+        users = {'a.json': ['demo', 'admin'],
+                 'b.json': ['teacher'],
+                 'c.json': ['admin', 'staff'],
+                 'd.json': ['staff'],
+                 'e.json': []}
+        with tempfile.TemporaryDirectory() as log_dir:
+            filenames = []
+            for name, usernames in sorted(users.items()):
+                filename = os.path.join(log_dir, name)
+                with open(filename, 'w') as log_file:
+                    json.dump({'server': 'http://localhost',
+                               'users': [{'username': username, 'trackers': []} for username in usernames]},
+                              log_file)
+                filenames.append(filename)
+            filenames.append(os.path.join(self.activity_logs_folder, 'wrong_format.json'))
+
+            groups = [[os.path.basename(filename) for filename in group] for group in group_files_by_user(filenames)]
+
+        self.assertEqual([['a.json', 'c.json', 'd.json'], ['b.json'], ['e.json'], ['wrong_format.json']], groups)
@@ -1,8 +1,14 @@
+import io
+import json
 import os
 
+from collections import Counter
+from unittest import mock
+
 from oppia.test import OppiaTestCase
 
 from django.contrib.auth.models import User
+from django.db import DatabaseError
 from django.urls import reverse
 from django.conf import settings
 
@@ -10,6 +16,11 @@ from oppia.models import Tracker
 from profile.models import UserProfile, UserProfileCustomField, CustomField
 from quiz.models import QuizAttemptResponse, QuizAttempt
 from activitylog.forms import UploadActivityLogForm
+from activitylog.models import ActivityLogCheckpoint
+from activitylog.views import process_activitylog, process_activitylog_file
+from api.resources.tracker import TrackerResource
+from helpers.messages import MessagesDelegate
+
 
 class UploadActivityLogTest(OppiaTestCase):
 
@@ -321,6 +332,26 @@ class UploadActivityLogTest(OppiaTestCase):
         self.assertEqual(qa_count_start + 1, qa_count_end)
         self.assertEqual(qar_count_start + 7, qar_count_end)
 
+    def test_quizattempts_report(self):
+        with open(self.quiz_attempt_log, 'rb') as activity_log_quiz_file:
+            contents = activity_log_quiz_file.read()
+        report = Counter()
+        process_activitylog(MessagesDelegate(), contents)
+        process_activitylog_file(MessagesDelegate(), io.BytesIO(contents), report)
+        self.assertEqual(1, report['quizresponse_duplicates'])
+        self.assertEqual(0, report['quizresponse_errors'])
+
+        # a new attempt that isn't valid isn't counted as already uploaded
+        activity_log = json.loads(contents)
+        quiz_response = activity_log['users'][0]['quizresponses'][0]
+        quiz_response['instance_id'] = 'not-valid-' + quiz_response['instance_id']
+        quiz_response['responses'] = 5
+        report = Counter()
+        process_activitylog_file(MessagesDelegate(), io.BytesIO(json.dumps(activity_log).encode()), report)
+        self.assertEqual(0, report['quizresponses'])
+        self.assertEqual(0, report['quizresponse_duplicates'])
+        self.assertEqual(1, report['quizresponse_errors'])
+
     def test_file_with_emojis2(self):
         tracker_count_start = Tracker.objects.all().count()
 
@@ -339,3 +370,35 @@ class UploadActivityLogTest(OppiaTestCase):
 
         tracker_count_end = Tracker.objects.all().count()
         self.assertEqual(tracker_count_start+2, tracker_count_end)
+
+    @mock.patch('activitylog.views.BATCH_SIZE', 1)
+    def test_resume_after_failure(self):
+        tracker_count_start = Tracker.objects.all().count()
+
+        save_trackers = TrackerResource.save_trackers
+        batches = []
+
+        def fail_second_batch(trackers):
+            batches.append(trackers)
+            if len(batches) == 2:
+                raise DatabaseError('Lost connection')
+            save_trackers(trackers)
+
+        with mock.patch.object(TrackerResource, 'save_trackers', side_effect=fail_second_batch):
+            with open(self.basic_activity_log, 'rb') as activity_log_file:
+                with self.assertRaises(DatabaseError):
+                    process_activitylog_file(MessagesDelegate(), activity_log_file)
+
+        self.assertEqual(tracker_count_start + 1, Tracker.objects.all().count())
+        checkpoint = ActivityLogCheckpoint.objects.get()
+        self.assertEqual(0, checkpoint.users_done)
+        self.assertEqual(1, checkpoint.trackers_done)
+
+        # processing the file again only saves the tracker that failed
+        with mock.patch.object(TrackerResource, 'save_trackers', side_effect=save_trackers) as resumed:
+            with open(self.basic_activity_log, 'rb') as activity_log_file:
+                success, errors = process_activitylog_file(MessagesDelegate(), activity_log_file)
+        self.assertTrue(success)
+        self.assertEqual(1, resumed.call_count)
+        self.assertEqual(tracker_count_start + 2, Tracker.objects.all().count())
+        self.assertFalse(ActivityLogCheckpoint.objects.exists())
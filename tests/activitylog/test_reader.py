@@ -0,0 +1,46 @@
+import io
+import json
+import os
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from activitylog.reader import ActivityLogReader, read_activitylog
+
+
+class ActivityLogReaderTest(SimpleTestCase):
+
+    activity_logs_folder = os.path.join(settings.TEST_RESOURCES, 'activity_logs')
+
+    def read(self, text):
+        header, users = read_activitylog(io.StringIO(text))
+        return header, None if users is None else list(users)
+
+    def test_same_as_json(self):
+        # a small read size so the users are read across several chunks
+        ActivityLogReader.READ_SIZE = 16
+        self.addCleanup(setattr, ActivityLogReader, 'READ_SIZE', 64 * 1024)
+        for filename in ['basic_activity.json', 'multiple_users.json', 'quiz_attempts.json']:
+            with open(os.path.join(self.activity_logs_folder, filename), encoding='utf-8') as activity_log_file:
+                text = activity_log_file.read()
+            json_data = json.loads(text)
+            header, users = self.read(text)
+            self.assertEqual(json_data.pop('users'), users)
+            self.assertEqual(json_data, header)
+
+    def test_server_after_users(self):
+        header, users = self.read('{"users": [{"username": "demo"}, {"username": "admin"}], '
+                                  '"export_date": 12345, "server": "http://testserver"}')
+        self.assertEqual({'export_date': 12345, 'server': 'http://testserver'}, header)
+        self.assertEqual([{'username': 'demo'}, {'username': 'admin'}], users)
+
+    def test_no_users(self):
+        self.assertEqual(({'server': 'http://testserver'}, None), self.read('{"server": "http://testserver"}'))
+        self.assertEqual(({}, None), self.read('{}'))
+
+    def test_not_an_object(self):
+        self.assertEqual(({}, None), self.read('[{"server": "http://testserver"}]'))
+
+    def test_invalid_json(self):
+        with self.assertRaises(json.JSONDecodeError):
+            self.read('{"server": "http://testserver", "users": [{"username": "demo"}')
@@ -1,8 +1,10 @@
+from unittest import mock
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from tastypie.test import ResourceTestCaseMixin
 
+from oppia.course_index import course_index, CourseIndexData
 from oppia.models import CourseStatus, CoursePermissions, Course, Cohort, CourseCohort, Participant, Category
 from tests.utils import get_api_key, get_api_url, update_course_status
 
@@ -523,3 +525,53 @@ class CategoryResourceTest(ResourceTestCaseMixin, TestCase):
         self.assertValidJSON(resp.content)
         response_data = self.deserialize(resp)
         self.assertEqual(len(response_data['courses']), 0)
+
+    @override_settings(OPPIA_COURSE_INDEX_CACHE_TIMEOUT=300)
+    def test_category_list_cached(self):
+        course_index.invalidate()
+        with mock.patch('oppia.course_index.CourseIndexData', wraps=CourseIndexData) as index_data:
+            resp = self.api_client.get(self.url, format='json', data=self.user_auth)
+            tags = self.assert_valid_response_and_get_tags(resp)
+            resp = self.api_client.get(self.url, format='json', data=self.user_auth)
+            self.assertEqual(tags, self.assert_valid_response_and_get_tags(resp))
+            self.assertEqual(1, index_data.call_count)
+
+            # reloaded once the courses are restricted to a cohort, and then
+            # once the user is added to it
+            cohort = self.setup_cohort()
+            resp = self.api_client.get(self.url, format='json', data=self.user_auth)
+            tags = self.assert_valid_response_and_get_tags(resp)
+            self.assertEqual(len(tags), 2)
+            self.assertEqual(self.get_category_attr_in_results(tags, 'HEAT', 'count'), 1)
+
+            Participant.objects.create(cohort=cohort, user=self.user, role=Participant.STUDENT)
+            resp = self.api_client.get(self.url, format='json', data=self.user_auth)
+            tags = self.assert_valid_response_and_get_tags(resp)
+            self.assertEqual(len(tags), 5)
+            self.assertEqual(self.get_category_attr_in_results(tags, 'HEAT', 'count'), 2)
+            self.assertEqual(3, index_data.call_count)
+        course_index.invalidate()
+
+    @override_settings(OPPIA_COURSE_INDEX_CACHE_TIMEOUT=300, OPPIA_CACHE_VERSION_CHECK_INTERVAL=60)
+    def test_version_checked_once_per_interval(self):
+        course_index.invalidate()
+        data = course_index.get_data()
+        with mock.patch('oppia.utils.process_cache.cache') as mock_cache:
+            self.assertIs(data, course_index.get_data())
+            mock_cache.get.assert_not_called()
+        course_index.invalidate()
+
+    def test_category_list_not_modified(self):
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth)
+        self.assertHttpOK(resp)
+        etag = resp['ETag']
+
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, resp.status_code)
+        self.assertEqual(b'', resp.content)
+
+        # changed once some of the courses are restricted to a cohort
+        self.setup_cohort()
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpOK(resp)
+        self.assertNotEqual(etag, resp['ETag'])
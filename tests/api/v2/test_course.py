@@ -1,5 +1,7 @@
+import io
 import os
 import shutil
+import zipfile
 
 import xml.etree.ElementTree as ET
 
@@ -7,10 +9,12 @@ from django.conf import settings
 
 from django.contrib.auth.models import User
 from django.core.exceptions import MultipleObjectsReturned
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 from tastypie.test import ResourceTestCaseMixin
+from unittest import mock
 
 from tests.utils import get_api_key, get_api_url, update_course_status, update_course_owner
+from oppia.course_index import course_index
 from oppia.models import Tracker, Course, CourseStatus
 
 
@@ -292,7 +296,8 @@ class CourseResourceTest(ResourceTestCaseMixin, TransactionTestCase):
     def test_course_get_activity(self):
         resp = self.perform_request(1, self.user_auth, self.STR_ACTIVITY)
         self.assertHttpOK(resp)
-        xml_doc = ET.fromstring(resp.content)
+        self.assertTrue(resp.streaming)
+        xml_doc = ET.fromstring(b''.join(resp.streaming_content))
         trackers = xml_doc.findall("tracker")
         self.assertEqual(276, len(trackers))
         first_tracker = trackers[0]
@@ -613,3 +618,156 @@ class CourseResourceTest(ResourceTestCaseMixin, TransactionTestCase):
         resp = self.perform_request('anc1-all', self.user_auth)
         self.assertRaises(MultipleObjectsReturned)
         self.assertEqual(300, resp.status_code)
+
+    def test_course_list_not_modified(self):
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth)
+        self.assertHttpOK(resp)
+        etag = resp['ETag']
+
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, resp.status_code)
+        self.assertEqual(b'', resp.content)
+
+        update_course_status(1, CourseStatus.NEW_DOWNLOADS_DISABLED)
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth, HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpOK(resp)
+        self.assertNotEqual(etag, resp['ETag'])
+
+    @override_settings(OPPIA_COURSE_INDEX_CACHE_TIMEOUT=300)
+    def test_course_list_modified_with_owner(self):
+        course_index.invalidate()
+        etags = []
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth)
+        etags.append(resp['ETag'])
+
+        # the owner's name and organisation are in the course listing
+        owner = Course.objects.get(pk=1).user
+        owner.last_name = 'Other name'
+        owner.save()
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertHttpOK(resp)
+        etags.append(resp['ETag'])
+
+        owner.userprofile.organisation = 'Other organisation'
+        owner.userprofile.save()
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertHttpOK(resp)
+        etags.append(resp['ETag'])
+
+        # as when edited in the admin
+        course = Course.objects.get(pk=1)
+        course.priority = 6
+        course.save()
+        resp = self.api_client.get(self.url, format='json', data=self.user_auth, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertHttpOK(resp)
+        etags.append(resp['ETag'])
+
+        self.assertEqual(len(etags), len(set(etags)))
+        course_index.invalidate()
+
+
+class CourseDownloadTest(ResourceTestCaseMixin, TransactionTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_quiz.json',
+                'tests/test_permissions.json',
+                'default_badges.json',
+                'default_gamification_events.json',
+                'tests/test_course_permissions.json',
+                'tests/test_tracker.json']
+
+    COURSE_ID = 2
+    COURSE_FILE = 'ncd1_test_course.zip'
+    TRACKER_XML = 'ncd1-et/tracker.xml'
+
+    def setUp(self):
+        super(CourseDownloadTest, self).setUp()
+        self.user = User.objects.get(username='demo')
+        self.user_auth = {
+            'username': 'demo',
+            'api_key': get_api_key(user=self.user).key,
+        }
+        self.course_path = os.path.join(settings.COURSE_UPLOAD_DIR, self.COURSE_FILE)
+        shutil.copyfile(os.path.join(settings.TEST_RESOURCES, self.COURSE_FILE), self.course_path)
+        with zipfile.ZipFile(self.course_path) as course_zip:
+            self.course_files = course_zip.namelist()
+
+    def download(self):
+        resource_url = get_api_url('v2', 'course', self.COURSE_ID) + 'download/'
+        return self.api_client.get(resource_url, format='json', data=self.user_auth)
+
+    def get_trackers(self, resp):
+        content = b''.join(resp.streaming_content)
+        self.assertEqual(int(resp['Content-Length']), len(content))
+        with zipfile.ZipFile(io.BytesIO(content)) as course_zip:
+            self.assertIsNone(course_zip.testzip())
+            self.assertEqual(self.course_files + [self.TRACKER_XML], course_zip.namelist())
+            return ET.fromstring(course_zip.read(self.TRACKER_XML)).findall('tracker')
+
+    def test_streamed_with_trackers(self):
+        with open(self.course_path, 'rb') as course_file:
+            original = course_file.read()
+
+        resp = self.download()
+        self.assertHttpOK(resp)
+        self.assertTrue(resp.streaming)
+        self.assertEqual('application/zip', resp['Content-Type'])
+        self.assertEqual('attachment; filename="%s"' % self.COURSE_FILE, resp['Content-Disposition'])
+        trackers = self.get_trackers(resp)
+        self.assertEqual(Tracker.objects.filter(user=self.user, course_id=self.COURSE_ID).count(), len(trackers))
+
+        # the original course file isn't changed or copied
+        with open(self.course_path, 'rb') as course_file:
+            self.assertEqual(original, course_file.read())
+        self.assertFalse(os.path.exists(os.path.join(settings.COURSE_UPLOAD_DIR, 'temp',
+                                                     '%d-%s' % (self.user.id, self.COURSE_FILE))))
+
+    @override_settings(OPPIA_COURSE_DOWNLOAD_CACHE_TIMEOUT=300)
+    def test_tracker_xml_cached(self):
+        count = Tracker.objects.filter(user=self.user, course_id=self.COURSE_ID).count()
+        self.assertEqual(count, len(self.get_trackers(self.download())))
+
+        with mock.patch.object(Tracker, 'to_xml_string') as to_xml_string:
+            self.assertEqual(count, len(self.get_trackers(self.download())))
+            to_xml_string.assert_not_called()
+
+        # rebuilt once the user has a new tracker
+        Tracker.objects.create(user=self.user,
+                               course_id=self.COURSE_ID,
+                               digest='new-tracker',
+                               completed=True)
+        self.assertEqual(count + 1, len(self.get_trackers(self.download())))
+
+    def test_unchanged_file_response(self):
+        Tracker.objects.filter(user=self.user, course_id=self.COURSE_ID).delete()
+        resp = self.download()
+        self.assertHttpOK(resp)
+        self.assertEqual('application/zip', resp['Content-Type'])
+        self.assertEqual('attachment; filename="%s"' % self.COURSE_FILE, resp['Content-Disposition'])
+        with open(self.course_path, 'rb') as course_file:
+            self.assertEqual(course_file.read(), b''.join(resp.streaming_content))
+
+    @override_settings(OPPIA_SENDFILE_HEADER='X-Accel-Redirect', OPPIA_SENDFILE_PREFIX='/protected/courses/')
+    def test_unchanged_x_accel_redirect(self):
+        Tracker.objects.filter(user=self.user, course_id=self.COURSE_ID).delete()
+        resp = self.download()
+        self.assertHttpOK(resp)
+        self.assertEqual('/protected/courses/' + self.COURSE_FILE, resp['X-Accel-Redirect'])
+        self.assertEqual(b'', resp.content)
+
+    @override_settings(OPPIA_SENDFILE_HEADER='X-Sendfile')
+    def test_unchanged_x_sendfile(self):
+        Tracker.objects.filter(user=self.user, course_id=self.COURSE_ID).delete()
+        resp = self.download()
+        self.assertHttpOK(resp)
+        self.assertEqual(self.course_path, resp['X-Sendfile'])
+        self.assertEqual(b'', resp.content)
+        # left to the web server, for the file it sends
+        self.assertNotEqual(str(os.path.getsize(self.course_path)), resp.get('Content-Length'))
+
+    def test_sendfile_not_used_with_trackers(self):
+        with override_settings(OPPIA_SENDFILE_HEADER='X-Sendfile'):
+            resp = self.download()
+        self.assertFalse(resp.has_header('X-Sendfile'))
+        self.assertEqual(len(self.get_trackers(resp)),
+                         Tracker.objects.filter(user=self.user, course_id=self.COURSE_ID).count())
@@ -6,7 +6,8 @@ from django.conf import settings
 from django.test import TestCase
 from tastypie.test import ResourceTestCaseMixin
 
-from oppia.models import CourseStatus
+from oppia.models import Course, CourseStatus
+from oppia.utils.course_file import get_course_structure_path
 from tests.utils import get_api_url, update_course_status
 
 
@@ -99,3 +100,32 @@ class CourseStructureResourceTest(ResourceTestCaseMixin, TestCase):
         url = get_api_url('v2', 'coursestructure', 999)
         response = self.client.get(url)
         self.assertHttpNotFound(response)
+
+    def test_not_modified(self):
+        url = get_api_url('v2', 'coursestructure', 1)
+        response = self.client.get(url)
+        self.assertHttpOK(response)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+        self.assertEqual(b'', response.content)
+
+        # the course is published again
+        course = Course.objects.get(pk=1)
+        course.version += 1
+        course.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertHttpOK(response)
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_structure_saved(self):
+        path = get_course_structure_path('anc1-all')
+        if os.path.exists(path):
+            os.remove(path)
+        url = get_api_url('v2', 'coursestructure', 'anc1-all')
+        response = self.client.get(url)
+        self.assertHttpOK(response)
+        with open(path) as fd:
+            self.assertEqual(self.deserialize(response)['structure'], fd.read())
@@ -1,12 +1,19 @@
 import datetime
 import unittest
 
+from io import StringIO
+
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from tastypie.test import ResourceTestCaseMixin
 
-from oppia.models import Tracker
+from api.resources.tracker import TrackerResource
+from oppia.models import Tracker, Points, TrackerPointsJob
+from summary.models import UserCourseSummary, UserPointsSummary
 from tests.utils import get_api_key, get_api_url
 
 
@@ -639,6 +646,167 @@ class TrackerResourceTest(ResourceTestCaseMixin, TestCase):
         tracker1 = Tracker.objects.get(uuid="d5f305e9-dd03-4d97-96d5-uuid3")
         self.assertEqual(20150611095753, tracker1.course_version)
 
+    def test_patch_duplicate_uuid_in_batch_and_saved(self):
+        activity1 = {
+            'digest': '18ec12e5653a40431f453cce35811fa4',  # page
+            'data': '{\"uuid\": \"d5f305e9-dd03-4d97-96d5-5a3c45169e02\"}'
+        }
+        activity2 = {
+            'digest': '3ec4d8ab03c3c6bd66b3805f0b11225b',  # media
+            'data': '{\"uuid\": \"baa673cb-e5fc-4797-b7e9-58a06ed80915\"}'
+        }
+        resp = self.api_client.post(self.url,
+                                    format='json',
+                                    data=activity1,
+                                    authentication=self.get_credentials())
+        self.assertHttpCreated(resp)
+
+        data = {'objects': [activity1, activity2, activity2]}
+        tracker_count_start = Tracker.objects.all().count()
+        resp = self.api_client.patch(self.url,
+                                     format='json',
+                                     data=data,
+                                     authentication=self.get_credentials())
+        self.assertHttpOK(resp)
+
+        tracker_count_end = Tracker.objects.all().count()
+        self.assertEqual(tracker_count_start + 1, tracker_count_end)
+        self.assertEqual(1, Tracker.objects.filter(uuid='baa673cb-e5fc-4797-b7e9-58a06ed80915').count())
+
+    def test_patch_points_same_as_post(self):
+        activities = [
+            {'digest': '18ec12e5653a40431f453cce35811fa4', 'completed': True},  # page
+            {'digest': '18ec12e5653a40431f453cce35811fa4', 'completed': True},  # page again
+            {'digest': '3ec4d8ab03c3c6bd66b3805f0b11225b',  # media
+             'data': '{"timetaken": 300}', 'completed': True},
+            {'digest': '74ff568f95ddcfeb4ac809012eea7b5e', 'completed': False},  # quiz
+            {'digest': 'a1b2c3d4e5f6a7b8c9d', 'points': 20, 'event': 'custom_event'}  # invalid, with points
+        ]
+
+        def get_new_points(points_start):
+            return list(Points.objects.filter(pk__gt=points_start)
+                        .order_by('pk').values_list('points', 'type', 'description', 'course'))
+
+        points_start = Points.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        for activity in activities:
+            resp = self.api_client.post(self.url,
+                                        format='json',
+                                        data=activity,
+                                        authentication=self.get_credentials())
+            self.assertHttpCreated(resp)
+        posted = get_new_points(points_start)
+        posted_response = self.deserialize(resp)
+
+        Tracker.objects.filter(user__username=self.username).delete()
+        Points.objects.filter(pk__gt=points_start).delete()
+
+        resp = self.api_client.patch(self.url,
+                                     format='json',
+                                     data={'objects': activities},
+                                     authentication=self.get_credentials())
+        self.assertHttpOK(resp)
+        patched = get_new_points(points_start)
+
+        self.assertGreater(len(patched), 0)
+        self.assertEqual(posted, patched)
+        self.assertEqual(posted_response['points'], self.deserialize(resp)['points'])
+
+    def test_deferred_points_same_as_post(self):
+        activities = [
+            {'digest': '18ec12e5653a40431f453cce35811fa4', 'completed': True},  # page
+            {'digest': '18ec12e5653a40431f453cce35811fa4', 'completed': True},  # page again
+            {'digest': '3ec4d8ab03c3c6bd66b3805f0b11225b',  # media
+             'data': '{"timetaken": 300}', 'completed': True},
+            {'digest': '74ff568f95ddcfeb4ac809012eea7b5e', 'completed': False},  # quiz
+        ]
+
+        def get_new_points(points_start):
+            return list(Points.objects.filter(pk__gt=points_start)
+                        .order_by('pk').values_list('points', 'type', 'description', 'course'))
+
+        points_start = Points.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        for activity in activities:
+            resp = self.api_client.post(self.url,
+                                        format='json',
+                                        data=activity,
+                                        authentication=self.get_credentials())
+            self.assertHttpCreated(resp)
+        posted = get_new_points(points_start)
+
+        Tracker.objects.filter(user__username=self.username).delete()
+        Points.objects.filter(pk__gt=points_start).delete()
+
+        with self.settings(OPPIA_POINTS_DEFERRED=True):
+            resp = self.api_client.post(self.url,
+                                        format='json',
+                                        data=activities[0],
+                                        authentication=self.get_credentials())
+            self.assertHttpCreated(resp)
+            resp = self.api_client.patch(self.url,
+                                         format='json',
+                                         data={'objects': activities[1:]},
+                                         authentication=self.get_credentials())
+            self.assertHttpOK(resp)
+            self.assertEqual([], get_new_points(points_start))
+            self.assertEqual(len(activities), TrackerPointsJob.objects.count())
+
+            call_command('process_points_jobs', '--once', stdout=StringIO())
+
+        self.assertEqual(posted, get_new_points(points_start))
+        self.assertEqual(0, TrackerPointsJob.objects.count())
+
+    @override_settings(OPPIA_POINTS_DEFERRED=True)
+    def test_deferred_points_from_summaries(self):
+        user = User.objects.get(username=self.username)
+        UserPointsSummary.objects.update_or_create(user=user, defaults={'points': 123})
+        UserCourseSummary.objects.update_or_create(user=user, course_id=1, defaults={'points': 23})
+        resp = self.api_client.post(self.url,
+                                    format='json',
+                                    data={'digest': '18ec12e5653a40431f453cce35811fa4'},
+                                    authentication=self.get_credentials())
+        self.assertHttpCreated(resp)
+        response_data = self.deserialize(resp)
+        self.assertEqual(123, response_data['points'])
+        self.assertEqual([{'course__shortname': 'anc1-all', 'total_points': 23}], response_data['course_points'])
+
+    def test_set_missing_pks(self):
+        # as on MySQL, where bulk_create doesn't set the ids
+        user = User.objects.get(username=self.username)
+        Tracker.objects.create(user=user, uuid='uuid-1')
+        trackers = [Tracker(user=user, uuid='uuid-1'),
+                    Tracker(user=user, uuid='uuid-2'),
+                    Tracker(user=user, uuid='uuid-2'),
+                    Tracker(user=user)]
+        Tracker.objects.bulk_create(trackers)
+        pks = [tracker.pk for tracker in trackers]
+        for tracker in trackers:
+            tracker.pk = None
+
+        TrackerResource.set_missing_pks(trackers)
+        self.assertEqual(pks[:3] + [None], [tracker.pk for tracker in trackers])
+
+    def test_patch_queries_independent_of_batch_size(self):
+        activity = {
+            'digest': '18ec12e5653a40431f453cce35811fa4',  # page
+            'course': 'anc1-all',
+            'completed': True
+        }
+
+        num_queries = []
+        for batch_size in (2, 20):
+            data = {'objects': [dict(activity, data='{"uuid": "batch-%d-%d"}' % (batch_size, i))
+                                for i in range(batch_size)]}
+            with CaptureQueriesContext(connection) as queries:
+                resp = self.api_client.patch(self.url,
+                                             format='json',
+                                             data=data,
+                                             authentication=self.get_credentials())
+            self.assertHttpOK(resp)
+            num_queries.append(len(queries))
+
+        self.assertEqual(num_queries[0], num_queries[1])
+
+
 # @TODO test UUID not in bundle data
 
 # @TODO test media doesn't exist
@@ -0,0 +1,93 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from gamification.models import DefaultGamificationEvent, CourseGamificationEvent
+from gamification.rules import gamification_rules
+from oppia.models import Tracker, Points
+from oppia.test import OppiaTestCase
+
+
+@override_settings(OPPIA_GAMIFICATION_CACHE_TIMEOUT=300)
+class GamificationRulesTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_permissions.json',
+                'tests/test_course_permissions.json',
+                'default_gamification_events.json',
+                'tests/test_gamification.json']
+
+    def setUp(self):
+        super(GamificationRulesTest, self).setUp()
+        gamification_rules.invalidate()
+
+    def tearDown(self):
+        gamification_rules.invalidate()
+        super(GamificationRulesTest, self).tearDown()
+
+    def test_default_points(self):
+        self.assertEqual(10, gamification_rules.get_points('activity_completed'))
+        self.assertEqual(20, gamification_rules.get_points('media_started'))
+
+    def test_most_specific_level(self):
+        self.assertEqual(10, gamification_rules.get_points('activity_completed', course_id=4))
+        self.assertEqual(123, gamification_rules.get_points('activity_completed', course_id=4, activity_id=373))
+        self.assertEqual(100, gamification_rules.get_points('media_started', course_id=4, media_id=4))
+        self.assertEqual(50, gamification_rules.get_points('course_downloaded', course_id=4))
+        # not defined for the course, so the default
+        self.assertEqual(20, gamification_rules.get_points('media_started', course_id=1))
+
+    def test_unknown_event(self):
+        with self.assertRaises(DefaultGamificationEvent.DoesNotExist):
+            gamification_rules.get_points('not_an_event')
+
+    def test_loaded_once(self):
+        with self.assertNumQueries(4):
+            gamification_rules.get_points('activity_completed')
+        with self.assertNumQueries(0):
+            gamification_rules.get_points('media_started')
+            gamification_rules.get_points('activity_completed', course_id=4, activity_id=375)
+
+    def test_invalidated_on_edit(self):
+        self.assertEqual(10, gamification_rules.get_points('activity_completed', course_id=1))
+        CourseGamificationEvent.objects.create(course_id=1,
+                                               event='activity_completed',
+                                               points=25,
+                                               user=self.admin_user)
+        self.assertEqual(25, gamification_rules.get_points('activity_completed', course_id=1))
+
+        CourseGamificationEvent.objects.filter(course_id=1).delete()
+        self.assertEqual(10, gamification_rules.get_points('activity_completed', course_id=1))
+
+    def test_tracker_points_no_gamification_queries(self):
+        gamification_rules.get_points('activity_completed')
+        tracker = Tracker(user=self.normal_user,
+                          digest='11cc12291f730160c324b727dd2268b612137',
+                          completed=True)
+        with CaptureQueriesContext(connection) as queries:
+            tracker.save()
+        self.assertFalse([query for query in queries.captured_queries if 'gamification' in query['sql']])
+
+        points = Points.objects.get(user=self.normal_user, type='activity_completed')
+        self.assertEqual(10, points.points)
+
+    def test_tracker_points_activity_level(self):
+        tracker = Tracker(user=self.normal_user,
+                          course_id=4,
+                          digest='a68146dd7f3b93efaeeca333dc0c4ae9497',
+                          completed=True)
+        tracker.save()
+
+        points = Points.objects.get(user=self.normal_user, type='activity_completed')
+        self.assertEqual(123, points.points)
+
+    def test_tracker_points_media_level(self):
+        tracker = Tracker(user=self.normal_user,
+                          course_id=4,
+                          digest='33f33dc89eac9ba776950ce440bd6269',
+                          time_taken=0,
+                          completed=True)
+        tracker.save()
+
+        points = Points.objects.get(user=self.normal_user, type='mediaplayed')
+        self.assertEqual(100, points.points)
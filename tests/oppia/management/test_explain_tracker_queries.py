@@ -0,0 +1,34 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from oppia.management.commands.explain_tracker_queries import get_full_scans
+from oppia.test import OppiaTestCase
+
+
+class ExplainTrackerQueriesTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_permissions.json',
+                'tests/test_course_permissions.json']
+
+    def test_no_full_scans(self):
+        out = StringIO()
+        call_command('explain_tracker_queries', '--plans', stdout=out)
+        self.assertIn('Tracker.is_first_tracker_today: OK', out.getvalue())
+        self.assertIn('No full table scans found.', out.getvalue())
+
+    def test_get_full_scans_sqlite(self):
+        plan = "3 0 0 SEARCH oppia_tracker USING INDEX oppia_track_user_id_376fcd_idx (user_id=? AND type=?)\n" \
+               "7 0 0 SCAN oppia_media"
+        self.assertEqual(['oppia_media'], get_full_scans(plan, 'sqlite'))
+
+    def test_get_full_scans_postgresql(self):
+        plan = "Seq Scan on oppia_tracker  (cost=0.00..1.01 rows=1 width=4)\n  Filter: (user_id = 1)"
+        self.assertEqual(['oppia_tracker'], get_full_scans(plan, 'postgresql'))
+
+    def test_get_full_scans_mysql(self):
+        plan = '{"query_block": {"select_id": 1, "nested_loop": [' \
+               '{"table": {"table_name": "oppia_tracker", "access_type": "ref"}}, ' \
+               '{"table": {"table_name": "oppia_activity", "access_type": "ALL"}}]}}'
+        self.assertEqual(['oppia_activity'], get_full_scans(plan, 'mysql'))
@@ -0,0 +1,63 @@
+import datetime
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from oppia.models import Points, Tracker, TrackerPointsJob
+from oppia.test import OppiaTestCase
+from settings.models import SettingProperties
+
+ACTIVITY_DIGEST = '11cc12291f730160c324b727dd2268b612137'
+
+
+@override_settings(OPPIA_POINTS_DEFERRED=True)
+class ProcessPointsJobsTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_permissions.json',
+                'tests/test_course_permissions.json',
+                'default_gamification_events.json',
+                'default_badges.json']
+
+    def save_tracker(self, submitted_date=None):
+        tracker = Tracker(user=self.normal_user,
+                          course_id=1,
+                          digest=ACTIVITY_DIGEST,
+                          completed=True,
+                          submitted_date=submitted_date or timezone.now())
+        tracker.save()
+        return tracker
+
+    def test_tracker_save_queues_job(self):
+        points_count_start = Points.objects.count()
+        tracker = self.save_tracker()
+        self.assertEqual(points_count_start, Points.objects.count())
+        self.assertTrue(TrackerPointsJob.objects.filter(tracker=tracker).exists())
+
+    def test_points_awarded(self):
+        self.save_tracker()
+        out = StringIO()
+        call_command('process_points_jobs', '--once', stdout=out)
+        self.assertIn('1 points jobs to process.', out.getvalue())
+        self.assertEqual(0, TrackerPointsJob.objects.count())
+        self.assertEqual(1, Points.objects.filter(user=self.normal_user, type='activity_completed').count())
+
+    def test_first_tracker_today_as_when_saved(self):
+        # a day apart, so both get points even though they're only awarded now
+        self.save_tracker(timezone.now() - datetime.timedelta(hours=30))
+        self.save_tracker()
+        # the same day as the one before, so no points
+        self.save_tracker()
+        call_command('process_points_jobs', '--once', stdout=StringIO())
+        self.assertEqual(2, Points.objects.filter(user=self.normal_user, type='activity_completed').count())
+
+    def test_locked(self):
+        self.save_tracker()
+        SettingProperties.objects.create(key='oppia_points_jobs_lock', int_value=1)
+        out = StringIO()
+        call_command('process_points_jobs', '--once', stdout=out)
+        self.assertIn('already being processed', out.getvalue())
+        self.assertEqual(1, TrackerPointsJob.objects.count())
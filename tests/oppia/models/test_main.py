@@ -1,11 +1,15 @@
 import datetime
+import json
 import pytz
 
+import xml.etree.ElementTree as ET
+
 from django.contrib.auth.models import User
 from django.utils.timezone import make_aware
 
 from oppia.models import Course, Activity, Tracker, Media
 from oppia.test import OppiaTestCase
+from quiz.models import QuizAttempt
 
 
 class MainModelsCoreTest(OppiaTestCase):
@@ -246,3 +250,29 @@ class MainModelsCoreTest(OppiaTestCase):
         user = User.objects.get(pk=2)
         xml = Tracker.to_xml_string(course, user)
         self.assertEqual(51805, len(xml))
+
+    def test_tracker_to_xml_string_quiz_attempts(self):
+        course = Course.objects.get(pk=1)
+        user = User.objects.get(pk=2)
+        for instance_id in ['instance-1', 'instance-2']:
+            Tracker.objects.create(user=user,
+                                   course=course,
+                                   type='quiz',
+                                   digest='quiz-digest',
+                                   completed=True,
+                                   data=json.dumps({'instance_id': instance_id}))
+            for score in [5, 8]:
+                QuizAttempt.objects.create(user=user,
+                                           instance_id=instance_id,
+                                           score=score,
+                                           maxscore=10,
+                                           submitted_date=make_aware(datetime.datetime(2020, 1, score)))
+
+        # the latest attempts for all the quiz trackers are fetched at once
+        with self.assertNumQueries(3):
+            xml = Tracker.to_xml_string(course, user)
+        quizzes = ET.fromstring(xml).findall('tracker/quiz')
+        self.assertEqual(2, len(quizzes))
+        for quiz in quizzes:
+            self.assertEqual('8.00', quiz.get('score'))
+            self.assertEqual(course.shortname, quiz.get('course'))
@@ -0,0 +1,64 @@
+import datetime
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from oppia.models import Tracker
+from oppia.test import OppiaTestCase
+from oppia.utils.date_series import get_daily_series, get_monthly_series, get_months
+from summary.models import CourseDailyStats
+
+
+class DateSeriesTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_quiz.json',
+                'tests/test_permissions.json',
+                'default_gamification_events.json',
+                'tests/test_coursedailystats.json',
+                'tests/test_tracker.json',
+                'tests/test_course_permissions.json']
+
+    def test_daily_series(self):
+        start_date = datetime.date(2017, 1, 1)
+        end_date = datetime.date(2017, 12, 31)
+        with self.assertNumQueries(1):
+            series = get_daily_series(CourseDailyStats.objects, 'day', Sum('total'), start_date, end_date)
+
+        self.assertEqual(365, len(series))
+        self.assertEqual(start_date, series[0][0])
+        self.assertEqual(end_date, series[-1][0])
+        for day, total in series:
+            expected = CourseDailyStats.objects.filter(day=day).aggregate(total=Sum('total'))['total']
+            self.assertEqual(expected or 0, total)
+
+    def test_daily_series_aware_datetimes(self):
+        start_date = timezone.make_aware(datetime.datetime(2017, 1, 1))
+        end_date = timezone.make_aware(datetime.datetime(2017, 1, 31))
+        series = get_daily_series(CourseDailyStats.objects, 'day', Sum('total'), start_date, end_date)
+        self.assertEqual(31, len(series))
+        self.assertEqual(datetime.date(2017, 1, 1), series[0][0])
+        self.assertEqual(datetime.date(2017, 1, 31), series[-1][0])
+
+    def test_daily_series_datetime_field(self):
+        tracker = Tracker.objects.order_by('tracker_date').first()
+        day = timezone.localtime(tracker.tracker_date).date()
+        series = dict(get_daily_series(Tracker.objects, 'tracker_date', Count('id'), day, day))
+        self.assertEqual(Tracker.objects.filter(tracker_date__date=day).count(), series[day])
+
+    def test_monthly_series(self):
+        start_date = datetime.date(2017, 1, 1)
+        end_date = datetime.date(2017, 12, 31)
+        with self.assertNumQueries(1):
+            series = get_monthly_series(CourseDailyStats.objects, 'day', Sum('total'), start_date, end_date)
+
+        self.assertEqual(12, len(series))
+        for month, total in series:
+            expected = CourseDailyStats.objects.filter(day__year=month.year, day__month=month.month) \
+                .aggregate(total=Sum('total'))['total']
+            self.assertEqual(expected or 0, total)
+
+    def test_months(self):
+        self.assertEqual([datetime.date(2017, 1, 1), datetime.date(2017, 2, 1)],
+                         get_months(datetime.date(2017, 1, 15), datetime.date(2017, 3, 10)))
+        self.assertEqual([], get_months(datetime.date(2017, 3, 10), datetime.date(2017, 1, 15)))
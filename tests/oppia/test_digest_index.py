@@ -0,0 +1,80 @@
+from django.test import override_settings
+
+from oppia.digest_index import digest_index
+from oppia.models import Course, Tracker
+from oppia.test import OppiaTestCase
+
+ACTIVITY_DIGEST = '11cc12291f730160c324b727dd2268b612137'
+MEDIA_DIGEST = '45ad219ead30b9a1818176598f8bbbf9'
+
+
+@override_settings(OPPIA_DIGEST_CACHE_SIZE=100)
+class DigestIndexTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_permissions.json',
+                'tests/test_course_permissions.json']
+
+    def setUp(self):
+        super(DigestIndexTest, self).setUp()
+        digest_index.invalidate()
+
+    def tearDown(self):
+        digest_index.invalidate()
+        super(DigestIndexTest, self).tearDown()
+
+    def test_activity(self):
+        info = digest_index.get(ACTIVITY_DIGEST)
+        self.assertEqual('page', info.activity.type)
+        self.assertEqual(1, info.activity.course_id)
+        self.assertIsNone(info.media)
+        self.assertEqual('page', info.get_activity_type())
+        self.assertEqual('Introduction', info.get_activity_title())
+
+    def test_media_by_course(self):
+        info = digest_index.get(MEDIA_DIGEST)
+        self.assertEqual(1, info.media.course_id)
+        self.assertEqual('media', info.get_activity_type())
+
+        info = digest_index.get(MEDIA_DIGEST, 'ref-1')
+        self.assertEqual(4, info.media.course_id)
+
+        info = digest_index.get(MEDIA_DIGEST, 'ncd1-et')
+        self.assertFalse(info.exists())
+
+    def test_not_found(self):
+        info = digest_index.get('not-a-digest')
+        self.assertFalse(info.exists())
+        self.assertIsNone(info.get_activity_type())
+        self.assertEqual('default', info.get_activity_title(default='default'))
+
+    def test_cached(self):
+        with self.assertNumQueries(2):
+            digest_index.get_many([(ACTIVITY_DIGEST, None), (MEDIA_DIGEST, 'anc1-all')])
+
+        tracker = Tracker(digest=ACTIVITY_DIGEST)
+        with self.assertNumQueries(0):
+            digest_index.get(MEDIA_DIGEST, 'anc1-all')
+            self.assertTrue(tracker.activity_exists())
+            self.assertEqual('page', tracker.get_activity_type())
+            self.assertEqual('Introduction', tracker.get_activity_title())
+
+    @override_settings(OPPIA_DIGEST_CACHE_SIZE=1)
+    def test_least_recently_used_evicted(self):
+        digest_index.get(ACTIVITY_DIGEST)
+        digest_index.get(MEDIA_DIGEST)
+        with self.assertNumQueries(0):
+            digest_index.get(MEDIA_DIGEST)
+        with self.assertNumQueries(2):
+            digest_index.get(ACTIVITY_DIGEST)
+
+    @override_settings(OPPIA_DIGEST_CACHE_SIZE=0)
+    def test_disabled(self):
+        digest_index.get(ACTIVITY_DIGEST)
+        with self.assertNumQueries(2):
+            digest_index.get(ACTIVITY_DIGEST)
+
+    def test_invalidated_on_course_delete(self):
+        self.assertTrue(digest_index.get(ACTIVITY_DIGEST).exists())
+        Course.objects.get(pk=1).delete()
+        self.assertFalse(digest_index.get(ACTIVITY_DIGEST).exists())
@@ -299,3 +299,109 @@ class QuizAttemptResourceTest(ResourceTestCaseMixin, TransactionTestCase):
         quizattemptresponse_count_end = QuizAttemptResponse.objects.all().count()
         self.assertEqual(quizattempt_count_start, quizattempt_count_end)
         self.assertEqual(quizattemptresponse_count_start, quizattemptresponse_count_end)
+
+    def get_attempt(self, instance_id, quiz_id=2):
+        return {"quiz_id": quiz_id,
+                "maxscore": 30,
+                "score": 10,
+                "attempt_date": "2012-12-18T15:35:12",
+                "instance_id": instance_id,
+                "responses": [
+                             {"question_id": "132",
+                              "score": 0,
+                              "text": "true"},
+                             {"question_id": "133",
+                              "score": 10,
+                              "text": "true"},
+                             {"question_id": "134",
+                              "score": 0,
+                              "text": "false"}]}
+
+    def test_batch(self):
+        quizattempt_count_start = QuizAttempt.objects.all().count()
+        quizattemptresponse_count_start = QuizAttemptResponse.objects.all().count()
+        data = {'objects': [self.get_attempt('343c1dbf-b61a-4b74-990c-b94e3dc7d855'),
+                            self.get_attempt('1a8f8b4c-2c4e-4e8a-a0c1-6d1e2f9b7a10'),
+                            # same attempt twice in the batch
+                            self.get_attempt('1a8f8b4c-2c4e-4e8a-a0c1-6d1e2f9b7a10'),
+                            # quiz doesn't exist
+                            self.get_attempt('b7d2e0f4-58a5-4d3c-9b1e-3f6a2c8d9e01', quiz_id=100)]}
+        resp = self.api_client.patch(self.url,
+                                     format='json',
+                                     data=data,
+                                     authentication=self.get_credentials())
+        self.assertHttpOK(resp)
+        self.assertValidJSON(resp.content)
+        content = self.deserialize(resp)
+        self.assertEqual(2, content['saved'])
+        self.assertEqual(['1a8f8b4c-2c4e-4e8a-a0c1-6d1e2f9b7a10', 'b7d2e0f4-58a5-4d3c-9b1e-3f6a2c8d9e01'],
+                         [error['instance_id'] for error in content['errors']])
+        self.assertTrue('points' in content)
+        self.assertTrue('badges' in content)
+
+        self.assertEqual(quizattempt_count_start + 2, QuizAttempt.objects.all().count())
+        self.assertEqual(quizattemptresponse_count_start + 6, QuizAttemptResponse.objects.all().count())
+        quiz_attempt = QuizAttempt.objects.get(instance_id='343c1dbf-b61a-4b74-990c-b94e3dc7d855')
+        self.assertEqual(self.username, quiz_attempt.user.username)
+        self.assertEqual(2, quiz_attempt.quiz_id)
+        self.assertEqual(10, quiz_attempt.responses.get(question_id=133).score)
+
+    def test_batch_malformed_response(self):
+        quizattempt_count_start = QuizAttempt.objects.all().count()
+        missing_score = self.get_attempt('7c1e5a2b-93d4-4f6e-8a0b-2d5c9e1f3a47')
+        del missing_score['responses'][1]['score']
+        missing_question = self.get_attempt('e4b9d1c6-0a7f-4e23-b58d-91c6f2a3d705')
+        del missing_question['responses'][0]['question_id']
+        text_question = self.get_attempt('5f2a8c3e-6d1b-4a9f-87e0-c3b4d5e6f718')
+        text_question['responses'][2]['question_id'] = 'abc'
+        number_response = self.get_attempt('0d6e2b7a-4c1f-4e8b-9a3d-7f5c1e2b8a69')
+        number_response['responses'] = [5]
+        number_responses = self.get_attempt('a3c7e1f9-2b5d-4f8a-b6e0-1d9c4a7e3f52')
+        number_responses['responses'] = 5
+        data = {'objects': [self.get_attempt('343c1dbf-b61a-4b74-990c-b94e3dc7d855'),
+                            missing_score,
+                            missing_question,
+                            text_question,
+                            number_response,
+                            number_responses,
+                            5]}
+        resp = self.api_client.patch(self.url,
+                                     format='json',
+                                     data=data,
+                                     authentication=self.get_credentials())
+        self.assertHttpOK(resp)
+        content = self.deserialize(resp)
+        self.assertEqual(1, content['saved'])
+        self.assertEqual(['7c1e5a2b-93d4-4f6e-8a0b-2d5c9e1f3a47',
+                          'e4b9d1c6-0a7f-4e23-b58d-91c6f2a3d705',
+                          '5f2a8c3e-6d1b-4a9f-87e0-c3b4d5e6f718',
+                          '0d6e2b7a-4c1f-4e8b-9a3d-7f5c1e2b8a69',
+                          'a3c7e1f9-2b5d-4f8a-b6e0-1d9c4a7e3f52',
+                          None],
+                         [error['instance_id'] for error in content['errors']])
+        self.assertEqual(quizattempt_count_start + 1, QuizAttempt.objects.all().count())
+        self.assertTrue(QuizAttempt.objects.filter(instance_id='343c1dbf-b61a-4b74-990c-b94e3dc7d855').exists())
+
+    def test_batch_already_submitted(self):
+        attempt = self.get_attempt('343c1dbf-b61a-4b74-990c-b94e3dc7d855')
+        resp = self.api_client.post(self.url,
+                                    format='json',
+                                    data=attempt,
+                                    authentication=self.get_credentials())
+        self.assertHttpCreated(resp)
+
+        quizattempt_count_start = QuizAttempt.objects.all().count()
+        resp = self.api_client.patch(self.url,
+                                     format='json',
+                                     data={'objects': [attempt]},
+                                     authentication=self.get_credentials())
+        self.assertHttpOK(resp)
+        self.assertEqual(0, self.deserialize(resp)['saved'])
+        self.assertEqual(quizattempt_count_start, QuizAttempt.objects.all().count())
+
+    def test_batch_detail_patch_invalid(self):
+        resource_url = get_api_url('v2', 'quizattempt', 1192)
+        self.assertHttpMethodNotAllowed(self.api_client.patch(resource_url,
+                                                              format='json',
+                                                              data={},
+                                                              authentication=self.get_credentials()))
@@ -0,0 +1,69 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from oppia.test import OppiaTestCase
+from settings.models import SettingProperties
+from summary.models import UserCourseDailySummary
+
+
+@override_settings(OPPIA_REPORT_CACHE_TIMEOUT=3600)
+class ReportCacheTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_quiz.json',
+                'tests/test_permissions.json',
+                'tests/test_cohort.json',
+                'tests/test_course_permissions.json',
+                'tests/test_usercoursesummary.json']
+
+    url = reverse('reports:maus')
+    data = {'start_date': "2015-01-01",
+            'end_date': "2021-12-31"}
+
+    def setUp(self):
+        super(ReportCacheTest, self).setUp()
+        cache.clear()
+        self.client.force_login(user=self.admin_user)
+
+    def get_graph_data(self, data=None):
+        response = self.client.get(self.url, data=data or self.data)
+        self.assertEqual(response.status_code, 200)
+        return response.context['activity_graph_data']
+
+    def add_active_user(self):
+        UserCourseDailySummary.objects.create(user=self.normal_user,
+                                              course_id=1,
+                                              day=datetime.date(2020, 3, 10),
+                                              type='page',
+                                              total_tracked=1)
+        return 'Mar 2020'
+
+    def get_month_users(self, graph_data, month):
+        return dict(graph_data)[month]
+
+    def test_cached_until_summaries_updated(self):
+        graph_data = self.get_graph_data()
+        month = self.add_active_user()
+        self.assertEqual(graph_data, self.get_graph_data())
+
+        SettingProperties.set_int('last_tracker_pk', SettingProperties.get_int('last_tracker_pk', 0) + 1)
+        self.assertEqual(self.get_month_users(graph_data, month) + 1,
+                         self.get_month_users(self.get_graph_data(), month))
+
+    def test_keyed_by_date_range(self):
+        graph_data = self.get_graph_data()
+        month = self.add_active_user()
+        other_graph_data = self.get_graph_data({'start_date': "2016-01-01",
+                                                'end_date': "2021-12-31"})
+        self.assertEqual(self.get_month_users(graph_data, month) + 1,
+                         self.get_month_users(other_graph_data, month))
+
+    @override_settings(OPPIA_REPORT_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        graph_data = self.get_graph_data()
+        month = self.add_active_user()
+        self.assertEqual(self.get_month_users(graph_data, month) + 1,
+                         self.get_month_users(self.get_graph_data(), month))
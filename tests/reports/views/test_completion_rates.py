@@ -1,5 +1,7 @@
+from django.db.models import Count, Sum
 from django.urls import reverse
 from oppia.test import OppiaTestCase
+from summary.models import UserCourseSummary
 
 
 class CompletionRatesViewTest(OppiaTestCase):
@@ -33,3 +35,18 @@ class CompletionRatesViewTest(OppiaTestCase):
                                  '/admin/login/?next=' + url,
                                  302,
                                  200)
+
+    def test_completion_rates_by_course(self):
+        self.client.force_login(user=self.admin_user)
+        response = self.client.get(reverse('reports:completion_rates'))
+        self.assertEqual(response.status_code, 200)
+
+        for obj in response.context['courses_list']:
+            stats = UserCourseSummary.objects.filter(course=obj['course']) \
+                .aggregate(users=Count('user'), completed=Sum('badges_achieved'))
+            if stats['users'] == 0:
+                self.assertNotIn('enroled', obj)
+                continue
+            self.assertEqual(stats['users'], obj['enroled'])
+            self.assertAlmostEqual(stats['completed'] * 100 / stats['users'], obj['completion'])
+            self.assertEqual(sorted(obj['course'].get_categories().split(', ')), sorted(obj['categories'].split(', ')))
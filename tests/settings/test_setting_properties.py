@@ -1,6 +1,10 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
 
 from oppia.test import OppiaTestCase
-from settings.models import SettingProperties
+from settings.models import SettingProperties, SettingPropertiesCache, setting_properties_cache
 
 
 class SettingPropertiesTest(OppiaTestCase):
@@ -122,3 +126,85 @@ class SettingPropertiesTest(OppiaTestCase):
         retreived_value = SettingProperties.get_property("some non key",
                                                          "not here")
         self.assertEqual("not here", retreived_value)
+
+    def test_get_many(self):
+        SettingProperties.set_int("intkey", 123)
+        SettingProperties.set_string("strkey", "mystring")
+        SettingProperties.set_bool("boolkey", False)
+        values = SettingProperties.get_many({"intkey": 0,
+                                             "strkey": "default",
+                                             "boolkey": True,
+                                             "some non key": "not here"})
+        self.assertEqual({"intkey": 123,
+                          "strkey": "mystring",
+                          "boolkey": False,
+                          "some non key": "not here"}, values)
+
+
+@override_settings(OPPIA_SETTINGS_CACHE_TIMEOUT=60)
+class SettingPropertiesCacheTest(OppiaTestCase):
+
+    def setUp(self):
+        super(SettingPropertiesCacheTest, self).setUp()
+        setting_properties_cache.clear()
+
+    def tearDown(self):
+        setting_properties_cache.clear()
+        super(SettingPropertiesCacheTest, self).tearDown()
+
+    def test_loaded_once(self):
+        SettingProperties.set_int("intkey", 123)
+        with self.assertNumQueries(1):
+            self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+        with self.assertNumQueries(0):
+            self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+            self.assertEqual("default", SettingProperties.get_string("strkey", "default"))
+            self.assertEqual({"intkey": 123}, SettingProperties.get_many({"intkey": 0}))
+
+    def test_invalidated_on_set(self):
+        SettingProperties.set_int("intkey", 123)
+        self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+        SettingProperties.set_int("intkey", 456)
+        self.assertEqual(456, SettingProperties.get_int("intkey", 0))
+
+    def test_invalidated_on_delete(self):
+        SettingProperties.set_int("intkey", 123)
+        self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+        SettingProperties.delete_key("intkey")
+        self.assertEqual(0, SettingProperties.get_int("intkey", 0))
+
+    def test_reloaded_on_version_change(self):
+        SettingProperties.set_int("intkey", 123)
+        self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+        # as if changed by another process
+        SettingProperties.objects.filter(key="intkey").update(int_value=456)
+        self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+        cache.set(SettingPropertiesCache.VERSION_KEY, 'another version')
+        self.assertEqual(456, SettingProperties.get_int("intkey", 0))
+
+    @override_settings(OPPIA_SETTINGS_CACHE_TIMEOUT=0)
+    def test_reloaded_on_timeout(self):
+        SettingProperties.set_int("intkey", 123)
+        self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+        SettingProperties.objects.filter(key="intkey").update(int_value=456)
+        self.assertEqual(456, SettingProperties.get_int("intkey", 0))
+
+    @override_settings(OPPIA_CACHE_VERSION_CHECK_INTERVAL=60)
+    def test_version_checked_once_per_interval(self):
+        SettingProperties.set_int("intkey", 123)
+        self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+        SettingProperties.objects.filter(key="intkey").update(int_value=456)
+        cache.set(SettingPropertiesCache.VERSION_KEY, 'another version')
+        with mock.patch('oppia.utils.process_cache.cache') as mock_cache:
+            self.assertEqual(123, SettingProperties.get_int("intkey", 0))
+            mock_cache.get.assert_not_called()
+
+    def test_version_unchanged_by_locks(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            SettingProperties.set_int('oppia_summary_cron_lock', 1)
+            SettingProperties.delete_key('oppia_summary_cron_lock')
+        self.assertEqual([], callbacks)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            SettingProperties.set_int("intkey", 123)
+        self.assertEqual(1, len(callbacks))
@@ -0,0 +1,84 @@
+import datetime
+
+from collections import defaultdict
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+from io import StringIO
+
+from oppia.test import OppiaTestCase
+from oppia.utils.date_series import to_date
+from summary.models import CourseDailyStats, CourseStatsRollup
+
+
+class CourseStatsRollupTest(OppiaTestCase):
+
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_quiz.json',
+                'tests/test_permissions.json',
+                'default_gamification_events.json',
+                'tests/test_tracker.json',
+                'default_badges.json',
+                'tests/test_search_tracker.json',
+                'tests/test_course_permissions.json']
+
+    def get_expected_rollups(self):
+        rollups = defaultdict(int)
+        for stats in CourseDailyStats.objects.all():
+            for period, _ in CourseStatsRollup.PERIOD_TYPES:
+                start = CourseStatsRollup.get_period_start(period, stats.day)
+                rollups[(period, start, stats.course_id, stats.type)] += stats.total
+        return dict(rollups)
+
+    def get_rollups(self):
+        return {(rollup.period, rollup.start, rollup.course_id, rollup.type): rollup.total
+                for rollup in CourseStatsRollup.objects.all()}
+
+    def test_rollups_match_daily_stats(self):
+        call_command('update_summaries', stdout=StringIO())
+        self.assertNotEqual(0, CourseStatsRollup.objects.count())
+        self.assertEqual(self.get_expected_rollups(), self.get_rollups())
+
+    def test_update_days(self):
+        call_command('update_summaries', stdout=StringIO())
+        stats = CourseDailyStats.objects.order_by('day').first()
+        stats.total += 5
+        stats.save()
+        CourseDailyStats.objects.create(course=stats.course, day=datetime.date(2030, 2, 3), type='page', total=2)
+
+        CourseStatsRollup.update_days([stats.day, datetime.date(2030, 2, 3)])
+        self.assertEqual(self.get_expected_rollups(), self.get_rollups())
+
+    def test_update_days_only_their_periods(self):
+        call_command('update_summaries', stdout=StringIO())
+        first_day = CourseDailyStats.objects.order_by('day').first().day
+        last_day = CourseDailyStats.objects.order_by('day').last().day
+        CourseStatsRollup.objects.filter(period=CourseStatsRollup.MONTH).update(total=0)
+
+        CourseStatsRollup.update_days([first_day, last_day])
+        months = {CourseStatsRollup.get_period_start(CourseStatsRollup.MONTH, day) for day in (first_day, last_day)}
+        rollups = CourseStatsRollup.objects.filter(period=CourseStatsRollup.MONTH)
+        self.assertEqual(0, rollups.filter(total=0, start__in=months).count())
+        self.assertNotEqual(0, rollups.filter(total=0).exclude(start__in=months).count())
+
+    def test_monthly_totals(self):
+        call_command('update_summaries', stdout=StringIO())
+        first_day = CourseDailyStats.objects.order_by('day').first().day
+        last_day = CourseDailyStats.objects.order_by('day').last().day
+        # starting and ending partway through the months
+        start_date = first_day + datetime.timedelta(days=3)
+        end_date = last_day - datetime.timedelta(days=3)
+
+        expected = [dict(row, month=to_date(row['month']))
+                    for row in CourseDailyStats.objects
+                    .filter(day__gte=start_date, day__lte=end_date)
+                    .annotate(month=TruncMonth('day'))
+                    .values('month', 'type')
+                    .annotate(total=Sum('total'))
+                    .order_by('month', 'type')]
+        totals = CourseStatsRollup.get_monthly_totals(start_date, end_date, fields=('type',))
+        self.assertEqual(expected, [{'month': row['month'], 'type': row['type'], 'total': row['total']}
+                                    for row in totals])
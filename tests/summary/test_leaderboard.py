@@ -0,0 +1,107 @@
+from django.contrib.auth.models import User
+
+from oppia.models import Cohort, Course, Participant, Points
+from oppia.test import OppiaTestCase
+from summary.models import CourseLeaderboard, Leaderboard, UserCourseSummary, UserPointsSummary
+
+
+class LeaderboardTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_permissions.json',
+                'tests/test_course_permissions.json',
+                'tests/test_leaderboard.json']
+
+    def setUp(self):
+        super(LeaderboardTest, self).setUp()
+        Leaderboard.refresh_if_stale()
+
+    def get_ranking(self):
+        return list(Leaderboard.objects.order_by('rank').values_list('rank', 'user', 'points', 'badges'))
+
+    def get_expected_ranking(self):
+        return [(idx + 1, summary.user_id, summary.points, summary.badges)
+                for idx, summary in enumerate(UserPointsSummary.objects.order_by('-points', 'id'))]
+
+    def test_ranked_from_summaries(self):
+        self.assertEqual(self.get_expected_ranking(), self.get_ranking())
+
+    def test_update_users_moves_up_and_down(self):
+        summaries = list(UserPointsSummary.objects.order_by('-points', 'id')[10:2000:400])
+        for idx, summary in enumerate(summaries):
+            summary.points = (idx * 50000) % 170000
+            summary.save()
+        Leaderboard.update_users([summary.user_id for summary in summaries])
+        self.assertEqual(self.get_expected_ranking(), self.get_ranking())
+
+    def test_update_users_added_and_removed(self):
+        removed = UserPointsSummary.objects.order_by('-points', 'id')[5]
+        removed.delete()
+        new_user = User.objects.create(username='newleader')
+        UserPointsSummary.objects.create(user=new_user, points=1000, badges=2)
+        Leaderboard.update_users([removed.user_id, new_user.pk])
+        self.assertEqual(self.get_expected_ranking(), self.get_ranking())
+
+    def test_user_deleted(self):
+        user = Leaderboard.objects.get(rank=3).user
+        user.delete()
+        self.assertEqual(self.get_expected_ranking(), self.get_ranking())
+
+    def test_user_renamed(self):
+        user = Leaderboard.objects.get(rank=1).user
+        user.first_name = 'Renamed'
+        user.save()
+        self.assertEqual('Renamed', Leaderboard.objects.get(rank=1).first_name)
+
+    def test_leaderboard_filtered_queries(self):
+        request_user = Leaderboard.objects.get(rank=1000).user
+        with self.assertNumQueries(5):
+            leaderboard = Points.get_leaderboard_filtered(request_user, count_top=20, above=20, below=20)
+        self.assertEqual(list(range(1, 21)) + list(range(981, 1022)),
+                         [leader['position'] for leader in leaderboard])
+
+
+class CourseCohortLeaderboardTest(OppiaTestCase):
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_permissions.json',
+                'tests/test_course_permissions.json',
+                'tests/test_cohort.json']
+
+    def setUp(self):
+        super(CourseCohortLeaderboardTest, self).setUp()
+        # cohort 3 has course 1, with user 2 as its only student
+        for user, points, badges in ((self.normal_user, 50, 1),
+                                     (self.teacher_user, 80, 0),
+                                     (self.staff_user, 20, 0)):
+            UserCourseSummary.objects.update_or_create(user=user, course_id=1,
+                                                       defaults={'points': points, 'badges_achieved': badges})
+        CourseLeaderboard.update_courses([1])
+
+    def get_positions(self, leaderboard):
+        return [(user.pk, user.total, user.badges) for user in leaderboard]
+
+    def test_course_ranked(self):
+        course = Course.objects.get(pk=1)
+        self.assertEqual([(self.teacher_user.pk, 80, 0), (self.normal_user.pk, 50, 1), (self.staff_user.pk, 20, 0)],
+                         self.get_positions(Points.get_leaderboard(course=course)))
+        self.assertEqual([(self.teacher_user.pk, 80, 0), (self.normal_user.pk, 50, 1)],
+                         self.get_positions(Points.get_leaderboard(2, course)))
+
+    def test_cohort_only_students(self):
+        cohort = Cohort.objects.get(pk=3)
+        self.assertEqual([(self.normal_user.pk, 50, 1)], self.get_positions(cohort.get_leaderboard()))
+
+    def test_cohort_updated_on_new_student(self):
+        cohort = Cohort.objects.get(pk=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Participant.objects.create(cohort=cohort, user=self.staff_user, role=Participant.STUDENT)
+        self.assertEqual([(self.normal_user.pk, 50, 1), (self.staff_user.pk, 20, 0)],
+                         self.get_positions(cohort.get_leaderboard()))
+
+    def test_paginated_by_rank(self):
+        leaderboard = Points.get_leaderboard(course=Course.objects.get(pk=1))
+        self.assertEqual(3, len(leaderboard))
+        with self.assertNumQueries(1):
+            page = leaderboard[1:3]
+        self.assertEqual([self.normal_user.pk, self.staff_user.pk], [user.pk for user in page])
@@ -6,7 +6,7 @@ from oppia.test import OppiaTestCase
 from oppia.models import Tracker, Points
 from profile.models import UserProfile
 from settings.models import SettingProperties
-from summary.models import CourseDailyStats
+from summary.models import CourseDailyStats, UserCourseSummary, UserCourseDailySummary
 
 
 class SummaryCronTest(OppiaTestCase):
@@ -117,6 +117,44 @@ class SummaryCronTest(OppiaTestCase):
         self.assertEqual(tracker_id, 1484256)
         # this id is from the test_tracker data
 
+    def get_summary_values(self):
+        return {
+            'user_course': list(UserCourseSummary.objects.order_by('user', 'course')
+                                .values('user', 'course', *UserCourseSummary.SUMMARY_FIELDS)),
+            'course_daily': list(CourseDailyStats.objects.order_by('course', 'day', 'type')
+                                 .values('course', 'day', 'type', 'total')),
+            'user_course_daily': list(UserCourseDailySummary.objects.order_by('day', 'user', 'course', 'type')
+                                      .values('day', 'user', 'course', 'type',
+                                              'total_tracked', 'time_spent_tracked',
+                                              'total_submitted', 'time_spent_submitted'))
+        }
+
+    def test_summary_bulk_matches_per_row(self):
+        call_command('update_summaries', '--fromstart', '--per-row', stdout=StringIO())
+        per_row = self.get_summary_values()
+
+        call_command('update_summaries', '--fromstart', stdout=StringIO())
+        bulk = self.get_summary_values()
+
+        for summary in bulk.values():
+            self.assertGreater(len(summary), 0)
+        self.assertEqual(per_row, bulk)
+
+    def test_summary_bulk_incremental_matches_per_row(self):
+        # process the trackers in two runs, so the second one has to add to the existing summaries
+        middle_tracker_pk = Tracker.objects.order_by('id')[Tracker.objects.count() // 2].id
+        later_trackers = list(Tracker.objects.filter(pk__gt=middle_tracker_pk))
+
+        results = []
+        for options in (['--per-row'], []):
+            Tracker.objects.filter(pk__gt=middle_tracker_pk).delete()
+            call_command('update_summaries', '--fromstart', *options, stdout=StringIO())
+            Tracker.objects.bulk_create(later_trackers)
+            call_command('update_summaries', *options, stdout=StringIO())
+            results.append(self.get_summary_values())
+
+        self.assertEqual(results[0], results[1])
+
     def test_summary_exclude_from_reporting(self):
         call_command('update_summaries', '--fromstart', stdout=StringIO())
 
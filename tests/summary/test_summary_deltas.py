@@ -0,0 +1,124 @@
+import datetime
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from io import StringIO
+
+from oppia.test import OppiaTestCase
+from oppia.models import Tracker, Course, Activity, Points
+from settings.models import SettingProperties
+from summary.models import CourseDailyStats, UserCourseSummary, UserCourseDailySummary, UserPointsSummary, \
+    SummaryDelta
+
+
+class SummaryDeltasTest(OppiaTestCase):
+
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_quiz.json',
+                'tests/test_permissions.json',
+                'default_gamification_events.json',
+                'tests/test_tracker.json',
+                'default_badges.json',
+                'tests/test_search_tracker.json',
+                'tests/test_course_permissions.json']
+
+    def get_summary_values(self):
+        return {
+            'user_course': list(UserCourseSummary.objects.order_by('user', 'course')
+                                .values('user', 'course', *UserCourseSummary.SUMMARY_FIELDS)),
+            'course_daily': list(CourseDailyStats.objects.order_by('course', 'day', 'type')
+                                 .values('course', 'day', 'type', 'total')),
+            'user_points': list(UserPointsSummary.objects.order_by('user').values('user', 'points', 'badges')),
+            'user_course_daily': list(UserCourseDailySummary.objects.order_by('day', 'user', 'course', 'type')
+                                      .values('day', 'user', 'course', 'type',
+                                              'total_tracked', 'time_spent_tracked',
+                                              'total_submitted', 'time_spent_submitted'))
+        }
+
+    def create_tracker(self, activity, **kwargs):
+        return Tracker(user=self.normal_user,
+                       course=activity.section.course,
+                       digest=activity.digest,
+                       type=activity.type,
+                       completed=True,
+                       time_taken=30,
+                       tracker_date=timezone.now() - datetime.timedelta(days=1),
+                       **kwargs)
+
+    def test_disabled_by_default(self):
+        activity = Activity.objects.filter(type=Activity.PAGE).first()
+        self.create_tracker(activity).save()
+        self.assertEqual(0, SummaryDelta.objects.count())
+
+    @override_settings(OPPIA_SUMMARY_REALTIME=True)
+    def test_deltas_match_update_summaries(self):
+        call_command('update_summaries', stdout=StringIO())
+
+        course = Course.objects.get(pk=1)
+        activities = Activity.objects.filter(section__course=course)
+        self.create_tracker(activities.filter(type=Activity.PAGE).first()).save()
+        # saved without signals, so it has to be picked up by the catch up
+        Tracker.objects.bulk_create([self.create_tracker(activities.filter(type=Activity.QUIZ).first())])
+        self.create_tracker(activities.filter(type=Activity.PAGE).last()).save()
+        Tracker(user=self.normal_user, type='search', digest='', data='{"query": "abc"}').save()
+        self.assertEqual(3, SummaryDelta.objects.filter(tracker_pk__isnull=False).count())
+
+        call_command('process_summary_deltas', '--once', stdout=StringIO())
+
+        self.assertEqual(0, SummaryDelta.objects.count())
+        self.assertEqual(Tracker.objects.latest('id').id, SettingProperties.get_int('last_tracker_pk', 0))
+        folded = self.get_summary_values()
+
+        call_command('update_summaries', '--fromstart', stdout=StringIO())
+        self.assertEqual(self.get_summary_values(), folded)
+
+    @override_settings(OPPIA_SUMMARY_REALTIME=True)
+    def test_already_processed_deltas(self):
+        course = Course.objects.get(pk=1)
+        self.create_tracker(Activity.objects.filter(section__course=course, type=Activity.PAGE).first()).save()
+        call_command('update_summaries', stdout=StringIO())
+        expected = self.get_summary_values()
+
+        # the tracker has already been included by update_summaries
+        call_command('process_summary_deltas', '--once', stdout=StringIO())
+        self.assertEqual(0, SummaryDelta.objects.count())
+        self.assertEqual(expected, self.get_summary_values())
+
+    @override_settings(OPPIA_SUMMARY_REALTIME=True)
+    def test_points_in_later_batch(self):
+        call_command('update_summaries', stdout=StringIO())
+        course = Course.objects.get(pk=1)
+        self.create_tracker(Activity.objects.filter(section__course=course, type=Activity.PAGE).first()).save()
+        call_command('process_summary_deltas', '--once', stdout=StringIO())
+        points = UserCourseSummary.objects.get(user=self.normal_user, course=course).points
+
+        # e.g. awarded later by process_points_jobs, without any new tracker in the batch
+        Points(user=self.normal_user, course=course, points=25, type='activitycompleted', description='late').save()
+        call_command('process_summary_deltas', '--once', stdout=StringIO())
+
+        self.assertEqual(0, SummaryDelta.objects.count())
+        self.assertEqual(points + 25, UserCourseSummary.objects.get(user=self.normal_user, course=course).points)
+        folded = self.get_summary_values()
+
+        call_command('update_summaries', '--fromstart', stdout=StringIO())
+        self.assertEqual(self.get_summary_values(), folded)
+
+    def test_main_cron_locked(self):
+        SettingProperties.set_int('oppia_cron_lock', 1)
+        SummaryDelta.objects.create(user=self.normal_user, tracker_pk=Tracker.objects.latest('id').id + 1, count=1)
+        out = StringIO()
+        call_command('process_summary_deltas', '--once', stdout=out)
+        self.assertIn("Oppia cron is already running", out.getvalue())
+        self.assertEqual(1, SummaryDelta.objects.count())
+        self.assertEqual(999, SettingProperties.get_int('oppia_summary_cron_lock', 999))
+
+    def test_locked(self):
+        SettingProperties.set_int('oppia_summary_cron_lock', 1)
+        SummaryDelta.objects.create(user=self.normal_user, tracker_pk=Tracker.objects.latest('id').id + 1, count=1)
+        out = StringIO()
+        call_command('process_summary_deltas', '--once', stdout=out)
+        self.assertIn("already running", out.getvalue())
+        self.assertEqual(1, SummaryDelta.objects.count())
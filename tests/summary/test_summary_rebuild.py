@@ -0,0 +1,80 @@
+import multiprocessing
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from io import StringIO
+
+from oppia.test import OppiaTransactionTestCase
+from settings.models import SettingProperties
+from summary.models import CourseDailyStats, UserCourseSummary, UserCourseDailySummary, UserPointsSummary
+
+
+class SummaryRebuildTest(OppiaTransactionTestCase):
+
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_quiz.json',
+                'tests/test_permissions.json',
+                'default_gamification_events.json',
+                'tests/test_tracker.json',
+                'default_badges.json',
+                'tests/test_search_tracker.json',
+                'tests/test_course_permissions.json']
+
+    def get_summary_values(self):
+        return {
+            'user_course': list(UserCourseSummary.objects.order_by('user', 'course')
+                                .values('user', 'course', *UserCourseSummary.SUMMARY_FIELDS)),
+            'course_daily': list(CourseDailyStats.objects.order_by('course', 'day', 'type')
+                                 .values('course', 'day', 'type', 'total')),
+            'user_points': list(UserPointsSummary.objects.order_by('user').values('user', 'points', 'badges')),
+            'user_course_daily': list(UserCourseDailySummary.objects.order_by('day', 'user', 'course', 'type')
+                                      .values('day', 'user', 'course', 'type',
+                                              'total_tracked', 'time_spent_tracked',
+                                              'total_submitted', 'time_spent_submitted'))
+        }
+
+    def test_rebuild_matches_fromstart(self):
+        call_command('update_summaries', '--fromstart', stdout=StringIO())
+        expected = self.get_summary_values()
+
+        call_command('update_summaries', '--fromstart', '--workers', '1', stdout=StringIO())
+        self.assertEqual(expected, self.get_summary_values())
+        self.assertEqual(1484256, SettingProperties.get_int('last_tracker_pk', 0))
+        self.assertEqual(999, SettingProperties.get_int('oppia_summary_cron_lock', 999))
+
+    def test_rebuild_twice(self):
+        # the staging tables are dropped once promoted, so a second rebuild has to create them again
+        call_command('update_summaries', '--fromstart', '--workers', '1', stdout=StringIO())
+        expected = self.get_summary_values()
+        call_command('update_summaries', '--fromstart', '--workers', '1', stdout=StringIO())
+        self.assertEqual(expected, self.get_summary_values())
+
+        tables = connection.introspection.table_names()
+        self.assertFalse([table for table in tables if '_staging' in table])
+        self.assertIn(UserCourseSummary._meta.db_table, tables)
+
+    def test_rebuild_multiple_workers_matches_serial(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('the worker processes need a test database they can share '
+                          '(see oppiamobile/settings_test_shared_db.py)')
+        if multiprocessing.get_start_method() != 'fork':
+            self.skipTest('the worker processes only get the test database settings when forked')
+
+        call_command('update_summaries', '--fromstart', '--workers', '1', stdout=StringIO())
+        expected = self.get_summary_values()
+
+        call_command('update_summaries', '--fromstart', '--workers', '3', stdout=StringIO())
+        self.assertEqual(expected, self.get_summary_values())
+        self.assertEqual(1484256, SettingProperties.get_int('last_tracker_pk', 0))
+        self.assertFalse([table for table in connection.introspection.table_names() if '_staging' in table])
+
+    def test_workers_requires_fromstart(self):
+        with self.assertRaises(CommandError):
+            call_command('update_summaries', '--workers', '2', stdout=StringIO())
+
+    def test_workers_invalid(self):
+        with self.assertRaises(CommandError):
+            call_command('update_summaries', '--fromstart', '--workers', '0', stdout=StringIO())
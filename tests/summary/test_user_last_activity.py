@@ -0,0 +1,61 @@
+import datetime
+
+from django.core.management import call_command
+from django.db.models import Max
+
+from io import StringIO
+
+from oppia.test import OppiaTestCase
+from summary.models import UserCourseDailySummary, UserCourseSummary, UserLastActivity
+
+
+class UserLastActivityTest(OppiaTestCase):
+
+    fixtures = ['tests/test_user.json',
+                'tests/test_oppia.json',
+                'tests/test_quiz.json',
+                'tests/test_permissions.json',
+                'default_gamification_events.json',
+                'tests/test_tracker.json',
+                'default_badges.json',
+                'tests/test_search_tracker.json',
+                'tests/test_course_permissions.json']
+
+    def get_expected_last_days(self):
+        return dict(UserCourseDailySummary.objects
+                    .values('user')
+                    .annotate(last_active=Max('day'))
+                    .values_list('user', 'last_active'))
+
+    def get_last_days(self):
+        return dict(UserLastActivity.objects.values_list('user', 'last_active'))
+
+    def test_last_activity_matches_daily_summaries(self):
+        call_command('update_summaries', stdout=StringIO())
+        self.assertNotEqual(0, UserLastActivity.objects.count())
+        self.assertEqual(self.get_expected_last_days(), self.get_last_days())
+
+    def test_update_users(self):
+        call_command('update_summaries', stdout=StringIO())
+        UserCourseDailySummary.objects.create(user=self.normal_user,
+                                              course_id=1,
+                                              day=datetime.date(2030, 2, 3),
+                                              type='page',
+                                              total_tracked=1)
+
+        UserLastActivity.update_users([self.normal_user.id])
+        self.assertEqual(datetime.date(2030, 2, 3), UserLastActivity.objects.get(user=self.normal_user).last_active)
+        self.assertEqual(self.get_expected_last_days(), self.get_last_days())
+
+    def test_active_counts(self):
+        call_command('update_summaries', stdout=StringIO())
+        excluded_users = UserCourseSummary.get_excluded_users()
+        summaries = UserCourseDailySummary.objects.exclude(user__in=excluded_users)
+        days = sorted(set(summaries.values_list('day', flat=True)))
+        days = [days[0] - datetime.timedelta(days=1)] + days + [days[-1] + datetime.timedelta(days=1)]
+
+        with self.assertNumQueries(1):
+            total, counts = UserLastActivity.get_active_counts(days, excluded_users)
+
+        self.assertEqual(summaries.values('user').distinct().count(), total)
+        self.assertEqual([summaries.filter(day__gte=day).values('user').distinct().count() for day in days], counts)
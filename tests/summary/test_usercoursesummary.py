@@ -121,6 +121,14 @@ class UserCourseSummaryTestCourseV1(OppiaTestCase):
         call_command('update_summaries', '--fromstart', stdout=StringIO())
         self.check_summary_values()
 
+    def test_incremental_per_row(self):
+        call_command('update_summaries', '--per-row', stdout=StringIO())
+        self.check_summary_values()
+
+    def test_fromstart_per_row(self):
+        call_command('update_summaries', '--fromstart', '--per-row', stdout=StringIO())
+        self.check_summary_values()
+
     def check_summary_values(self):
         # User A
         user_a_summary = UserCourseSummary.objects.get(
@@ -164,6 +172,14 @@ class UserCourseSummaryTestCourseV2(OppiaTestCase):
         call_command('update_summaries', '--fromstart', stdout=StringIO())
         self.check_summary_values()
 
+    def test_incremental_per_row(self):
+        call_command('update_summaries', '--per-row', stdout=StringIO())
+        self.check_summary_values()
+
+    def test_fromstart_per_row(self):
+        call_command('update_summaries', '--fromstart', '--per-row', stdout=StringIO())
+        self.check_summary_values()
+
     def check_summary_values(self):
         # User A
         user_a_summary = UserCourseSummary.objects.get(
@@ -214,6 +230,14 @@ class UserCourseSummaryTestCourseV3(OppiaTestCase):
         call_command('update_summaries', '--fromstart', stdout=StringIO())
         self.check_summary_values()
 
+    def test_incremental_per_row(self):
+        call_command('update_summaries', '--per-row', stdout=StringIO())
+        self.check_summary_values()
+
+    def test_fromstart_per_row(self):
+        call_command('update_summaries', '--fromstart', '--per-row', stdout=StringIO())
+        self.check_summary_values()
+
     def check_summary_values(self):
         # User A
         user_a_summary = UserCourseSummary.objects.get(
@@ -1,3 +1,4 @@
+import json
 import os
 
 from django.urls import reverse
@@ -7,6 +8,7 @@ from gamification.models import CourseGamificationEvent, \
                                 ActivityGamificationEvent
 from oppia.test import OppiaTestCase
 from oppia.models import Course, CoursePublishingLog, Quiz, Activity, Question, CourseStatus
+from oppia.utils.course_file import get_course_structure_path
 from zipfile import BadZipfile
 
 from quiz.models import QuizProps, QuestionProps
@@ -51,6 +53,31 @@ class CourseUploadTest(OppiaTestCase):
                                  302,
                                  200)
 
+    def test_upload_saves_structure(self):
+        with open(self.course_file_path, 'rb') as course_file:
+            self.client.force_login(self.admin_user)
+            self.client.post(self.URL_UPLOAD,
+                             {'course_file': course_file,
+                              'status': CourseStatus.LIVE})
+
+        course = Course.objects.latest('lastupdated_date')
+        with open(get_course_structure_path(course.shortname)) as structure_file:
+            structure = json.load(structure_file)
+        self.assertEqual(course.shortname, structure['module']['meta']['shortname'])
+
+    def test_upload_counts_activities(self):
+        with open(self.course_file_path, 'rb') as course_file:
+            self.client.force_login(self.admin_user)
+            self.client.post(self.URL_UPLOAD,
+                             {'course_file': course_file,
+                              'status': CourseStatus.LIVE})
+
+        course = Course.objects.latest('lastupdated_date')
+        self.assertEqual(Activity.objects.filter(section__course=course, baseline=False).count(),
+                         course.no_activities)
+        with self.assertNumQueries(0):
+            self.assertEqual(course.no_activities, course.get_no_activities())
+
     def test_upload_with_empty_sections(self):
 
         with open(self.empty_section_course, 'rb') as course_file: